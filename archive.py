@@ -0,0 +1,136 @@
+import json
+import os
+import sqlite3
+
+# Cold storage for cohorts that no longer change. Students and their courses
+# are copied into a separate SQLite file (ATTACHed as `archive`) and deleted
+# from the hot database in the same transaction, so data.db only carries the
+# students that are still being worked on. Archived rows are read only when a
+# search explicitly asks for them.
+
+ARCHIVE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS archive.students (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        index_number TEXT UNIQUE NOT NULL,
+        archived_at TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS archive.courses (
+        id INTEGER PRIMARY KEY,
+        student_id INTEGER NOT NULL,
+        year TEXT, semester TEXT,
+        course_name TEXT, grade TEXT, credits REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS archive.idx_archive_courses_student ON courses(student_id)",
+]
+
+
+class ArchiveConflict(sqlite3.IntegrityError):
+    # Index numbers already in the archive under another student; nothing is moved
+    def __init__(self, index_numbers):
+        shown = ", ".join(index_numbers[:5]) + (f" and {len(index_numbers) - 5:,} more" if len(index_numbers) > 5 else "")
+        super().__init__(f"already archived as another student: {shown}")
+        self.index_numbers = index_numbers
+
+
+def attach(conn, path):
+    conn.commit()  # ATTACH cannot run inside a transaction
+    if not any(row[1] == 'archive' for row in conn.execute("PRAGMA database_list")):
+        conn.execute("ATTACH DATABASE ? AS archive", (path,))
+    for stmt in ARCHIVE_SCHEMA:
+        conn.execute(stmt)
+    conn.commit()
+
+
+def detach(conn):
+    conn.execute("DETACH DATABASE archive")
+
+
+def archive_students(conn, path, student_ids, store=None):
+    # Move students (and, through the cascade, their courses) into `path`.
+    # Returns (students, courses) moved. Set-based: a handful of statements
+    # whatever the cohort size. When the course store keeps courses outside
+    # data.db (shards, columnar) they are copied from the store and removed
+    # there once the move has committed.
+    attach(conn, path)
+    student_ids = list(student_ids)
+    ids = json.dumps(student_ids)
+    external = store is not None and store.external
+    try:
+        conn.execute("BEGIN")
+        # An earlier archived student with the same index number stays; replacing
+        # it would drop it and orphan its archived courses
+        taken = [idx for idx, in conn.execute("""
+            SELECT s.index_number FROM main.students s JOIN archive.students a ON a.index_number = s.index_number
+            WHERE s.id IN (SELECT value FROM json_each(?)) AND a.id != s.id
+            ORDER BY s.index_number
+        """, (ids,))]
+        if taken:
+            raise ArchiveConflict(taken)
+        moved = conn.execute("""
+            INSERT INTO archive.students (id, name, index_number, archived_at)
+            SELECT id, name, index_number, CURRENT_TIMESTAMP FROM main.students
+            WHERE id IN (SELECT value FROM json_each(?))
+        """, (ids,)).rowcount
+        if external:
+            courses = conn.executemany("""
+                INSERT INTO archive.courses (id, student_id, year, semester, course_name, grade, credits)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, store.student_courses(student_ids)).rowcount
+        else:
+            courses = conn.execute("""
+                INSERT INTO archive.courses (id, student_id, year, semester, course_name, grade, credits)
+                SELECT id, student_id, year, semester, course_name, grade, credits FROM main.courses
+                WHERE student_id IN (SELECT value FROM json_each(?))
+            """, (ids,)).rowcount
+        conn.execute("DELETE FROM main.students WHERE id IN (SELECT value FROM json_each(?))", (ids,))
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        detach(conn)
+    if external:
+        store.delete_students(student_ids)
+    return moved, courses
+
+
+def vacuum(conn):
+    # Give the pages freed by archiving back to the file system
+    conn.commit()
+    conn.execute("VACUUM")
+
+
+def search(path, text, limit=50):
+    # Archived students whose name or index number contains `text`:
+    # [(id, name, index_number, archived_at)]
+    if not os.path.exists(path) or not text.strip():
+        return []
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        pattern = f"%{text.strip()}%"
+        return conn.execute("""
+            SELECT id, name, index_number, archived_at FROM students
+            WHERE name LIKE ? OR index_number LIKE ?
+            ORDER BY name LIMIT ?
+        """, (pattern, pattern, limit)).fetchall()
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        conn.close()
+
+
+def courses(path, student_id):
+    # [(year, semester, course_name, grade, credits)] of one archived student
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return conn.execute("""
+            SELECT year, semester, course_name, grade, credits FROM courses
+            WHERE student_id=? ORDER BY id
+        """, (student_id,)).fetchall()
+    finally:
+        conn.close()
@@ -0,0 +1,118 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import course_store
+import gpa_cache
+
+# asyncio facade over the course data for integrations (e.g. the portal) that
+# need GPAs for thousands of students at once.
+#
+# Calls made in the same event-loop tick are merged: every student id asked
+# for is collected, and one flush sends them as IN (...) queries of up to
+# `max_batch` ids each to a bounded thread pool. Each worker thread keeps its
+# own connection. Many concurrent callers therefore cost a few queries, not
+# one per student per call. A student whose rows are already being fetched
+# waits for that query instead of going into the next one.
+#
+#     async with AsyncGPA('data.db', grade_points) as api:
+#         results = await api.get_gpa([1, 2, 3])            # {id: GPAResult}
+#         term = await api.term_summary(ids, 'Year 1', 'Semester 1')
+
+DEFAULT_WORKERS = 4
+MAX_BATCH = 5000
+
+
+class AsyncGPA:
+    def __init__(self, database, grade_points, max_workers=DEFAULT_WORKERS, max_batch=MAX_BATCH):
+        self.database = database
+        self.grade_points = grade_points
+        self.max_batch = max_batch
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gpa-async')
+        self.local = threading.local()
+        self.sessions = []
+        self.sessions_lock = threading.Lock()
+        self.pending = {}  # student_id -> [Future] waiting for the next flush
+        self.inflight = {}  # student_id -> [Future] waiting for a running query
+        self.flush_handle = None
+        self.queries = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def session(self):
+        # (conn, course store) of the calling worker thread
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            # Read-only: workers never create tables or move courses between shards
+            conn = course_store.connect_reader(self.database, check_same_thread=False)
+            session = self.local.session = (conn, course_store.open_reader(conn, self.database))
+            with self.sessions_lock:
+                self.sessions.append(session)
+        return session
+
+    def fetch(self, student_ids):
+        # Worker thread: one IN (...) query (one per shard when sharded)
+        _, store = self.session()
+        return store.grade_rows_many(student_ids)
+
+    async def grade_rows(self, student_ids):
+        # {student_id: [(year, semester, grade, credits)]}, batched with every
+        # other call made before the loop next gets control
+        loop = asyncio.get_running_loop()
+        waiting = {}
+        for sid in dict.fromkeys(student_ids):
+            future = waiting[sid] = loop.create_future()
+            futures = self.inflight.get(sid)
+            if futures is None:
+                futures = self.pending.setdefault(sid, [])
+            futures.append(future)
+        if self.pending and self.flush_handle is None:
+            self.flush_handle = loop.call_soon(self.flush, loop)
+        return {sid: await future for sid, future in waiting.items()}
+
+    def flush(self, loop):
+        self.flush_handle = None
+        pending, self.pending = self.pending, {}
+        ids = list(pending)
+        for start in range(0, len(ids), self.max_batch):
+            chunk = ids[start:start + self.max_batch]
+            self.queries += 1
+            for sid in chunk:
+                self.inflight[sid] = pending[sid]
+            task = loop.run_in_executor(self.executor, self.fetch, chunk)
+            task.add_done_callback(partial(self.deliver, chunk))
+
+    def deliver(self, chunk, task):
+        error = task.exception()
+        rows = {} if error else task.result()
+        for sid in chunk:
+            for future in self.inflight.pop(sid):
+                if future.done():
+                    continue  # caller cancelled
+                if error:
+                    future.set_exception(error)
+                else:
+                    future.set_result(rows.get(sid, []))
+
+    async def get_gpa(self, student_ids):
+        # {student_id: GPAResult}; students without courses get an empty result
+        rows = await self.grade_rows(student_ids)
+        return {sid: gpa_cache.GPAResult(gpa_cache.term_totals(r, self.grade_points)) for sid, r in rows.items()}
+
+    async def term_summary(self, student_ids, year, semester):
+        # {student_id: (gpa, credits)} of one term
+        results = await self.get_gpa(student_ids)
+        return {sid: result.term(year, semester) for sid, result in results.items()}
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        with self.sessions_lock:
+            for conn, store in self.sessions:
+                store.close()
+                conn.close()
+            self.sessions.clear()
@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+from main import grade_points
+
+import async_api
+
+# 1, 10 and 100 concurrent callers, 20 students each: with batching the
+# callers of one tick share a single IN (...) query, so the work per caller
+# falls as concurrency rises.
+
+PER_CALLER = 20
+
+
+@pytest.mark.parametrize('callers', [1, 10, 100])
+def test_async_gpa(benchmark, workload, workdir, callers):
+    span = max(1, workload['students'] - PER_CALLER)
+
+    async def run(api):
+        jobs = [api.get_gpa(range(1 + (i * PER_CALLER) % span, 1 + (i * PER_CALLER) % span + PER_CALLER))
+                for i in range(callers)]
+        return await asyncio.gather(*jobs)
+
+    api = async_api.AsyncGPA(str(workdir / 'data.db'), grade_points)
+    loop = asyncio.new_event_loop()
+    try:
+        results = benchmark(lambda: loop.run_until_complete(run(api)))
+        benchmark.extra_info.update(students=workload['students'], seed=workload['seed'], callers=callers,
+                                    queries=api.queries)
+    finally:
+        loop.close()
+        api.close()
+    assert len(results) == callers
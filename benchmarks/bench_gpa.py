@@ -0,0 +1,122 @@
+import random
+
+import pandas as pd
+
+from main import grade_points
+
+# Hot paths of GPAApp timed against a generated database. From the repo root:
+#   pytest benchmarks --students medium
+# Each run is saved as JSON under benchmarks/results/ (see benchmarks/pytest.ini).
+
+
+def pick_students(app, count=50, seed=7):
+    rows = app.cursor.execute("SELECT name, index_number FROM students ORDER BY id").fetchall()
+    return random.Random(seed).sample(rows, min(count, len(rows)))
+
+
+def select(app, student, year='Year 1', semester='Semester 1'):
+    app.current_student = student
+    app.year_var.set(year)
+    app.semester_var.set(semester)
+
+
+def test_filter_students(benchmark, headless_app):
+    app = headless_app.app
+    patterns = iter(['kas', 'per', 'IT2', 'silva', 'nad'] * 10_000)
+
+    def run():
+        app.student_combo.set(next(patterns))
+        app.filter_students(None)
+
+    benchmark(run)
+
+
+def test_load_courses(benchmark, headless_app):
+    app = headless_app.app
+    students = iter(pick_students(app) * 10_000)
+
+    def run():
+        select(app, next(students))
+        app.load_courses()
+
+    benchmark(run)
+
+
+def test_calculate_gpa(benchmark, headless_app):
+    app = headless_app.app
+    students = iter(pick_students(app) * 10_000)
+
+    def run():
+        select(app, next(students))
+        app.calculate_gpa()
+
+    benchmark(run)
+
+
+def test_calculate_gpa_cold(benchmark, headless_app):
+    app = headless_app.app
+    students = iter(pick_students(app) * 10_000)
+
+    def setup():
+        select(app, next(students))
+        app.gpa_cache.clear()
+
+    benchmark.pedantic(app.calculate_gpa, setup=setup, rounds=200)
+
+
+def test_save_courses(benchmark, headless_app):
+    app = headless_app.app
+    students = iter(pick_students(app) * 10_000)
+
+    def setup():
+        select(app, next(students))
+        app.load_courses()
+
+    benchmark.pedantic(app.save_courses, setup=setup, rounds=50)
+
+
+def test_import_excel(benchmark, headless_app, tmp_path):
+    app = headless_app.app
+    rng = random.Random(3)
+    grades = list(grade_points)
+    rows = [{'year': f"Year {rng.randint(1, 4)}", 'semester': rng.choice(["Semester 1", "Semester 2"]),
+             'course_name': f"Course {i}", 'grade': rng.choice(grades), 'credits': rng.choice([2, 3, 4])}
+            for i in range(500)]
+    path = tmp_path / 'import.xlsx'
+    pd.DataFrame(rows).to_excel(path, index=False)
+    headless_app.dialogs.open_path = str(path)
+    counter = iter(range(10_000_000))
+
+    def setup():
+        # Import into a fresh student every round so rounds do equal work
+        n = next(counter)
+        name, index_number = f"Bench Import {n}", f"BENCH{n:07d}"
+        app.cursor.execute("INSERT INTO students (name, index_number) VALUES (?, ?)", (name, index_number))
+        app.conn.commit()
+        app.current_student = (name, index_number)
+
+    benchmark.pedantic(app.import_excel, setup=setup, rounds=10)
+    benchmark.extra_info['rows'] = len(rows)
+
+
+def test_export_all_gpa_summary(benchmark, headless_app):
+    app = headless_app.app
+    # No output file: times the summary computation, not openpyxl
+    headless_app.dialogs.save_path = ''
+    benchmark.pedantic(app.export_all_gpa_summary, setup=app.gpa_cache.clear, rounds=3, iterations=1)
+
+
+def test_import_batch(benchmark, headless_app, tmp_path):
+    app = headless_app.app
+    rng = random.Random(5)
+    grades = list(grade_points)
+    students = [idx for _, idx in pick_students(app, count=500)]
+    for dept in range(4):
+        rows = [{'index_number': rng.choice(students), 'year': f"Year {rng.randint(1, 4)}",
+                 'semester': rng.choice(["Semester 1", "Semester 2"]), 'course_name': f"Dept {dept} Course {i}",
+                 'grade': rng.choice(grades), 'credits': rng.choice([2, 3, 4])} for i in range(2000)]
+        pd.DataFrame(rows).to_excel(tmp_path / f"dept{dept}.xlsx", index=False)
+    headless_app.dialogs.directory = str(tmp_path)
+
+    benchmark.pedantic(app.import_batch, rounds=3, iterations=1)
+    benchmark.extra_info['rows'] = 4 * 2000
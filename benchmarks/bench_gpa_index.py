@@ -0,0 +1,35 @@
+import sqlite3
+import types
+
+import pytest
+
+from main import GPAApp, grade_points
+
+import course_store
+import gpa_index
+
+# Threshold lists off the indexed GPA column: the two standing reports, a wide
+# custom range, and streaming a report to CSV.
+
+
+@pytest.fixture
+def store(workdir):
+    conn = sqlite3.connect(str(workdir / 'data.db'))
+    GPAApp.init_db(types.SimpleNamespace(conn=conn, cursor=conn.cursor()))
+    store = course_store.open_store(conn, str(workdir / 'data.db'), grade_points=grade_points)
+    yield store
+    store.close()
+    conn.close()
+
+
+@pytest.mark.parametrize('report', ['deans-list', 'probation', 'gpa>=3.0'])
+def test_gpa_range(benchmark, workload, store, report):
+    lo, hi = gpa_index.REPORTS.get(report, (3.0, None))
+    rows = benchmark(lambda: list(store.gpa_range(lo, hi)))
+    benchmark.extra_info.update(students=workload['students'], seed=workload['seed'], rows=len(rows))
+
+
+def test_gpa_report_export(benchmark, workload, store, tmp_path):
+    path = str(tmp_path / 'report.csv')
+    count = benchmark(lambda: gpa_index.write_report(store.gpa_range(3.0, None), path))
+    benchmark.extra_info.update(students=workload['students'], seed=workload['seed'], rows=count)
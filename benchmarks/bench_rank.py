@@ -0,0 +1,48 @@
+import sqlite3
+import types
+
+import pytest
+
+from main import GPAApp, grade_points
+
+import course_store
+import rank_index
+
+# Cohort rank index: the one-off build from the aggregates, a rank lookup, and
+# a lookup right after one student's courses changed (incremental refresh).
+
+
+@pytest.fixture
+def store(workdir):
+    conn = sqlite3.connect(str(workdir / 'data.db'))
+    GPAApp.init_db(types.SimpleNamespace(conn=conn, cursor=conn.cursor()))
+    store = course_store.open_store(conn, str(workdir / 'data.db'))
+    yield store
+    store.close()
+    conn.close()
+
+
+def test_rank_build(benchmark, workload, store):
+    benchmark.extra_info.update(students=workload['students'], seed=workload['seed'])
+    index = benchmark(rank_index.RankIndex.build, store.conn, store, grade_points)
+    benchmark.extra_info['ranked'] = len(index.members)
+
+
+def test_rank_lookup(benchmark, workload, store):
+    index = rank_index.RankIndex.build(store.conn, store, grade_points)
+    ids = iter(list(index.members) * 1000)
+    benchmark.extra_info.update(students=workload['students'], seed=workload['seed'])
+    assert benchmark(lambda: index.rank(next(ids))) is not None
+
+
+def test_rank_after_change(benchmark, workload, store):
+    index = rank_index.RankIndex.build(store.conn, store, grade_points)
+    ids = iter(list(index.members) * 1000)
+
+    def touched():
+        student_id = next(ids)
+        index.touch(student_id)
+        return index.rank(student_id)
+
+    benchmark.extra_info.update(students=workload['students'], seed=workload['seed'])
+    assert benchmark(touched) is not None
@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from main import grade_points
+
+import service
+
+# The HTTP service on a loopback port: one student's GPA per request versus
+# the same students in one batched request, and concurrent identical
+# summary requests.
+
+
+@pytest.fixture
+def client(workdir):
+    server = service.make_server(str(workdir / 'data.db'), grade_points, port=0)
+    service.serve_in_thread(server)
+    yield service.ServiceClient('http://%s:%d' % server.server_address[:2])
+    server.shutdown()
+    server.server_close()
+    server.pool.close()
+
+
+def test_service_gpa_each(benchmark, workload, client):
+    ids = list(range(1, min(workload['students'], 200) + 1))
+    benchmark.extra_info.update(students=workload['students'], seed=workload['seed'], requests=len(ids))
+    results = benchmark(lambda: [client.request('GET', f'/students/{sid}/gpa') for sid in ids])
+    assert len(results) == len(ids)
+
+
+def test_service_gpa_batch(benchmark, workload, client):
+    ids = list(range(1, min(workload['students'], 200) + 1))
+    benchmark.extra_info.update(students=workload['students'], seed=workload['seed'], requests=1)
+    results = benchmark(client.gpa, ids)
+    assert len(results) == len(ids)
+
+
+def test_service_summary_concurrent(benchmark, workload, client):
+    # Eight clients asking for the summary at once share one computation
+    callers = 8
+    with ThreadPoolExecutor(callers) as pool:
+        results = benchmark(lambda: list(pool.map(lambda _: client.request('GET', '/summary'), range(callers))))
+    benchmark.extra_info.update(students=workload['students'], seed=workload['seed'], requests=callers)
+    assert len(results) == callers
@@ -0,0 +1,49 @@
+import shutil
+import sqlite3
+import types
+
+import pytest
+
+from main import GPAApp, grade_points
+
+import course_store
+
+# Course store with 1 (plain data.db), 2 and 4 shard files: a bulk upsert that
+# touches every student, and the fanned-out summary export.
+
+
+@pytest.fixture(params=[1, 2, 4], ids=lambda n: f"shards={n}")
+def store(request, workload, tmp_path):
+    database = str(tmp_path / 'data.db')
+    shutil.copyfile(workload['path'], database)
+    conn = sqlite3.connect(database)
+    GPAApp.init_db(types.SimpleNamespace(conn=conn, cursor=conn.cursor()))
+    if request.param == 1:
+        store = course_store.SQLiteCourseStore(conn, database)
+    else:
+        # Small blocks so every shard gets students even in the small workload
+        block = max(1, workload['students'] // (request.param * 4))
+        store = course_store.ShardedCourseStore(conn, course_store.shard_paths(database, request.param), block)
+    yield store
+    store.close()
+    conn.close()
+
+
+def test_shard_upsert(benchmark, workload, store):
+    ids = [sid for sid, in store.conn.execute("SELECT id FROM students")]
+    rounds = iter(range(1, 1000))
+
+    def upsert():
+        # A new term row per student each round, so every round writes
+        n = next(rounds)
+        return store.upsert([(sid, 'Year 5', 'Summer', f"Bench {n}", 'B', 3.0) for sid in ids])
+
+    benchmark.extra_info.update(students=workload['students'], seed=workload['seed'])
+    changed = benchmark.pedantic(upsert, rounds=3, iterations=1)
+    assert changed == len(ids)
+
+
+def test_shard_summary(benchmark, workload, store):
+    benchmark.extra_info.update(students=workload['students'], seed=workload['seed'])
+    records = benchmark.pedantic(store.summary, args=(grade_points,), kwargs={'jobs': 1}, rounds=3, iterations=1)
+    benchmark.extra_info['rows'] = len(records)
@@ -0,0 +1,18 @@
+import pytest
+
+from main import grade_points
+
+import summary
+
+# Whole-table GPA summary with 1..8 worker processes. Speed-up is bounded by
+# the machine's cores; compare rounds with `pytest-benchmark compare`.
+
+
+@pytest.mark.parametrize('jobs', [1, 2, 4, 8])
+def test_summary_jobs(benchmark, workload, workdir, jobs):
+    database = str(workdir / 'data.db')
+    benchmark.extra_info.update(students=workload['students'], seed=workload['seed'], jobs=jobs)
+    # min_shard=1 so small workloads still fan out to every worker
+    records = benchmark.pedantic(summary.compute_summary, args=(database, grade_points),
+                                 kwargs={'jobs': jobs, 'min_shard': 1}, rounds=3, iterations=1)
+    benchmark.extra_info['rows'] = len(records)
@@ -0,0 +1,244 @@
+import argparse
+import glob
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+for path in (ROOT, HERE):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import pandas as pd  # noqa: E402
+
+import datagen  # noqa: E402
+import headless  # noqa: E402
+
+# Runs one fixed workload against every app version (V*/V*.py snapshots and
+# main.py), prints a comparison table and exits non-zero when the candidate is
+# slower than the baseline beyond the tolerance on any tracked operation.
+#
+#   python benchmarks/compare_versions.py                      # all versions, main vs V3.1
+#   python benchmarks/compare_versions.py --save base.json     # record a run
+#   python benchmarks/compare_versions.py --against base.json  # gate main against it
+
+OPERATIONS = ['load_courses', 'calculate_gpa', 'save_courses', 'import_excel',
+              'filter_students', 'export_all_gpa_summary']
+
+
+def discover_versions():
+    versions = {}
+    for path in sorted(glob.glob(os.path.join(ROOT, 'V*', 'V*.py'))):
+        versions[os.path.splitext(os.path.basename(path))[0]] = path
+    versions['main'] = os.path.join(ROOT, 'main.py')
+    return versions
+
+
+def has_index_number(conn):
+    return any(col[1] == 'index_number' for col in conn.execute("PRAGMA table_info(students)"))
+
+
+def populate(conn, students, seed):
+    # Same students and courses for every version; names carry the id so the
+    # older name-UNIQUE schemas accept them.
+    rng = random.Random(seed)
+    with_index = has_index_number(conn)
+    keys = []
+    for student_id in range(1, students + 1):
+        name = f"{rng.choice(datagen.FIRST_NAMES)} {rng.choice(datagen.LAST_NAMES)} {student_id:06d}"
+        index_number = f"{rng.choice(datagen.PROGRAMMES)}{rng.randint(18, 25)}{student_id:07d}"
+        if with_index:
+            conn.execute("INSERT INTO students (id, name, index_number) VALUES (?, ?, ?)", (student_id, name, index_number))
+            keys.append((name, index_number))
+        else:
+            conn.execute("INSERT INTO students (id, name) VALUES (?, ?)", (student_id, name))
+            keys.append(name)
+        conn.executemany("INSERT INTO courses (student_id, year, semester, course_name, grade, credits) VALUES (?,?,?,?,?,?)",
+                         datagen._student_courses(rng, student_id))
+    conn.commit()
+    return keys
+
+
+def add_student(app, n):
+    name = f"Import Student {n:06d}"
+    if has_index_number(app.conn):
+        app.cursor.execute("INSERT INTO students (name, index_number) VALUES (?, ?)", (name, f"IMP{n:07d}"))
+        key = (name, f"IMP{n:07d}")
+    else:
+        app.cursor.execute("INSERT INTO students (name) VALUES (?)", (name,))
+        key = name
+    app.conn.commit()
+    return key
+
+
+def timed(fn, rounds, setup=None):
+    samples = []
+    for i in range(rounds):
+        if setup:
+            setup(i)
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def run_version(label, path, args, import_file):
+    module = headless.load_module(path)
+    with tempfile.TemporaryDirectory() as workdir:
+        # Start from an empty database (some versions cannot start on a populated
+        # one headlessly, e.g. V2.1 loads courses before its grid exists) and
+        # fill it through the app's own connection and schema.
+        handle = headless.make_app(module, workdir)
+        app, dialogs = handle.app, handle.dialogs
+        keys = populate(app.conn, args.students, args.seed)
+        sample = random.Random(args.seed).sample(keys, min(args.rounds, len(keys)))
+
+        def select(i):
+            app.current_student = sample[i % len(sample)]
+            app.year_var.set('Year 1')
+            app.semester_var.set('Semester 1')
+
+        def select_and_load(i):
+            select(i)
+            app.load_courses()
+
+        def fresh_student(i):
+            app.current_student = add_student(app, i)
+
+        results = {}
+        try:
+            for op in OPERATIONS:
+                if op not in args.ops or not hasattr(app, op):
+                    continue
+                if op == 'save_courses':
+                    results[op] = timed(app.save_courses, args.rounds, setup=select_and_load)
+                elif op == 'import_excel':
+                    dialogs.open_path = import_file
+                    results[op] = timed(app.import_excel, max(3, args.rounds // 10), setup=fresh_student)
+                elif op == 'filter_students':
+                    patterns = ['kas', 'per', 'IT2', 'silva', 'nad']
+                    results[op] = timed(lambda: app.filter_students(None), args.rounds,
+                                        setup=lambda i: app.student_combo.set(patterns[i % len(patterns)]))
+                elif op == 'export_all_gpa_summary':
+                    dialogs.save_path = ''
+                    results[op] = timed(app.export_all_gpa_summary, 3)
+                else:
+                    results[op] = timed(getattr(app, op), args.rounds, setup=select)
+        finally:
+            handle.close()
+    print(f"  {label}: {len(results)} operations", file=sys.stderr)
+    return results
+
+
+def format_table(results, labels):
+    ops = [op for op in OPERATIONS if any(op in results[label] for label in labels)]
+    width = max(len(op) for op in ops) if ops else 10
+    lines = ["operation (ms)".ljust(width) + "".join(label.rjust(12) for label in labels)]
+    for op in ops:
+        cells = []
+        for label in labels:
+            value = results[label].get(op)
+            cells.append(("-" if value is None else f"{value * 1000:.3f}").rjust(12))
+        lines.append(op.ljust(width) + "".join(cells))
+    return "\n".join(lines)
+
+
+def regressions(baseline, candidate, tolerance, floor):
+    # [(op, baseline_s, candidate_s)] slower than baseline*(1+tolerance), ignoring
+    # differences below the noise floor.
+    found = []
+    for op, base in baseline.items():
+        value = candidate.get(op)
+        if value is None:
+            continue
+        if value > base * (1 + tolerance) and value - base > floor:
+            found.append((op, base, value))
+    return found
+
+
+def main_cli(argv=None):
+    versions = discover_versions()
+    parser = argparse.ArgumentParser(description="Compare GPAApp performance across versions.")
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--versions', nargs='+', default=list(versions),
+                        help="labels to run (default: all); extra apps as label=path")
+    parser.add_argument('--ops', nargs='+', default=OPERATIONS, choices=OPERATIONS)
+    parser.add_argument('--baseline', help="label to gate against (default: the version before --candidate)")
+    parser.add_argument('--candidate', default='main')
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument('--noise-floor-ms', type=float, default=0.05)
+    parser.add_argument('--save', help="write results as JSON")
+    parser.add_argument('--against', help="gate the candidate against results saved earlier with --save")
+    args = parser.parse_args(argv)
+
+    selected = {}
+    for item in args.versions:
+        label, _, path = item.partition('=')
+        if path:
+            selected[label] = os.path.abspath(path)
+        elif label in versions:
+            selected[label] = versions[label]
+        else:
+            parser.error(f"unknown version {label!r}; known: {', '.join(versions)}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        import_file = os.path.join(tmp, 'import.xlsx')
+        rng = random.Random(args.seed)
+        pd.DataFrame([{'year': f"Year {rng.randint(1, 4)}", 'semester': rng.choice(["Semester 1", "Semester 2"]),
+                       'course_name': f"Course {i}", 'grade': rng.choice(list(datagen.GRADE_WEIGHTS)),
+                       'credits': rng.choice([2, 3, 4])} for i in range(200)]).to_excel(import_file, index=False)
+        print(f"Running {args.students} students x {args.rounds} rounds", file=sys.stderr)
+        for label, path in selected.items():
+            results[label] = run_version(label, path, args, import_file)
+
+    labels = list(results)
+    if args.against:
+        with open(args.against) as fh:
+            saved = json.load(fh)['results']
+        for label, ops in saved.items():
+            results.setdefault(f"{label}@saved", ops)
+        labels = list(results)
+    print(format_table(results, labels))
+
+    if args.save:
+        with open(args.save, 'w') as fh:
+            json.dump({'students': args.students, 'seed': args.seed, 'rounds': args.rounds,
+                       'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'results': results}, fh, indent=2)
+
+    # A gate that cannot compare must not pass
+    if args.candidate not in results:
+        print(f"\nERROR: candidate '{args.candidate}' was not measured (have: {', '.join(results) or 'nothing'})",
+              file=sys.stderr)
+        return 2
+    if args.against:
+        baseline_label = f"{args.candidate}@saved" if f"{args.candidate}@saved" in results else args.baseline
+    else:
+        baseline_label = args.baseline
+        if baseline_label is None:
+            order = [label for label in selected if label != args.candidate]
+            baseline_label = order[-1] if order else None
+    if baseline_label not in results:
+        named = f" '{baseline_label}'" if baseline_label else ""
+        print(f"\nERROR: no baseline{named} to compare {args.candidate} against "
+              f"(have: {', '.join(results)}); add --versions, --baseline or --against", file=sys.stderr)
+        return 2
+    slower = regressions(results[baseline_label], results[args.candidate], args.tolerance, args.noise_floor_ms / 1000)
+    if slower:
+        print(f"\nREGRESSION: {args.candidate} vs {baseline_label} (tolerance {args.tolerance:.0%})")
+        for op, base, value in slower:
+            print(f"  {op}: {base * 1000:.3f} ms -> {value * 1000:.3f} ms ({value / base - 1:+.0%})")
+        return 1
+    print(f"\nOK: {args.candidate} within {args.tolerance:.0%} of {baseline_label}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main_cli())
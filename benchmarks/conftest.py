@@ -0,0 +1,67 @@
+import importlib
+import os
+import shutil
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+for path in (ROOT, HERE):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import datagen  # noqa: E402
+import headless  # noqa: E402
+
+DATA_DIR = os.path.join(HERE, 'data')
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('gpa', 'GPA benchmark workload')
+    group.addoption('--students', default='small',
+                    help="database size: small (1k), medium (100k), large (1M) or a student count")
+    group.addoption('--seed', type=int, default=42, help="generator seed")
+    group.addoption('--storage', default='sqlite', choices=['sqlite', 'memory', 'columnar'],
+                    help="GPAApp storage backend; memory/columnar load the workload into memory (no disk I/O)")
+
+
+def pytest_report_header(config):
+    return (f"gpa workload: students={config.getoption('--students')} seed={config.getoption('--seed')} "
+            f"storage={config.getoption('--storage')}")
+
+
+@pytest.fixture(scope='session')
+def workload(request):
+    size = request.config.getoption('--students')
+    students = datagen.SIZES[size] if size in datagen.SIZES else int(size)
+    seed = request.config.getoption('--seed')
+    # Generated once per (size, seed) and reused by later runs
+    cached = os.path.join(DATA_DIR, f"{students}-{seed}.db")
+    if not os.path.exists(cached):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        datagen.generate(cached + '.tmp', students, seed=seed)
+        os.replace(cached + '.tmp', cached)
+    return {'students': students, 'seed': seed, 'path': cached}
+
+
+@pytest.fixture(scope='session')
+def workdir(workload, tmp_path_factory):
+    # One scratch copy per session; mutating benchmarks write here, never to the cache
+    directory = tmp_path_factory.mktemp('gpa')
+    shutil.copyfile(workload['path'], directory / 'data.db')
+    return directory
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    return importlib.import_module('main')
+
+
+@pytest.fixture
+def headless_app(app_module, workdir, workload, benchmark, request):
+    storage = request.config.getoption('--storage')
+    benchmark.extra_info.update(students=workload['students'], seed=workload['seed'], storage=storage)
+    handle = headless.make_app(app_module, workdir, storage=storage)
+    yield handle
+    handle.close()
@@ -0,0 +1,140 @@
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import main  # noqa: E402  (schema and grade_points come from the app itself)
+
+# Seeded generator for realistic data.db files. The same (students, seed)
+# pair always produces the same database, so timings are comparable across
+# commits.
+
+SIZES = {'small': 1_000, 'medium': 100_000, 'large': 1_000_000}
+
+FIRST_NAMES = [
+    "Kasun", "Nimal", "Sunil", "Amara", "Dilani", "Tharindu", "Chamari", "Ruwan", "Sanduni", "Pasan",
+    "Ishara", "Kavindu", "Nadeesha", "Lahiru", "Malsha", "Hasitha", "Sachini", "Dinuka", "Oshadi", "Yasiru",
+    "Anjali", "Heshan", "Tharushi", "Chathura", "Piumi", "Ravindu", "Sewwandi", "Gayan", "Imesha", "Nuwan",
+]
+LAST_NAMES = [
+    "Perera", "Silva", "Fernando", "Jayasinghe", "Bandara", "Wickramasinghe", "Rajapaksa", "Dissanayake",
+    "Gunawardena", "Herath", "Kumara", "Ranasinghe", "Senanayake", "Wijesinghe", "Karunaratne", "Abeysekara",
+    "Liyanage", "Samarasinghe", "Weerasinghe", "Rathnayake",
+]
+PROGRAMMES = ["IT", "CS", "SE", "EN", "BM", "DS"]
+COURSES = {
+    1: ["Programming Fundamentals", "Discrete Mathematics", "Computer Systems", "Academic English",
+        "Introduction to Databases", "Web Technologies", "Statistics I", "Digital Logic"],
+    2: ["Data Structures", "Object Oriented Programming", "Operating Systems", "Computer Networks",
+        "Software Engineering", "Linear Algebra", "Statistics II", "Human Computer Interaction"],
+    3: ["Algorithms", "Distributed Systems", "Information Security", "Machine Learning",
+        "Mobile Development", "Cloud Computing", "Compiler Design", "Project Management"],
+    4: ["Research Methods", "Final Year Project", "Data Mining", "Computer Graphics",
+        "Parallel Computing", "Professional Practice", "Natural Language Processing", "Embedded Systems"],
+    5: ["Advanced Topics", "Industry Placement", "Thesis", "Entrepreneurship"],
+}
+# Roughly bell-shaped around B/B+; keys are exactly the app's grade_points keys
+GRADE_WEIGHTS = {
+    "A+": 4, "A": 8, "A-": 10, "B+": 14, "B": 16, "B-": 13, "C+": 11,
+    "C": 9, "C-": 6, "D+": 4, "D": 3, "D-": 1, "F": 1,
+}
+CREDITS = [1.0, 2.0, 3.0, 3.0, 3.0, 4.0]
+
+
+def _student_courses(rng, student_id):
+    # Multi-year history: 1-4 completed years, two semesters each, sometimes a summer term
+    grades = list(GRADE_WEIGHTS)
+    weights = [GRADE_WEIGHTS[g] for g in grades]
+    rows = []
+    for year in range(1, rng.randint(1, 4) + 1):
+        terms = ["Semester 1", "Semester 2"]
+        if rng.random() < 0.1:
+            terms.append("Summer")
+        for semester in terms:
+            count = 2 if semester == "Summer" else rng.randint(4, 6)
+            for course in rng.sample(COURSES[year], count):
+                rows.append((student_id, f"Year {year}", semester, course,
+                             rng.choices(grades, weights)[0], rng.choice(CREDITS)))
+    return rows
+
+
+def generate(path, students, seed=42, chunk=10_000, progress=None):
+    # Writes a fresh database at `path` with `students` students; returns the course count.
+    assert set(GRADE_WEIGHTS) == set(main.grade_points)
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    shim = types.SimpleNamespace(conn=conn, cursor=conn.cursor())
+    main.GPAApp.init_db(shim)
+    # Triggers maintain derived indexes row by row; bulk load without them and
+    # let init_db recreate them, then rebuild the derived data in one pass.
+    triggers = [name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='trigger'")]
+    for name in triggers:
+        conn.execute(f"DROP TRIGGER {name}")
+
+    rng = random.Random(seed)
+    courses = 0
+    for start in range(1, students + 1, chunk):
+        stop = min(start + chunk, students + 1)
+        student_rows, course_rows = [], []
+        for student_id in range(start, stop):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            index_number = f"{rng.choice(PROGRAMMES)}{rng.randint(18, 25)}{student_id:07d}"
+            student_rows.append((student_id, name, index_number))
+            course_rows.extend(_student_courses(rng, student_id))
+        conn.executemany("INSERT INTO students (id, name, index_number) VALUES (?, ?, ?)", student_rows)
+        conn.executemany("INSERT INTO courses (student_id, year, semester, course_name, grade, credits) VALUES (?,?,?,?,?,?)",
+                         course_rows)
+        conn.commit()
+        courses += len(course_rows)
+        if progress:
+            progress(stop - 1, students)
+
+    main.GPAApp.init_db(shim)
+    rebuild_derived(conn)
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    return courses
+
+
+def rebuild_derived(conn):
+    # Everything the dropped triggers would have maintained
+    if _has_table(conn, 'students_fts'):
+        conn.execute("INSERT INTO students_fts(students_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO courses_fts(courses_fts) VALUES ('rebuild')")
+
+
+def _has_table(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name=?", (name,)).fetchone() is not None
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic GPA database.")
+    parser.add_argument('-o', '--output', default='data.db')
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument('-n', '--students', type=int)
+    size.add_argument('--size', choices=sorted(SIZES), default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+    students = args.students or SIZES[args.size]
+    started = time.perf_counter()
+
+    def progress(done, total):
+        print(f"\r{done:,}/{total:,} students", end='', flush=True)
+
+    courses = generate(args.output, students, seed=args.seed, progress=progress)
+    print(f"\nWrote {args.output}: {students:,} students, {courses:,} courses in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main_cli()
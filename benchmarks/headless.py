@@ -0,0 +1,178 @@
+import contextlib
+import importlib.util
+import os
+import sys
+import types
+
+# Runs a GPAApp without a display. The version modules only reach Tk through
+# their module globals (tk, ttk, messagebox, filedialog, ...), so those are
+# swapped for the small fakes below while the app is built and exercised.
+
+
+class FakeWidget:
+    # Stands in for any Tk/ttk widget, keeping just enough state (the text of
+    # an Entry/Combobox and its options) for the app logic to behave.
+
+    def __init__(self, *args, **kwargs):
+        self._value = ''
+        self._options = dict(kwargs)
+        if 'value' in kwargs:
+            self._value = kwargs['value']
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        self._value = value
+
+    def insert(self, index, text):
+        text = str(text)
+        if index in (0, '0'):
+            self._value = text + self._value
+        else:
+            self._value += text
+
+    def delete(self, *args):
+        self._value = ''
+
+    def current(self, index=None):
+        values = self._options.get('values') or ()
+        if index is not None and values:
+            self._value = values[index]
+        return index
+
+    def __setitem__(self, key, value):
+        self._options[key] = value
+
+    def __getitem__(self, key):
+        return self._options.get(key)
+
+    def config(self, *args, **kwargs):
+        # ttk.Style.configure(stylename, ...) passes a positional name; ignore it
+        if not args:
+            self._options.update(kwargs)
+
+    configure = config
+
+    def cget(self, key):
+        return self._options.get(key)
+
+    def winfo_children(self):
+        return []
+
+    def __getattr__(self, name):
+        # grid, pack, bind, destroy, focus_set, ... are all no-ops
+        return lambda *args, **kwargs: None
+
+
+class FakeDialogs:
+    # messagebox / filedialog replacement; the file dialogs return whatever
+    # path the benchmark assigned beforehand.
+
+    def __init__(self):
+        self.open_path = ''
+        self.save_path = ''
+        self.directory = ''
+        self.messages = []
+
+    def _record(self, kind):
+        def show(title=None, message=None, **kwargs):
+            self.messages.append((kind, title, message))
+            return True
+        return show
+
+    def __getattr__(self, name):
+        if name.startswith(('show', 'ask')) and name not in ('askopenfilename', 'asksaveasfilename', 'askdirectory'):
+            return self._record(name)
+        raise AttributeError(name)
+
+    def askopenfilename(self, **kwargs):
+        return self.open_path
+
+    def asksaveasfilename(self, **kwargs):
+        return self.save_path
+
+    def askdirectory(self, **kwargs):
+        return self.directory
+
+
+class FakeTkModule:
+    # Any widget class (Canvas, LabelFrame, Combobox, ...) is a FakeWidget;
+    # ALL-CAPS constants such as tk.END evaluate to their lowercase name.
+
+    def __getattr__(self, name):
+        if name.isupper():
+            return name.lower()
+        if name[:1].isupper():
+            return FakeWidget
+        raise AttributeError(name)
+
+
+def fake_tk():
+    font = types.SimpleNamespace(families=lambda *args: (), Font=FakeWidget)
+    return FakeTkModule(), FakeTkModule(), font
+
+
+def load_module(path, name=None):
+    # Import an app file (main.py or one of the V*/V*.py snapshots) by path.
+    path = os.path.abspath(path)
+    name = name or "gpa_" + os.path.splitext(os.path.basename(path))[0].replace('.', '_')
+    directory = os.path.dirname(path)
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class HeadlessApp:
+    def __init__(self, app, dialogs, restore):
+        self.app = app
+        self.dialogs = dialogs
+        self._restore = restore
+
+    def close(self):
+        # Shard connections and their thread pool first (main.py only; the snapshots have no store)
+        courses = getattr(self.app, 'courses', None)
+        if courses is not None:
+            courses.close()
+        self.app.conn.close()
+        self._restore()
+
+
+@contextlib.contextmanager
+def _chdir(path):
+    old = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(old)
+
+
+def make_app(module, workdir, **kwargs):
+    # Builds module.GPAApp against <workdir>/data.db with Tk replaced.
+    # kwargs go to GPAApp (main.py only), e.g. storage='memory'.
+    tk, ttk, font = fake_tk()
+    dialogs = FakeDialogs()
+    patched = {'tk': tk, 'ttk': ttk, 'font': font, 'messagebox': dialogs,
+               'filedialog': dialogs, 'simpledialog': dialogs}
+    saved = {name: getattr(module, name) for name in patched if hasattr(module, name)}
+    for name, value in patched.items():
+        setattr(module, name, value)
+
+    def restore():
+        for name in patched:
+            if name in saved:
+                setattr(module, name, saved[name])
+            elif hasattr(module, name):
+                delattr(module, name)
+
+    try:
+        with _chdir(workdir):
+            app = module.GPAApp(FakeWidget(), **kwargs)
+    except Exception:
+        restore()
+        raise
+    return HeadlessApp(app, dialogs, restore)
@@ -0,0 +1,560 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+# Batch import of many course workbooks at once.
+#
+# Workbooks are read and validated in worker processes (pandas parsing is the
+# slow part). The parent process is the only writer: it resolves students and
+# appends each file's valid rows in large transactions as results come in.
+#
+# Every workbook row names its student through an `index_number` column. An
+# optional `name` column lets missing students be created on the way in.
+#
+# An import ledger remembers every file already imported (size, mtime, content
+# hash and a digest per row), so a nightly re-sync skips unchanged files and
+# writes only the rows that differ from the previous import of a changed one.
+
+COURSE_COLUMNS = {"year", "semester", "course_name", "grade", "credits"}
+REQUIRED_COLUMNS = COURSE_COLUMNS | {"index_number"}
+WRITE_BATCH = 50_000
+LOOKUP_CHUNK = 900  # stays under SQLite's default bound-parameter limit
+
+# Insert, or update the grade/credits of a course already recorded for that
+# term. Rows that are already identical are left untouched, so importing the
+# same file twice writes nothing.
+UPSERT_COURSE = """
+    INSERT INTO courses (student_id, year, semester, course_name, grade, credits) VALUES (?,?,?,?,?,?)
+    ON CONFLICT(student_id, year, semester, course_name) DO UPDATE
+    SET grade=excluded.grade, credits=excluded.credits
+    WHERE grade IS NOT excluded.grade OR credits IS NOT excluded.credits
+"""
+
+LEDGER_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS import_ledger (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        path TEXT UNIQUE NOT NULL,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        sha256 TEXT NOT NULL,
+        rows INTEGER NOT NULL,
+        imported INTEGER NOT NULL,
+        changed INTEGER NOT NULL,
+        imported_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS import_ledger_rows (
+        ledger_id INTEGER NOT NULL,
+        row_key INTEGER NOT NULL,
+        row_hash INTEGER NOT NULL,
+        PRIMARY KEY (ledger_id, row_key)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS import_ledger_students (
+        ledger_id INTEGER NOT NULL,
+        student_id INTEGER NOT NULL,
+        PRIMARY KEY (ledger_id, student_id)
+    ) WITHOUT ROWID
+    """,
+]
+
+
+class FileReport:
+    __slots__ = ('path', 'rows', 'imported', 'changed', 'errors', 'error', 'parse_seconds', 'names', 'skipped')
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self.imported = 0     # valid rows written (or already present)
+        self.changed = 0      # rows actually inserted or updated
+        self.errors = []      # row-level problems, "Row n: ..."
+        self.error = None     # the whole file was rejected
+        self.parse_seconds = 0.0
+        self.names = {}       # index_number -> name, from the optional `name` column
+        self.skipped = False  # unchanged since its last import
+
+    @property
+    def ok(self):
+        return self.error is None and not self.errors
+
+
+class BatchReport:
+    def __init__(self):
+        self.files = []
+        self.student_ids = set()
+        self.created = []     # (student_id, name, index_number) of auto-created students
+        self.elapsed = 0.0
+
+    @property
+    def rows(self):
+        return sum(f.rows for f in self.files)
+
+    @property
+    def imported(self):
+        return sum(f.imported for f in self.files)
+
+    @property
+    def changed(self):
+        return sum(f.changed for f in self.files)
+
+    @property
+    def rows_per_second(self):
+        return self.imported / self.elapsed if self.elapsed else 0.0
+
+    def summary(self, max_errors=5):
+        failed = [f for f in self.files if not f.ok]
+        lines = [f"{len(self.files)} file(s), {self.imported:,} of {self.rows:,} rows imported "
+                 f"in {self.elapsed:.2f}s ({self.rows_per_second:,.0f} rows/s), "
+                 f"{self.changed:,} new or changed."]
+        skipped = sum(1 for f in self.files if f.skipped)
+        if skipped:
+            lines.append(f"{skipped} unchanged file(s) skipped.")
+        if self.created:
+            lines.append(f"{len(self.created):,} new student(s) created.")
+        for report in failed:
+            name = os.path.basename(report.path)
+            if report.error:
+                lines.append(f"{name}: {report.error}")
+                continue
+            lines.append(f"{name}: {len(report.errors)} row(s) skipped")
+            lines.extend(f"  {msg}" for msg in report.errors[:max_errors])
+            if len(report.errors) > max_errors:
+                lines.append(f"  ... {len(report.errors) - max_errors} more")
+        return "\n".join(lines)
+
+
+def expand_paths(spec):
+    # A directory (every .xlsx inside), a glob pattern, or a single file
+    if os.path.isdir(spec):
+        spec = os.path.join(spec, '*.xlsx')
+    paths = sorted(glob.glob(spec))
+    return [p for p in paths if not os.path.basename(p).startswith('~$')]  # skip Excel lock files
+
+
+def read_sheet(path):
+    # CSV or the first sheet of a workbook. python-calamine, when installed,
+    # reads .xlsx several times faster than openpyxl; pandas knows the
+    # engine from 2.2 on, older versions stay on openpyxl.
+    if path.lower().endswith('.csv'):
+        return pd.read_csv(path, dtype={'index_number': str})
+    engine = None
+    if tuple(int(part) for part in pd.__version__.split('.')[:2]) >= (2, 2):
+        try:
+            import python_calamine  # noqa: F401
+            engine = 'calamine'
+        except ImportError:
+            pass
+    return pd.read_excel(path, dtype={'index_number': str}, engine=engine)
+
+
+def parse_workbook(path, grade_points, terms=None):
+    # Runs in a worker: returns (FileReport, [(row_no, index_number, year, semester, course_name, grade, credits)])
+    started = time.perf_counter()
+    try:
+        df = read_sheet(path)
+    except Exception as e:
+        report = FileReport(path)
+        report.error = f"Could not read the Excel file. Error: {str(e)}"
+        return report, []
+    report, rows = validate_frame(path, df, grade_points, terms)
+    report.parse_seconds = time.perf_counter() - started
+    return report, rows
+
+
+def check_frame(df, grade_points, terms=None):
+    # Whole-column checks, no Python loop per row. Returns (reasons, cleaned):
+    # reasons is '' for a good row, else "invalid grade; unknown year"...;
+    # cleaned holds the stripped/parsed columns. `terms` = (years, semesters).
+    credits = pd.to_numeric(df['credits'], errors='coerce')
+    course_name = df['course_name'].astype('string').str.strip()
+    year = df['year'].astype('string').str.strip()
+    semester = df['semester'].astype('string').str.strip()
+    checks = [
+        (~df['grade'].isin(list(grade_points)), "invalid grade"),
+        (~(credits > 0), "invalid credits"),
+        (course_name.isna() | (course_name == ''), "missing course name"),
+    ]
+    cleaned = {'credits': credits, 'course_name': course_name, 'year': year, 'semester': semester}
+    if terms is not None:
+        years, semesters = terms
+        checks.append((~year.isin(list(years)), "unknown year"))
+        checks.append((~semester.isin(list(semesters)), "unknown semester"))
+    if 'index_number' in df.columns:
+        index_number = df['index_number'].astype('string').str.strip()
+        checks.append((index_number.isna() | (index_number == ''), "missing index number"))
+        cleaned['index_number'] = index_number
+    reasons = pd.Series('', index=df.index, dtype=object)
+    for mask, label in checks:
+        mask = mask.fillna(True).to_numpy(dtype=bool)
+        reasons = reasons.where(~mask, reasons + label + '; ')
+    return reasons.str[:-2], cleaned
+
+
+def validate_frame(path, df, grade_points, terms=None):
+    report = FileReport(path)
+    missing = REQUIRED_COLUMNS - set(df.columns)
+    if missing:
+        report.error = f"Invalid file format. Missing columns: {', '.join(sorted(missing))}"
+        return report, []
+    report.rows = len(df)
+    reasons, cleaned = check_frame(df, grade_points, terms)
+    bad = (reasons != '').to_numpy()
+    report.errors = [f"Row {pos + 2}: {reason}" for pos, reason in zip(bad.nonzero()[0], reasons[bad])]
+
+    keep = ~bad
+    rows = list(zip(
+        (int(pos) + 2 for pos in keep.nonzero()[0]),
+        cleaned['index_number'][keep].tolist(),
+        cleaned['year'][keep].tolist(),
+        cleaned['semester'][keep].tolist(),
+        cleaned['course_name'][keep].tolist(),
+        df['grade'][keep].tolist(),
+        cleaned['credits'][keep].astype(float).tolist(),
+    ))
+    if 'name' in df.columns:
+        names = df['name'].astype('string').str.strip()
+        named = keep & (names.notna() & (names != '')).to_numpy()
+        report.names = dict(zip(cleaned['index_number'][named].tolist(), names[named].tolist()))
+    return report, rows
+
+
+def reject_report(df, reasons):
+    # The rejected rows as they appear in the sheet, led by their row number and reasons
+    bad = (reasons != '').to_numpy()
+    rejects = df[bad].copy()
+    rejects.insert(0, 'reasons', reasons[bad])
+    rejects.insert(0, 'row', bad.nonzero()[0] + 2)
+    return rejects
+
+
+def write_report(frame, path):
+    if path.lower().endswith('.csv'):
+        frame.to_csv(path, index=False)
+    else:
+        frame.to_excel(path, index=False)
+
+
+def preflight(path, grade_points, terms=None):
+    # Validate-only pass: nothing is written to the database.
+    # Returns (total_rows, rejects DataFrame); raises ValueError for a bad layout.
+    df = read_sheet(path)
+    required = REQUIRED_COLUMNS if 'index_number' in df.columns else COURSE_COLUMNS
+    missing = required - set(df.columns)
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(sorted(missing))}")
+    reasons, _ = check_frame(df, grade_points, terms)
+    return len(df), reject_report(df, reasons)
+
+
+def lookup_students(conn, index_numbers):
+    # {index_number: student_id} for the given numbers, in a few IN (...) queries
+    found = {}
+    wanted = list(set(index_numbers))
+    for start in range(0, len(wanted), LOOKUP_CHUNK):
+        chunk = wanted[start:start + LOOKUP_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        found.update(conn.execute(
+            f"SELECT index_number, id FROM students WHERE index_number IN ({placeholders})", chunk).fetchall())
+    return found
+
+
+def create_students(conn, students):
+    # students: {index_number: name}. One executemany; existing index numbers are left alone.
+    conn.executemany("INSERT OR IGNORE INTO students (name, index_number) VALUES (?, ?)",
+                     [(name, index_number) for index_number, name in students.items()])
+    conn.commit()
+    return lookup_students(conn, students)
+
+
+def write_rows(conn, report, rows, batch, create_missing=False, ids=None, courses=None):
+    # Single writer: resolve students, then append in WRITE_BATCH-row transactions.
+    # `ids` may carry a lookup the caller already made; `courses` is the course
+    # store when courses live outside `conn`. Returns the rows that were
+    # written, or None after a database error.
+    if ids is None:
+        ids = lookup_students(conn, [r[1] for r in rows])
+    if create_missing:
+        wanted = {idx: report.names[idx] for idx in {r[1] for r in rows} - ids.keys() if idx in report.names}
+        if wanted:
+            created = create_students(conn, wanted)
+            batch.created.extend((sid, wanted[idx], idx) for idx, sid in created.items())
+            ids = {**ids, **created}
+    values, written = [], []
+    for row in rows:
+        row_no, index_number, year, semester, course_name, grade, credits = row
+        student_id = ids.get(index_number)
+        if student_id is None:
+            report.errors.append(f"Row {row_no}: unknown index number '{index_number}'")
+            continue
+        values.append((student_id, year, semester, course_name, grade, credits))
+        written.append(row)
+        batch.student_ids.add(student_id)
+    for start in range(0, len(values), WRITE_BATCH):
+        chunk = values[start:start + WRITE_BATCH]
+        try:
+            if courses is None:
+                report.changed += conn.executemany(UPSERT_COURSE, chunk).rowcount
+                conn.commit()
+            else:
+                report.changed += courses.upsert(chunk)
+        except sqlite3.Error as e:
+            conn.rollback()
+            report.error = f"Database error after {report.imported} rows. Error: {str(e)}"
+            return None
+        report.imported += len(chunk)
+    return written
+
+
+def init_ledger(conn):
+    for stmt in LEDGER_SCHEMA:
+        conn.execute(stmt)
+    conn.commit()
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _digest(*values):
+    # Stable 64-bit digest (Python's hash() changes between runs)
+    raw = "\x1f".join(str(v) for v in values).encode()
+    return int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), 'big', signed=True)
+
+
+class ImportLedger:
+    # What was imported from each file last time. check() answers "unchanged?"
+    # from os.stat alone when size and mtime match, and hashes only when they don't.
+    # The recorded rows are only trusted while the database still holds them:
+    # courses deleted, archived or edited since (by any writer) are re-applied.
+
+    def __init__(self, conn, courses=None):
+        self.conn = conn
+        self.courses = courses
+
+    def in_database(self, ledger_id):
+        # {row_key: row_hash} of the current courses of the students this file wrote to
+        ids = [sid for sid, in self.conn.execute(
+            "SELECT student_id FROM import_ledger_students WHERE ledger_id=?", (ledger_id,))]
+        if not ids:
+            return {}
+        numbers = dict(self.conn.execute(
+            "SELECT id, index_number FROM students WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps(ids),)))
+        if self.courses is not None and self.courses.external:
+            rows = self.courses.student_courses(ids)
+        else:
+            rows = self.conn.execute("""
+                SELECT id, student_id, year, semester, course_name, grade, credits FROM courses
+                WHERE student_id IN (SELECT value FROM json_each(?))
+            """, (json.dumps(ids),))
+        return {_digest(numbers[sid], year, semester, name): _digest(grade, credits)
+                for _, sid, year, semester, name, grade, credits in rows if sid in numbers}
+
+    def previous(self, ledger_id):
+        # Rows recorded for the file that the database still holds unchanged
+        recorded = self.conn.execute(
+            "SELECT row_key, row_hash FROM import_ledger_rows WHERE ledger_id=?", (ledger_id,)).fetchall()
+        current = self.in_database(ledger_id) if recorded else {}
+        return {key: value for key, value in recorded if current.get(key) == value}, len(recorded)
+
+    def intact(self, ledger_id):
+        kept, recorded = self.previous(ledger_id)
+        return len(kept) == recorded
+
+    def check(self, path):
+        # Returns (unchanged, state); pass state on to delta() and record()
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        entry = self.conn.execute(
+            "SELECT id, size, mtime_ns, sha256 FROM import_ledger WHERE path=?", (path,)).fetchone()
+        if entry and entry[1] == st.st_size and entry[2] == st.st_mtime_ns and self.intact(entry[0]):
+            return True, None
+        sha = file_sha256(path)
+        if entry and entry[3] == sha and self.intact(entry[0]):
+            # Touched but identical: store the new mtime so the next check is stat-only
+            self.conn.execute("UPDATE import_ledger SET size=?, mtime_ns=? WHERE id=?",
+                              (st.st_size, st.st_mtime_ns, entry[0]))
+            self.conn.commit()
+            return True, None
+        return False, {'path': path, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': sha,
+                       'id': entry[0] if entry else None}
+
+    def delta(self, state, rows):
+        # Rows whose course is new or whose grade/credits differ from the last import of this file
+        previous = {}
+        if state['id'] is not None:
+            previous, _ = self.previous(state['id'])
+        digests = {}
+        changed = []
+        for row in rows:
+            key, value = _digest(*row[1:5]), _digest(*row[5:])
+            digests[row[0]] = (key, value)
+            if previous.get(key) != value:
+                changed.append(row)
+        state['previous'] = previous
+        state['digests'] = digests
+        state['index_numbers'] = {row[1] for row in rows}
+        return changed
+
+    def record(self, state, report, written):
+        # Unchanged rows carried over plus the rows just written. Rows that
+        # failed (e.g. unknown students) stay out so the next import retries them.
+        digests = state['digests']
+        current = {key for key, _ in digests.values()}
+        changed_rows = {key for key, _ in (digests[row[0]] for row in state['applied'])}
+        kept = {key: value for key, value in state['previous'].items()
+                if key in current and key not in changed_rows}
+        kept.update(digests[row[0]] for row in written)
+        self.conn.execute("""
+            INSERT INTO import_ledger (path, size, mtime_ns, sha256, rows, imported, changed, imported_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(path) DO UPDATE SET size=excluded.size, mtime_ns=excluded.mtime_ns,
+                sha256=excluded.sha256, rows=excluded.rows, imported=excluded.imported,
+                changed=excluded.changed, imported_at=excluded.imported_at
+        """, (state['path'], state['size'], state['mtime_ns'], state['sha256'],
+              report.rows, report.imported, report.changed))
+        ledger_id = self.conn.execute("SELECT id FROM import_ledger WHERE path=?", (state['path'],)).fetchone()[0]
+        self.conn.execute("DELETE FROM import_ledger_rows WHERE ledger_id=?", (ledger_id,))
+        self.conn.executemany("INSERT INTO import_ledger_rows (ledger_id, row_key, row_hash) VALUES (?, ?, ?)",
+                              [(ledger_id, key, value) for key, value in kept.items()])
+        self.conn.execute("DELETE FROM import_ledger_students WHERE ledger_id=?", (ledger_id,))
+        self.conn.executemany("INSERT INTO import_ledger_students (ledger_id, student_id) VALUES (?, ?)",
+                              [(ledger_id, sid) for sid in lookup_students(self.conn, state['index_numbers']).values()])
+        self.conn.commit()
+
+
+def import_one(conn, report, rows, batch, ledger=None, state=None, create_missing=False, ids=None, courses=None):
+    # Write one validated file, only its delta when the ledger has seen it before
+    if ledger is None or state is None:
+        return write_rows(conn, report, rows, batch, create_missing=create_missing, ids=ids, courses=courses)
+    applied = state['applied'] = ledger.delta(state, rows)
+    written = write_rows(conn, report, applied, batch, create_missing=create_missing, ids=ids, courses=courses)
+    if written is not None:
+        # Rows identical to the last import are already in the database
+        report.imported += len(rows) - len(applied)
+        ledger.record(state, report, written)
+    return written
+
+
+def import_files(conn, paths, grade_points, jobs=None, progress=None, create_missing=False, use_ledger=True,
+                 terms=None, courses=None):
+    # Parse in up to `jobs` processes, write through `conn` in this process.
+    # progress(done, total, FileReport) is called after each file is written.
+    batch = BatchReport()
+    started = time.perf_counter()
+    ledger = ImportLedger(conn, courses) if use_ledger else None
+
+    def finish(report, rows):
+        if report.error is None:
+            import_one(conn, report, rows, batch, ledger, states.get(report.path), create_missing=create_missing,
+                       courses=courses)
+        batch.files.append(report)
+        if progress:
+            progress(len(batch.files), len(paths), report)
+
+    # Unchanged files never reach the parser
+    states, pending = {}, []
+    for path in paths:
+        if ledger is not None:
+            unchanged, state = ledger.check(path)
+            if unchanged:
+                report = FileReport(path)
+                report.skipped = True
+                finish(report, [])
+                continue
+            states[path] = state
+        pending.append(path)
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(pending)))
+    if jobs == 1:
+        for path in pending:
+            finish(*parse_workbook(path, grade_points, terms))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(parse_workbook, path, grade_points, terms): path for path in pending}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    report = FileReport(futures[future])
+                    report.error = f"Worker failed. Error: {str(e)}"
+                    result = (report, [])
+                finish(*result)
+    batch.files.sort(key=lambda f: f.path)
+    batch.elapsed = time.perf_counter() - started
+    return batch
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Import many course workbooks (with an index_number column).")
+    parser.add_argument('paths', nargs='+', help="directories, glob patterns or .xlsx files")
+    parser.add_argument('--db', default='data.db')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument('--create-students', action='store_true',
+                        help="create unknown index numbers that have a `name` in the workbook")
+    parser.add_argument('--force', action='store_true', help="ignore the import ledger and re-apply every row")
+    parser.add_argument('--validate-only', action='store_true',
+                        help="check the files without importing; rejects go to <file>_rejects.csv")
+    args = parser.parse_args(argv)
+
+    import main
+    terms = (main.YEARS, main.SEMESTERS)
+    paths = [p for spec in args.paths for p in expand_paths(spec)]
+    if not paths:
+        parser.error("no .xlsx files found")
+    if args.validate_only:
+        return validate_cli(paths, main.grade_points, terms)
+    conn = sqlite3.connect(args.db)
+    # Same schema (natural key, ledger tables) as the app would create
+    main.GPAApp.init_db(types.SimpleNamespace(conn=conn, cursor=conn.cursor()))
+    courses = main.course_store.open_store(conn, args.db, grade_points=main.grade_points)
+    try:
+        batch = import_files(conn, paths, main.grade_points, jobs=args.jobs, create_missing=args.create_students,
+                             use_ledger=not args.force, terms=terms, courses=courses,
+                             progress=lambda done, total, r: print(f"[{done}/{total}] {r.path}", file=sys.stderr))
+    finally:
+        courses.close()
+        conn.close()
+    print(batch.summary(max_errors=20))
+    return 0 if all(f.ok for f in batch.files) else 1
+
+
+def validate_cli(paths, grade_points, terms):
+    clean = True
+    for path in paths:
+        started = time.perf_counter()
+        try:
+            total, rejects = preflight(path, grade_points, terms)
+        except Exception as e:
+            print(f"{path}: {e}")
+            clean = False
+            continue
+        elapsed = time.perf_counter() - started
+        if rejects.empty:
+            print(f"{path}: {total:,} rows OK ({elapsed:.2f}s)")
+            continue
+        clean = False
+        out = os.path.splitext(path)[0] + '_rejects.csv'
+        write_report(rejects, out)
+        print(f"{path}: {len(rejects):,} of {total:,} rows rejected ({elapsed:.2f}s) -> {out}")
+    return 0 if clean else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main_cli())
@@ -0,0 +1,258 @@
+import json
+from array import array
+
+import numpy as np
+
+import gpa_index
+import search_index
+import summary
+
+# Pure in-process course store (GPA_STORAGE=columnar): one array per column,
+# text columns dictionary-encoded, nothing written to disk. Meant for tests,
+# benchmarks and what-if sessions; the data is gone when the app exits.
+#
+# Rows are appended, or updated in place when the natural key (student, year,
+# semester, course) already exists. Deleting a row zeroes its student id
+# (student ids start at 1); compact() drops such rows once they outnumber the
+# live ones. Per-student and natural-key dicts serve the per-student paths,
+# and the summary aggregates every live row with numpy in one pass.
+
+COMPACT_MIN_DEAD = 10_000
+
+
+class Dictionary:
+    # Distinct strings <-> small int codes
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class ColumnarCourseStore:
+    # Course ids and rows live outside the SQLite connection
+    external = True
+
+    def __init__(self, conn, grade_points=None):
+        self.conn = conn  # students: names for the summary and the course search
+        self.grade_points = grade_points  # for gpa_range
+        self.ids = array('q')
+        self.student_id = array('q')
+        self.year = array('q')
+        self.semester = array('q')
+        self.course_name = array('q')
+        self.grade = array('q')
+        self.credits = array('d')
+        self.years = Dictionary()
+        self.semesters = Dictionary()
+        self.names = Dictionary()
+        self.grades = Dictionary()
+        self.by_student = {}  # student_id -> [row, ...] in insertion order
+        self.by_key = {}  # (student_id, year, semester, course_name) -> row
+        self.next_id = 1
+        self.dead = 0
+        self.ranked = None  # (gpa, student_id, credits) arrays by ascending GPA; None after any write
+
+    @classmethod
+    def load(cls, conn, grade_points=None):
+        # Take over the courses of an in-memory snapshot; the SQLite copies are dropped
+        store = cls(conn, grade_points)
+        append = store.append
+        for row in conn.execute("""
+            SELECT id, student_id, year, semester, course_name, grade, credits FROM courses ORDER BY id
+        """):
+            append(*row)
+        # Without its delete triggers the table is truncated in one step instead
+        # of row by row; the search and GPA indexes are emptied the same way
+        gpa_index.drop(conn)
+        with conn:
+            conn.execute("DROP TRIGGER IF EXISTS courses_fts_ad")
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name='courses_fts'").fetchone():
+                conn.execute("INSERT INTO courses_fts(courses_fts) VALUES ('delete-all')")
+            conn.execute("DELETE FROM courses")
+        search_index.init_fts(conn, tables=('courses',))
+        return store
+
+    def __len__(self):
+        return len(self.ids) - self.dead
+
+    def append(self, course_id, student_id, year, semester, course_name, grade, credits):
+        row = len(self.ids)
+        self.ids.append(course_id)
+        self.student_id.append(student_id)
+        self.year.append(self.years.code(year))
+        self.semester.append(self.semesters.code(semester))
+        self.course_name.append(self.names.code(course_name))
+        self.grade.append(self.grades.code(grade))
+        self.credits.append(float(credits))
+        rows = self.by_student.get(student_id)
+        if rows is None:
+            self.by_student[student_id] = [row]
+        else:
+            rows.append(row)
+        self.by_key[(student_id, year, semester, course_name)] = row
+        self.ranked = None
+        if course_id >= self.next_id:
+            self.next_id = course_id + 1
+
+    def row(self, row):
+        return (self.years.values[self.year[row]], self.semesters.values[self.semester[row]],
+                self.names.values[self.course_name[row]], self.grades.values[self.grade[row]], self.credits[row])
+
+    def rows(self, student_id):
+        return [self.row(r) for r in self.by_student.get(student_id, ())]
+
+    def kill(self, row):
+        year, semester, course_name, _, _ = self.row(row)
+        del self.by_key[(self.student_id[row], year, semester, course_name)]
+        self.student_id[row] = 0
+        self.dead += 1
+        self.ranked = None
+
+    def term_courses(self, student_id, year, semester):
+        return [(c, g, cr) for y, s, c, g, cr in self.rows(student_id) if y == year and s == semester]
+
+    def grade_rows(self, student_id):
+        return [(y, s, g, cr) for y, s, _, g, cr in self.rows(student_id)]
+
+    def course_rows(self, student_id):
+        return self.rows(student_id)
+
+    def grade_rows_many(self, student_ids):
+        return {sid: self.grade_rows(sid) for sid in student_ids if self.by_student.get(sid)}
+
+    def replace_term(self, student_id, year, semester, rows):
+        keep = []
+        for r in self.by_student.get(student_id, ()):
+            if self.years.values[self.year[r]] == year and self.semesters.values[self.semester[r]] == semester:
+                self.kill(r)
+            else:
+                keep.append(r)
+        self.by_student[student_id] = keep
+        self.upsert([(student_id, year, semester, *row) for row in rows])
+
+    def upsert(self, values):
+        # Same contract as the SQL upsert: returns the rows inserted or changed
+        changed = 0
+        for student_id, year, semester, course_name, grade, credits in values:
+            row = self.by_key.get((student_id, year, semester, course_name))
+            if row is None:
+                self.append(self.next_id, student_id, year, semester, course_name, grade, credits)
+            elif self.grades.values[self.grade[row]] != grade or self.credits[row] != float(credits):
+                self.grade[row] = self.grades.code(grade)
+                self.credits[row] = float(credits)
+                self.ranked = None
+            else:
+                continue
+            changed += 1
+        return changed
+
+    def delete_students(self, student_ids):
+        for student_id in student_ids:
+            for row in self.by_student.pop(student_id, ()):
+                self.kill(row)
+        if self.dead >= COMPACT_MIN_DEAD and self.dead > len(self):
+            self.compact()
+
+    def compact(self):
+        live = [r for r in range(len(self.ids)) if self.student_id[r]]
+        columns = [self.ids, self.student_id, self.year, self.semester, self.course_name, self.grade, self.credits]
+        for column in columns:
+            column[:] = array(column.typecode, (column[r] for r in live))
+        self.by_student, self.by_key = {}, {}
+        for row in range(len(self.ids)):
+            student_id = self.student_id[row]
+            year, semester, course_name, _, _ = self.row(row)
+            self.by_student.setdefault(student_id, []).append(row)
+            self.by_key[(student_id, year, semester, course_name)] = row
+        self.dead = 0
+
+    def student_courses(self, student_ids):
+        # [(id, student_id, year, semester, course_name, grade, credits)] of many students
+        return [(self.ids[r], sid, *self.row(r)) for sid in student_ids for r in self.by_student.get(sid, ())]
+
+    def term_points(self, grade_points):
+        # {student_id: [(year, semester, points, credits), ...]}, terms in first-entered order
+        student = np.array(self.student_id)
+        live = np.flatnonzero(student)
+        if not live.size:
+            return {}
+        points_of = np.array([grade_points.get(g, 0) for g in self.grades.values], dtype=float)
+        width = max(1, len(self.semesters.values))
+        student = student[live]
+        term = np.array(self.year)[live] * width + np.array(self.semester)[live]
+        credits = np.array(self.credits)[live]
+        points = points_of[np.array(self.grade)[live]] * credits
+        # Group by (student, term); within a group the first row is its earliest
+        order = np.lexsort((live, term, student))
+        student, term, credits, points, rows = student[order], term[order], credits[order], points[order], live[order]
+        starts = np.flatnonzero(np.r_[True, (student[1:] != student[:-1]) | (term[1:] != term[:-1])])
+        points, credits = np.add.reduceat(points, starts), np.add.reduceat(credits, starts)
+        student, term, first = student[starts], term[starts], rows[starts]
+        terms = {}
+        for k in np.lexsort((first, student)):
+            t = int(term[k])
+            terms.setdefault(int(student[k]), []).append(
+                (self.years.values[t // width], self.semesters.values[t % width], float(points[k]), float(credits[k])))
+        return terms
+
+    def student_totals(self, grade_points):
+        # {student_id: (points, credits)} over all terms
+        student = np.array(self.student_id)
+        live = np.flatnonzero(student)
+        if not live.size:
+            return {}
+        points_of = np.array([grade_points.get(g, 0) for g in self.grades.values], dtype=float)
+        credits = np.array(self.credits)[live]
+        ids, slot = np.unique(student[live], return_inverse=True)
+        points = np.bincount(slot, weights=points_of[np.array(self.grade)[live]] * credits)
+        credits = np.bincount(slot, weights=credits)
+        return {int(sid): (float(p), float(c)) for sid, p, c in zip(ids, points, credits)}
+
+    def gpa_range(self, lo=None, hi=None):
+        # Same rows as gpa_index.students_in_range. GPAs are sorted once after
+        # a write; a range is then two binary searches.
+        if self.ranked is None:
+            totals = self.student_totals(self.grade_points)
+            ids = np.fromiter(totals, dtype=np.int64, count=len(totals))
+            points = np.array([p for p, _ in totals.values()])
+            credits = np.array([c for _, c in totals.values()])
+            ids, points, credits = ids[credits > 0], points[credits > 0], credits[credits > 0]
+            gpas = np.round(points / credits, 4)
+            order = np.argsort(gpas, kind='stable')
+            self.ranked = gpas[order], ids[order], np.round(credits[order], 6)
+        gpas, ids, credits = self.ranked
+        start = 0 if lo is None else np.searchsorted(gpas, lo, side='left')
+        stop = len(gpas) if hi is None else np.searchsorted(gpas, hi, side='left')
+        rows = ((int(ids[k]), float(gpas[k]), float(credits[k])) for k in range(stop - 1, start - 1, -1))
+        return gpa_index.named(self.conn, rows)
+
+    def summary(self, grade_points, jobs=None):
+        return summary.named_records(self.conn, self.term_points(grade_points))
+
+    def students_for_course(self, text, limit=200):
+        match = search_index.prefix_filter(text)
+        if match is None:
+            return []
+        codes = [code for code, name in enumerate(self.names.values) if match(name)]
+        student = np.array(self.student_id)
+        hits = np.flatnonzero(np.isin(np.array(self.course_name), codes) & (student != 0))[:limit]
+        names = {sid: (name, idx) for sid, name, idx in self.conn.execute(
+            "SELECT id, name, index_number FROM students WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps(sorted({int(student[r]) for r in hits})),))}
+        results = []
+        for r in hits:
+            sid = int(student[r])
+            if sid in names:
+                year, semester, course_name, _, _ = self.row(r)
+                results.append((sid, *names[sid], course_name, year, semester))
+        results.sort(key=lambda h: h[1])
+        return results
+
+    def close(self):
+        pass
@@ -0,0 +1,452 @@
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import bulk_import
+import columnar
+import gpa_index
+import search_index
+import summary
+
+# Where course rows live. GPAApp runs its course reads and writes through a
+# course store instead of its own cursor:
+#
+#   SQLiteCourseStore   courses next to the students in data.db (the default)
+#   ShardedCourseStore  courses split over N shard files by student id range
+#   ColumnarCourseStore courses in in-process arrays (columnar.py)
+#
+# GPA_STORAGE picks the backend: `sqlite` works on GPA_DATABASE (default
+# data.db); `memory` and `columnar` load a snapshot of it into memory and
+# never write back, so benchmarks measure compute rather than disk and
+# what-if sessions leave no trace.
+#
+# Students always stay in data.db, which hands out student ids and records
+# the shard layout. Ids are dealt to shards in blocks of consecutive ids
+# (ids 1-10000 to shard 0, 10001-20000 to shard 1, ... wrapping round), so
+# every shard grows at the same pace and all of a student's courses sit in
+# one file: per-student work opens exactly one shard, roster-wide work
+# (summary export, course search) fans out over all of them. Each shard has
+# its own write lock, so faculties writing different id ranges no longer
+# queue behind one another.
+
+DEFAULT_BLOCK = 10_000
+# Course ids stay unique across shards: shard k numbers its rows from (k + 1) * SHARD_ID_SPAN
+SHARD_ID_SPAN = 10 ** 12
+
+STORAGE_BACKENDS = ('sqlite', 'memory', 'columnar')
+
+LAYOUT_SCHEMA = "CREATE TABLE IF NOT EXISTS shard_layout (shards INTEGER NOT NULL, block INTEGER NOT NULL)"
+
+# Students deleted from data.db whose shard courses are still to go. The
+# trigger queues them in the same transaction as the delete, whoever deletes
+# (app, service, archive), and the queue is worked off afterwards and again
+# at every start, so a shard that fails mid-delete leaves no orphans behind.
+PENDING_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS shard_deletes (student_id INTEGER PRIMARY KEY)",
+    """
+    CREATE TRIGGER IF NOT EXISTS students_shard_delete AFTER DELETE ON students BEGIN
+        INSERT OR IGNORE INTO shard_deletes (student_id) VALUES (old.id);
+    END
+    """,
+]
+
+SHARD_SCHEMA = [
+    # No foreign key: the students table is in data.db
+    """
+    CREATE TABLE IF NOT EXISTS courses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id INTEGER,
+        year TEXT, semester TEXT,
+        course_name TEXT, grade TEXT, credits REAL
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_courses_student_term
+    ON courses(student_id, year, semester, grade, credits)
+    """,
+    """
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_courses_natural_key
+    ON courses(student_id, year, semester, course_name)
+    """,
+]
+
+
+class SQLiteCourseStore:
+    # Courses in the same database (and connection) as the students
+    external = False
+
+    def __init__(self, conn, database):
+        self.conn = conn
+        self.database = database
+
+    def term_courses(self, student_id, year, semester):
+        return self.conn.execute("""
+            SELECT course_name, grade, credits FROM courses
+            WHERE student_id=? AND year=? AND semester=?
+        """, (student_id, year, semester)).fetchall()
+
+    def grade_rows(self, student_id):
+        return self.conn.execute(
+            "SELECT year, semester, grade, credits FROM courses WHERE student_id=?", (student_id,)).fetchall()
+
+    def course_rows(self, student_id):
+        return self.conn.execute(
+            "SELECT year, semester, course_name, grade, credits FROM courses WHERE student_id=?", (student_id,)).fetchall()
+
+    def grade_rows_many(self, student_ids):
+        return grade_rows_many(self.conn, student_ids)
+
+    def replace_term(self, student_id, year, semester, rows):
+        # rows: [(course_name, grade, credits)]; one transaction
+        try:
+            self.conn.execute("DELETE FROM courses WHERE student_id=? AND year=? AND semester=?",
+                              (student_id, year, semester))
+            self.conn.executemany(bulk_import.UPSERT_COURSE,
+                                  [(student_id, year, semester, *row) for row in rows])
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+
+    def upsert(self, values):
+        # values: [(student_id, year, semester, course_name, grade, credits)]; returns rows changed
+        try:
+            changed = self.conn.executemany(bulk_import.UPSERT_COURSE, values).rowcount
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+        return changed
+
+    def delete_students(self, student_ids):
+        pass  # ON DELETE CASCADE already removed their courses
+
+    def student_courses(self, student_ids):
+        # [(id, student_id, year, semester, course_name, grade, credits)] of many students
+        return self.conn.execute("""
+            SELECT id, student_id, year, semester, course_name, grade, credits FROM courses
+            WHERE student_id IN (SELECT value FROM json_each(?)) ORDER BY id
+        """, (json.dumps(list(student_ids)),)).fetchall()
+
+    def student_totals(self, grade_points):
+        return summary.student_totals(self.conn, grade_points)
+
+    def gpa_range(self, lo=None, hi=None):
+        return gpa_index.students_in_range(self.conn, lo, hi)
+
+    def summary(self, grade_points, jobs=None):
+        return summary.compute_summary(self.database, grade_points, jobs=jobs, conn=self.conn)
+
+    def students_for_course(self, text, limit=200):
+        return search_index.students_for_course(self.conn, text, limit)
+
+    def close(self):
+        pass
+
+
+class ShardedCourseStore:
+    external = True  # courses are not in the students' database
+
+    def __init__(self, conn, paths, block=DEFAULT_BLOCK, grade_points=None, readonly=False):
+        self.conn = conn
+        self.paths = [os.path.abspath(p) for p in paths]
+        self.block = block
+        # Same connection class as data.db, so shard SQL shows up in the same diagnostics
+        if readonly:
+            self.shards = [connect_reader(p, factory=type(conn), check_same_thread=False) for p in self.paths]
+        else:
+            self.shards = [sqlite3.connect(p, factory=type(conn), check_same_thread=False) for p in self.paths]
+        for shard in self.shards:
+            if hasattr(conn, 'stats'):
+                shard.stats = conn.stats
+        if readonly:
+            return  # the writer that recorded the layout set the shards up
+        try:
+            for k, shard in enumerate(self.shards):
+                init_shard(shard, k)
+                # Each shard keeps the GPA index of its own students
+                if grade_points is not None:
+                    gpa_index.init(shard, grade_points)
+            with conn:
+                for stmt in PENDING_SCHEMA:
+                    conn.execute(stmt)
+            self.adopt()
+            self.purge()
+        except BaseException:
+            self.close()
+            raise
+
+    def index(self, student_id):
+        return ((student_id - 1) // self.block) % len(self.shards)
+
+    def shard(self, student_id):
+        return self.shards[self.index(student_id)]
+
+    def split(self, values):
+        # {shard index: rows} for rows that start with a student id
+        groups = {}
+        for row in values:
+            groups.setdefault(self.index(row[0]), []).append(row)
+        return groups
+
+    def each(self, fn, groups):
+        # fn(shard, rows) on every shard in `groups`; shards are separate files,
+        # so their writes run side by side instead of one after another
+        if len(groups) < 2:
+            return [fn(self.shards[k], rows) for k, rows in groups.items()]
+        with ThreadPoolExecutor(max_workers=len(groups)) as pool:
+            futures = [pool.submit(fn, self.shards[k], rows) for k, rows in groups.items()]
+            return [f.result() for f in futures]
+
+    def adopt(self):
+        # Courses written before sharding was switched on move to their shards
+        # once. data.db's write lock is held from the first copy to the final
+        # DELETE, so no course can be added there meanwhile, and a second
+        # writer starting up waits and then finds nothing left to move. A run
+        # cut short leaves the rows in data.db; copying them again is harmless.
+        if not self.conn.execute("SELECT 1 FROM courses LIMIT 1").fetchone():
+            return
+        database = self.conn.execute("PRAGMA database_list").fetchone()[2]
+        self.conn.commit()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Each shard pulls its rows; reading data.db is allowed under the write lock
+            for k, shard in enumerate(self.shards):
+                shard.commit()
+                shard.execute("ATTACH DATABASE ? AS source", (database,))
+                try:
+                    with shard:
+                        shard.execute("""
+                            INSERT OR REPLACE INTO main.courses (id, student_id, year, semester, course_name, grade, credits)
+                            SELECT id, student_id, year, semester, course_name, grade, credits FROM source.courses
+                            WHERE ((student_id - 1) / ?) % ? = ?
+                        """, (self.block, len(self.shards), k))
+                finally:
+                    shard.execute("DETACH DATABASE source")
+            self.conn.execute("DELETE FROM courses")
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+
+    def term_courses(self, student_id, year, semester):
+        return self.shard(student_id).execute("""
+            SELECT course_name, grade, credits FROM courses
+            WHERE student_id=? AND year=? AND semester=?
+        """, (student_id, year, semester)).fetchall()
+
+    def grade_rows(self, student_id):
+        return self.shard(student_id).execute(
+            "SELECT year, semester, grade, credits FROM courses WHERE student_id=?", (student_id,)).fetchall()
+
+    def course_rows(self, student_id):
+        return self.shard(student_id).execute(
+            "SELECT year, semester, course_name, grade, credits FROM courses WHERE student_id=?", (student_id,)).fetchall()
+
+    def grade_rows_many(self, student_ids):
+        rows = {}
+        for k, group in self.split([(sid,) for sid in student_ids]).items():
+            rows.update(grade_rows_many(self.shards[k], [sid for sid, in group]))
+        return rows
+
+    def replace_term(self, student_id, year, semester, rows):
+        shard = self.shard(student_id)
+        try:
+            shard.execute("DELETE FROM courses WHERE student_id=? AND year=? AND semester=?",
+                          (student_id, year, semester))
+            shard.executemany(bulk_import.UPSERT_COURSE, [(student_id, year, semester, *row) for row in rows])
+            shard.commit()
+        except sqlite3.Error:
+            shard.rollback()
+            raise
+
+    def upsert(self, values):
+        # One transaction per shard; a failing shard does not undo the others
+        def write(shard, rows):
+            try:
+                changed = shard.executemany(bulk_import.UPSERT_COURSE, rows).rowcount
+                shard.commit()
+            except sqlite3.Error:
+                shard.rollback()
+                raise
+            return changed
+        return sum(self.each(write, self.split(values)))
+
+    def delete_students(self, student_ids):
+        # Call after the students are deleted from data.db; their ids are
+        # already queued in shard_deletes, with any left from earlier failures
+        self.purge()
+
+    def purge(self):
+        ids = [sid for sid, in self.conn.execute("SELECT student_id FROM shard_deletes")]
+        if not ids:
+            return
+
+        def delete(shard, rows):
+            with shard:
+                shard.execute("DELETE FROM courses WHERE student_id IN (SELECT value FROM json_each(?))",
+                              (json.dumps([sid for sid, in rows]),))
+        self.each(delete, self.split([(sid,) for sid in ids]))
+        with self.conn:
+            self.conn.execute("DELETE FROM shard_deletes WHERE student_id IN (SELECT value FROM json_each(?))",
+                              (json.dumps(ids),))
+
+    def student_courses(self, student_ids):
+        # [(id, student_id, year, semester, course_name, grade, credits)] of many students
+        rows = []
+        for k, group in self.split([(sid,) for sid in student_ids]).items():
+            rows.extend(self.shards[k].execute("""
+                SELECT id, student_id, year, semester, course_name, grade, credits FROM courses
+                WHERE student_id IN (SELECT value FROM json_each(?)) ORDER BY id
+            """, (json.dumps([sid for sid, in group]),)))
+        return rows
+
+    def student_totals(self, grade_points):
+        # A student's courses are all in one shard, so the shards' results don't overlap
+        totals = {}
+        for shard in self.shards:
+            totals.update(summary.student_totals(shard, grade_points))
+        return totals
+
+    def gpa_range(self, lo=None, hi=None):
+        return gpa_index.merge_shards(self.conn, self.shards, lo, hi)
+
+    def summary(self, grade_points, jobs=None):
+        return summary.compute_sharded(self.conn, self.paths, grade_points, jobs=jobs, shards=self.shards)
+
+    def students_for_course(self, text, limit=200):
+        # Best matches of every shard, re-ranked together, then named from data.db
+        hits = []
+        for shard in self.shards:
+            hits.extend(search_index.course_matches(shard, text, limit))
+        hits.sort(key=lambda h: h[0])
+        hits = hits[:limit]
+        names = {sid: (name, idx) for sid, name, idx in self.conn.execute(
+            "SELECT id, name, index_number FROM students WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps(list({h[1] for h in hits})),))}
+        return [(sid, *names[sid], cname, year, semester)
+                for _, sid, cname, year, semester in hits if sid in names]
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+
+
+def grade_rows_many(conn, student_ids):
+    # {student_id: [(year, semester, grade, credits)]} for many students in one
+    # IN (...) query over the covering index; students without courses are absent
+    rows = {}
+    for student_id, year, semester, grade, credits in conn.execute("""
+        SELECT student_id, year, semester, grade, credits FROM courses
+        WHERE student_id IN (SELECT value FROM json_each(?))
+    """, (json.dumps(list(student_ids)),)):
+        rows.setdefault(student_id, []).append((year, semester, grade, credits))
+    return rows
+
+
+def init_shard(shard, k):
+    for stmt in SHARD_SCHEMA:
+        shard.execute(stmt)
+    if not shard.execute("SELECT 1 FROM sqlite_sequence WHERE name='courses'").fetchone():
+        shard.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('courses', ?)", ((k + 1) * SHARD_ID_SPAN,))
+    shard.commit()
+    search_index.init_fts(shard, tables=('courses',))
+
+
+def shard_paths(database, shards):
+    # data.db -> data.shard0.db, data.shard1.db, ...
+    root, ext = os.path.splitext(database)
+    return [f"{root}.shard{k}{ext or '.db'}" for k in range(shards)]
+
+
+def storage_config(storage=None, database=None):
+    # (backend, database path) from the arguments or GPA_STORAGE / GPA_DATABASE
+    storage = storage or os.environ.get('GPA_STORAGE') or 'sqlite'
+    if storage not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend '{storage}' (expected one of: {', '.join(STORAGE_BACKENDS)})")
+    return storage, database or os.environ.get('GPA_DATABASE') or 'data.db'
+
+
+def connect(storage, database, factory=sqlite3.Connection):
+    # In-memory backends start from a copy of `database` when it exists,
+    # with any shard files folded back into the single courses table
+    if storage == 'sqlite':
+        return sqlite3.connect(database, factory=factory)
+    conn = sqlite3.connect(':memory:', factory=factory, uri=True)
+    if database != ':memory:' and os.path.exists(database):
+        source = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+        try:
+            source.backup(conn)
+        finally:
+            source.close()
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name='shard_layout'").fetchone():
+            layout = conn.execute("SELECT shards FROM shard_layout").fetchone()
+            for path in shard_paths(database, layout[0]) if layout else []:
+                conn.execute("ATTACH DATABASE ? AS shard", (f"file:{os.path.abspath(path)}?mode=ro",))
+                try:
+                    with conn:
+                        conn.execute("""
+                            INSERT INTO main.courses (id, student_id, year, semester, course_name, grade, credits)
+                            SELECT id, student_id, year, semester, course_name, grade, credits FROM shard.courses
+                        """)
+                finally:
+                    conn.execute("DETACH DATABASE shard")
+            with conn:
+                if conn.execute("SELECT 1 FROM sqlite_master WHERE name='shard_deletes'").fetchone():
+                    # Courses of deleted students that a shard still held
+                    conn.execute("DELETE FROM courses WHERE student_id IN (SELECT student_id FROM shard_deletes)")
+                    conn.execute("DELETE FROM shard_deletes")
+                conn.execute("DELETE FROM shard_layout")
+                conn.execute("DROP TRIGGER IF EXISTS students_shard_delete")
+    return conn
+
+
+def connect_reader(database, factory=sqlite3.Connection, **kwargs):
+    # An existing database file, opened so that any write fails instead of
+    # creating a file, a table or a migration
+    conn = sqlite3.connect(f"file:{os.path.abspath(database)}?mode=rw", uri=True, factory=factory, **kwargs)
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+def open_reader(conn, database):
+    # Course store for readers (service readers, async API workers, CLIs):
+    # follows the recorded shard layout, if any, and never sets one up
+    recorded = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='shard_layout'").fetchone()
+    layout = recorded and conn.execute("SELECT shards, block FROM shard_layout").fetchone()
+    if not layout or database in (None, '', ':memory:'):
+        return SQLiteCourseStore(conn, database)
+    shards, block = layout
+    return ShardedCourseStore(conn, shard_paths(database, shards), block, readonly=True)
+
+
+def open_store(conn, database, storage='sqlite', grade_points=None):
+    if storage == 'columnar':
+        return columnar.ColumnarCourseStore.load(conn, grade_points)
+    if storage == 'memory':
+        return SQLiteCourseStore(conn, ':memory:')
+    # The layout is fixed the first time sharding is switched on (GPA_SHARDS=N,
+    # GPA_SHARD_BLOCK ids per block) and recorded in data.db; later runs follow
+    # the recorded layout whatever the environment says.
+    conn.execute(LAYOUT_SCHEMA)
+    layout = conn.execute("SELECT shards, block FROM shard_layout").fetchone()
+    if layout is None:
+        shards = int(os.environ.get('GPA_SHARDS', '0') or 0)
+        if shards < 2 or database in (None, '', ':memory:'):
+            return SQLiteCourseStore(conn, database)
+        # Under the write lock: of two writers starting at once, the second
+        # reads the first one's layout rather than recording its own
+        conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            layout = conn.execute("SELECT shards, block FROM shard_layout").fetchone()
+            if layout is None:
+                layout = (shards, int(os.environ.get('GPA_SHARD_BLOCK', '0') or 0) or DEFAULT_BLOCK)
+                conn.execute("INSERT INTO shard_layout (shards, block) VALUES (?, ?)", layout)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    shards, block = layout
+    return ShardedCourseStore(conn, shard_paths(database, shards), block, grade_points)
@@ -0,0 +1,472 @@
+import bisect
+import contextlib
+import functools
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+# Runtime diagnostics for GPAApp.
+#
+# SQL: the app opens its database with `factory=InstrumentedConnection`; every
+# statement run through it (including pandas.read_sql_query) is timed and
+# grouped by normalized query text. UI: EventLoopMonitor times Tk callbacks
+# and catches event-loop stalls.
+
+log = logging.getLogger('gpa.sql')
+
+SLOW_QUERY_MS = float(os.environ.get('GPA_SLOW_QUERY_MS', '50'))
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open
+BUCKETS_MS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+
+_WS_RE = re.compile(r"\s+")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def normalize(sql):
+    # Collapse whitespace and literals so the same statement groups together
+    sql = _WS_RE.sub(" ", sql).strip()
+    sql = _STRING_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    return _IN_LIST_RE.sub("(?, ...)", sql)
+
+
+class QueryStats:
+    __slots__ = ('count', 'total_ms', 'max_ms', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms, rows=1):
+        self.count += rows
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+
+    def percentile(self, q):
+        # Upper bound of the bucket holding the q-th sample
+        samples = sum(self.buckets)
+        if not samples:
+            return 0.0
+        target = q * samples
+        seen = 0
+        for bound, n in zip(BUCKETS_MS + [self.max_ms], self.buckets):
+            seen += n
+            if seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / max(sum(self.buckets), 1), 4),
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'max_ms': round(self.max_ms, 3),
+            'histogram': dict(zip([f"<={b}" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}"], self.buckets)),
+        }
+
+
+class SQLStats:
+    def __init__(self, slow_ms=SLOW_QUERY_MS):
+        self.slow_ms = slow_ms
+        # Shard connections share these stats and write to them from worker threads
+        self.lock = threading.Lock()
+        self.queries = {}
+        self.actions = {}
+        self.slow = deque(maxlen=100)
+        self._stack = []
+
+    def reset(self):
+        # Counters only: the dialog can reset from a nested event loop while
+        # an action is still running, and that action must still unwind
+        with self.lock:
+            self.queries.clear()
+            self.actions.clear()
+            self.slow.clear()
+
+    def _entry(self, name):
+        return self.actions.setdefault(name, {'calls': 0, 'statements': 0, 'sql_ms': 0.0})
+
+    @contextlib.contextmanager
+    def action(self, name):
+        # Statements are attributed to the outermost running action, so
+        # load_students -> load_courses counts once, as load_students.
+        self._stack.append(name)
+        if len(self._stack) == 1:
+            with self.lock:
+                self._entry(name)['calls'] += 1
+        try:
+            yield
+        finally:
+            self._stack.pop()
+
+    def track(self, name, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with self.action(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    def record(self, sql, ms, rows=1):
+        key = normalize(sql)
+        with self.lock:
+            stats = self.queries.get(key)
+            if stats is None:
+                stats = self.queries[key] = QueryStats()
+            stats.add(ms, rows)
+            if self._stack:
+                entry = self._entry(self._stack[0])
+                entry['statements'] += rows
+                entry['sql_ms'] += ms
+        return key
+
+    def add_fetch(self, key, ms):
+        # Row fetching belongs to the statement that produced the rows
+        with self.lock:
+            stats = self.queries.get(key)
+            if stats is not None:
+                stats.total_ms += ms
+                stats.max_ms = max(stats.max_ms, ms)
+            if self._stack:
+                self._entry(self._stack[0])['sql_ms'] += ms
+
+    def record_slow(self, sql, ms, plan):
+        entry = {'sql': normalize(sql), 'ms': round(ms, 3), 'plan': plan,
+                 'action': self._stack[0] if self._stack else None,
+                 'at': time.strftime('%Y-%m-%d %H:%M:%S')}
+        self.slow.append(entry)
+        log.warning("slow query (%.1f ms) in %s: %s\n  %s", ms, entry['action'], entry['sql'], "\n  ".join(plan))
+
+    def totals(self):
+        with self.lock:
+            queries = list(self.queries.values())
+        return {
+            'statements': sum(q.count for q in queries),
+            'distinct_queries': len(queries),
+            'sql_ms': round(sum(q.total_ms for q in queries), 3),
+            'slow_queries': len(self.slow),
+        }
+
+    def to_dict(self):
+        totals = self.totals()
+        with self.lock:
+            return {
+                'totals': totals,
+                'actions': {name: dict(v, sql_ms=round(v['sql_ms'], 3)) for name, v in self.actions.items()},
+                'queries': {sql: q.to_dict() for sql, q in sorted(self.queries.items(), key=lambda kv: -kv[1].total_ms)},
+                'slow': list(self.slow),
+            }
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(self.to_dict(), fh, indent=2)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    _last_key = None
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            ms = (time.perf_counter() - started) * 1000
+            self._last_key = self.connection.stats.record(sql, ms)
+            if ms >= self.connection.stats.slow_ms:
+                self.connection.explain_slow(sql, parameters, ms)
+
+    def executemany(self, sql, seq_of_parameters):
+        seq_of_parameters = list(seq_of_parameters)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            ms = (time.perf_counter() - started) * 1000
+            self._last_key = self.connection.stats.record(sql, ms, rows=max(len(seq_of_parameters), 1))
+            if ms >= self.connection.stats.slow_ms:
+                self.connection.explain_slow(sql, seq_of_parameters[0] if seq_of_parameters else (), ms)
+
+    def _timed_fetch(self, fetch, *args):
+        started = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            self.connection.stats.add_fetch(self._last_key, (time.perf_counter() - started) * 1000)
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed_fetch(super().fetchmany, *(() if size is None else (size,)))
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    # Use as sqlite3.connect(path, factory=InstrumentedConnection)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = SQLStats()
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def explain_slow(self, sql, parameters, ms):
+        plan = []
+        if sql.lstrip().split(None, 1)[0].upper() in ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE'):
+            try:
+                # Plain cursor so the EXPLAIN itself is not recorded
+                rows = sqlite3.Cursor(self).execute("EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+                plan = [row[-1] for row in rows]
+            except sqlite3.Error as e:
+                plan = [f"(no plan: {e})"]
+        self.stats.record_slow(sql, ms, plan)
+
+
+def percentiles(samples, qs=(0.5, 0.95, 0.99)):
+    # Nearest-rank percentiles of a sample list
+    if not samples:
+        return [0.0 for _ in qs]
+    ordered = sorted(samples)
+    return [ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))] for q in qs]
+
+
+class EventLoopMonitor:
+    # Opt-in watchdog for the Tk event loop (GPA_EVENT_MONITOR=1).
+    #
+    # A `root.after` heartbeat measures how late each tick runs; a background
+    # thread notices when the heartbeat stops and samples the main thread's
+    # Python stack until it resumes. Every Tk callback (button commands, bound
+    # events) is timed by patching tkinter.CallWrapper, so it must be started
+    # before the widgets are built.
+
+    def __init__(self, root, interval_ms=50, stall_ms=200, sample_ms=25, keep=20, max_samples=10000):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.stall_ms = stall_ms
+        self.sample_ms = sample_ms
+        self.keep = keep
+        self.max_samples = max_samples
+        self.handlers = {}
+        self.lag = deque(maxlen=max_samples)
+        self.stalls = []
+        self.current = None
+        self._pending = None
+        self._lock = threading.Lock()
+        self._running = False
+        self._original_call = None
+
+    @classmethod
+    def from_env(cls, root, tk_module):
+        if os.environ.get('GPA_EVENT_MONITOR', '') in ('', '0') or not hasattr(tk_module, 'CallWrapper'):
+            return None
+        monitor = cls(root, stall_ms=float(os.environ.get('GPA_EVENT_STALL_MS', '200')))
+        monitor.start(tk_module)
+        return monitor
+
+    def start(self, tk_module):
+        self._tk = tk_module
+        self._original_call = original = tk_module.CallWrapper.__call__
+        monitor = self
+
+        def __call__(wrapper, *args):
+            name = getattr(wrapper.func, '__qualname__', None) or repr(wrapper.func)
+            if name.startswith('Misc.after'):
+                # after() callbacks, including our own heartbeat
+                return original(wrapper, *args)
+            outer = monitor.current
+            monitor.current = name
+            started = time.perf_counter()
+            try:
+                return original(wrapper, *args)
+            finally:
+                monitor.record(name, (time.perf_counter() - started) * 1000)
+                monitor.current = outer
+
+        tk_module.CallWrapper.__call__ = __call__
+        self._running = True
+        self._main_thread = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self.root.after(self.interval_ms, self._heartbeat)
+        self._thread = threading.Thread(target=self._sample_loop, name='gpa-event-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._original_call is not None:
+            self._tk.CallWrapper.__call__ = self._original_call
+            self._original_call = None
+
+    def record(self, name, ms):
+        samples = self.handlers.get(name)
+        if samples is None:
+            samples = self.handlers[name] = deque(maxlen=self.max_samples)
+        samples.append(ms)
+
+    def _heartbeat(self):
+        now = time.perf_counter()
+        lag = max(0.0, (now - self._last_beat) * 1000 - self.interval_ms)
+        self.lag.append(lag)
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._last_beat = now
+        if pending is not None:
+            pending['ms'] = round(lag, 1)
+            self.stalls.append(pending)
+            self.stalls.sort(key=lambda s: -s['ms'])
+            del self.stalls[self.keep:]
+        if self._running:
+            self.root.after(self.interval_ms, self._heartbeat)
+
+    def _sample_loop(self):
+        while self._running:
+            time.sleep(self.sample_ms / 1000)
+            with self._lock:
+                silent_ms = (time.perf_counter() - self._last_beat) * 1000 - self.interval_ms
+                if silent_ms < self.stall_ms:
+                    continue
+                frame = sys._current_frames().get(self._main_thread)
+                if frame is None:
+                    continue
+                stack = tuple(f"{fs.name} ({os.path.basename(fs.filename)}:{fs.lineno})"
+                              for fs in traceback.extract_stack(frame))
+                if self._pending is None:
+                    self._pending = {'handler': self.current, 'at': time.strftime('%H:%M:%S'), 'samples': {}}
+                samples = self._pending['samples']
+                samples[stack] = samples.get(stack, 0) + 1
+
+    def report(self):
+        handlers = {}
+        for name, samples in self.handlers.items():
+            p50, p95, p99 = percentiles(list(samples))
+            handlers[name] = {'calls': len(samples), 'p50_ms': round(p50, 3), 'p95_ms': round(p95, 3),
+                              'p99_ms': round(p99, 3), 'max_ms': round(max(samples), 3)}
+        p50, p95, p99 = percentiles(list(self.lag))
+        stalls = []
+        for stall in self.stalls:
+            # Most frequently sampled stack first; innermost frame last
+            stacks = sorted(stall['samples'].items(), key=lambda kv: -kv[1])
+            stalls.append({'ms': stall['ms'], 'handler': stall['handler'], 'at': stall['at'],
+                           'stacks': [{'samples': n, 'stack': list(stack)} for stack, n in stacks[:3]]})
+        return {
+            'event_loop_lag_ms': {'p50': round(p50, 2), 'p95': round(p95, 2), 'p99': round(p99, 2),
+                                  'max': round(max(self.lag, default=0.0), 2)},
+            'handlers': dict(sorted(handlers.items(), key=lambda kv: -kv[1]['p95_ms'])),
+            'worst_stalls': stalls,
+        }
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(self.report(), fh, indent=2)
+
+
+class ActionProfiler:
+    # Profiles the next N UI actions (GPA_PROFILE=N at startup, or armed from
+    # the hidden header menu). Each action writes one file to GPA_PROFILE_DIR:
+    #   cprofile mode: <time>-<n>-<action>.pstats    (snakeviz, gprof2dot, pstats)
+    #   sample mode:   <time>-<n>-<action>.folded    (flamegraph.pl, speedscope)
+    # <time> has milliseconds and <n> counts this session's files, so quick
+    # successive actions never overwrite one another.
+    # While nothing is armed the wrapper only tests one integer.
+
+    def __init__(self, directory='profiles', mode='cprofile', interval_ms=5):
+        self.directory = directory
+        self.mode = mode
+        self.interval_ms = interval_ms
+        self.remaining = 0
+        self.startup_actions = 0
+        self.active = False
+        self.written = []
+
+    @classmethod
+    def from_env(cls):
+        # Not armed yet: the app arms `startup_actions` once its UI is built
+        profiler = cls(directory=os.environ.get('GPA_PROFILE_DIR', 'profiles'),
+                       mode=os.environ.get('GPA_PROFILE_MODE', 'cprofile'))
+        profiler.startup_actions = int(os.environ.get('GPA_PROFILE', '0') or 0)
+        return profiler
+
+    def arm(self, actions):
+        self.remaining = max(0, actions)
+
+    def wrap(self, name, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not self.remaining or self.active:
+                return fn(*args, **kwargs)
+            self.remaining -= 1
+            self.active = True
+            try:
+                if self.mode == 'sample':
+                    return self._sampled(name, fn, args, kwargs)
+                return self._cprofiled(name, fn, args, kwargs)
+            finally:
+                self.active = False
+        return wrapper
+
+    def _path(self, name, ext):
+        os.makedirs(self.directory, exist_ok=True)
+        now = time.time()
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now * 1000) % 1000:03d}"
+        path = os.path.join(self.directory, f"{stamp}-{len(self.written) + 1:03d}-{name}.{ext}")
+        self.written.append(path)
+        return path
+
+    def _cprofiled(self, name, fn, args, kwargs):
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(fn, *args, **kwargs)
+        finally:
+            profile.dump_stats(self._path(name, 'pstats'))
+
+    def _sampled(self, name, fn, args, kwargs):
+        # Statistical sampler: a helper thread snapshots this thread's stack
+        # every interval and counts identical stacks (collapsed-stack format).
+        target = threading.get_ident()
+        counts = {}
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(self.interval_ms / 1000):
+                frame = sys._current_frames().get(target)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                key = ";".join(reversed(stack))
+                counts[key] = counts.get(key, 0) + 1
+
+        sampler = threading.Thread(target=sample, name='gpa-profiler', daemon=True)
+        sampler.start()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            done.set()
+            sampler.join()
+            with open(self._path(name, 'folded'), 'w', encoding='utf-8') as fh:
+                for stack, n in sorted(counts.items()):
+                    fh.write(f"{stack} {n}\n")
@@ -0,0 +1,273 @@
+import contextlib
+import threading
+from collections import OrderedDict
+
+# In-process caches sitting between GPAApp and SQLite. Every write path in the
+# app must invalidate the entries it touches; the caches never read the
+# database themselves.
+
+
+class CourseCache:
+    # Bounded LRU of course rows keyed by (student_id, year, semester).
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, student_id, year, semester):
+        key = (student_id, year, semester)
+        rows = self.entries.get(key)
+        if rows is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return rows
+
+    def put(self, student_id, year, semester, rows):
+        key = (student_id, year, semester)
+        self.entries[key] = tuple(rows)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, student_id=None, year=None, semester=None):
+        # No arguments clears everything; otherwise drop one term or one student.
+        if student_id is None:
+            self.entries.clear()
+        elif year is not None and semester is not None:
+            self.entries.pop((student_id, year, semester), None)
+        else:
+            for key in [k for k in self.entries if k[0] == student_id]:
+                del self.entries[key]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+        }
+
+
+def term_totals(rows, grade_points):
+    # rows of (year, semester, grade, credits) -> {(year, semester): (points, credits)}
+    totals = {}
+    for year, semester, grade, credits in rows:
+        points, total = totals.get((year, semester), (0, 0))
+        totals[(year, semester)] = (points + grade_points.get(grade, 0) * credits, total + credits)
+    return totals
+
+
+class GPAResult:
+    __slots__ = ('terms', 'points', 'credits')
+
+    def __init__(self, terms):
+        self.terms = terms
+        self.points = sum(p for p, _ in terms.values())
+        self.credits = sum(c for _, c in terms.values())
+
+    @property
+    def gpa(self):
+        return self.points / self.credits if self.credits else 0
+
+    def term(self, year, semester):
+        # (gpa, credits) for one term; (0, 0) when nothing is recorded.
+        points, credits = self.terms.get((year, semester), (0, 0))
+        return (points / credits if credits else 0), credits
+
+
+class GPACache:
+    # Per-student GPA results guarded by a version counter. Every course write
+    # for a student must call bump(); a result computed against an older
+    # version is never served.
+
+    def __init__(self):
+        self.versions = {}
+        self.results = {}
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, student_id):
+        return self.versions.get(student_id, 0)
+
+    def bump(self, student_id):
+        self.versions[student_id] = self.version(student_id) + 1
+        self.results.pop(student_id, None)
+
+    def clear(self):
+        for student_id in list(self.results):
+            self.bump(student_id)
+
+    def get(self, student_id):
+        entry = self.results.get(student_id)
+        if entry is None or entry[0] != self.version(student_id):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def put(self, student_id, result, version=None):
+        # Pass the version read *before* querying so a concurrent bump wins.
+        if version is None:
+            version = self.version(student_id)
+        if version == self.version(student_id):
+            self.results[student_id] = (version, result)
+        return result
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': len(self.results),
+        }
+
+
+class Flight:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    # Thread-safe: concurrent calls with the same (student_id, scope) key run
+    # the computation once and all get its result (or its exception). Nothing
+    # is kept after the call completes, so this is not a cache. Keys with
+    # student_id None depend on every student (e.g. the summary).
+    #
+    # Writers wrap their write, commit included, in writing(): flights that
+    # began before it are dropped first, and until it ends calls for those
+    # students compute on their own rather than start a flight others would
+    # join. No caller arriving after the commit gets a read from before it.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.flights = {}
+        self.writes = {}  # student_id -> writes in progress
+        self.active = 0  # writes in progress, for student_id None keys
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key, compute):
+        with self.lock:
+            self.calls += 1
+            if self.active and (key[0] is None or key[0] in self.writes):
+                flight = None
+            else:
+                flight = self.flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self.flights[key] = Flight()
+                else:
+                    self.shared += 1
+        if flight is None:
+            return compute()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = compute()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                if self.flights.get(key) is flight:
+                    del self.flights[key]
+            flight.done.set()
+
+    @contextlib.contextmanager
+    def writing(self, student_ids=()):
+        student_ids = set(student_ids)
+        with self.lock:
+            self.active += 1
+            for sid in student_ids:
+                self.writes[sid] = self.writes.get(sid, 0) + 1
+            for key in [k for k in self.flights if k[0] is None or k[0] in student_ids]:
+                del self.flights[key]
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.active -= 1
+                for sid in student_ids:
+                    self.writes[sid] -= 1
+                    if not self.writes[sid]:
+                        del self.writes[sid]
+
+    def stats(self):
+        return {'calls': self.calls, 'shared': self.shared, 'in_flight': len(self.flights)}
+
+
+class LiveGPA:
+    # Running GPA over the unsaved editor rows of one term plus the saved
+    # totals of every other term. Like save_courses, a course name listed on
+    # several rows counts once, with its last row, so only the names an edit
+    # touches are recounted.
+
+    def __init__(self):
+        self.seed(0, 0)
+
+    def seed(self, other_points, other_credits):
+        self.other_points = other_points
+        self.other_credits = other_credits
+        self.clear_rows()
+
+    def clear_rows(self):
+        self.rows = {}  # key -> (course name, points, credits) or None, in editor order
+        self.names = {}  # course name -> (points, credits) of its last counted row
+        self.term_points = 0
+        self.term_credits = 0
+
+    def set_row(self, key, course_name, grade, credits, grade_points):
+        # Mirrors save_courses: rows without a name, with a bad grade or with
+        # non-positive credits are not saved, so they count for nothing.
+        name = course_name.strip()
+        try:
+            value = float(credits)
+        except (TypeError, ValueError):
+            value = 0
+        counted = (name, grade_points[grade] * value, value) if name and grade in grade_points and value > 0 else None
+        old = self.rows.get(key)
+        self.rows[key] = counted  # an existing key keeps its place in the editor order
+        self.recount({old[0] if old else None, counted[0] if counted else None} - {None})
+
+    def remove_row(self, key):
+        old = self.rows.pop(key, None)
+        if old:
+            self.recount({old[0]})
+
+    def recount(self, names):
+        for name in names:
+            last = next((row for row in reversed(self.rows.values()) if row and row[0] == name), None)
+            if last:
+                self.names[name] = last[1:]
+            else:
+                self.names.pop(name, None)
+        self.term_points = sum(points for points, _ in self.names.values())
+        self.term_credits = sum(credits for _, credits in self.names.values())
+
+    @property
+    def term_gpa(self):
+        return self.term_points / self.term_credits if self.term_credits > 0 else 0
+
+    @property
+    def credits(self):
+        return self.other_credits + self.term_credits
+
+    @property
+    def gpa(self):
+        credits = self.credits
+        return (self.other_points + self.term_points) / credits if credits > 0 else 0
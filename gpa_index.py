@@ -0,0 +1,230 @@
+import argparse
+import csv
+import heapq
+import json
+import os
+import sqlite3
+import sys
+import time
+import types
+
+# Cumulative GPA per student in an indexed table, for threshold reports
+# (dean's list, academic probation) that used to mean exporting the whole
+# summary and filtering it in Excel.
+#
+# student_gpa holds each student's total points and credits. Triggers on
+# courses add and subtract every row in the same transaction as the write,
+# so all writers keep it current: the app, bulk imports, the service, and
+# the ON DELETE CASCADE when students are deleted or archived. `gpa` is a
+# generated column with an index, so a threshold list is a range scan.
+# Shard files carry their own student_gpa next to their courses.
+#
+# The grade -> points mapping is compiled into the trigger SQL. When it
+# changes, init() recreates the triggers and rebuilds the table.
+
+DEANS_LIST = 3.7
+PROBATION = 2.0
+
+# name -> (min GPA inclusive, max GPA exclusive); None is open-ended
+REPORTS = {
+    'deans-list': (DEANS_LIST, None),
+    'probation': (None, PROBATION),
+}
+
+REPORT_COLUMNS = ['Name', 'Index Number', 'GPA', 'Credits']
+
+# Totals are rounded on every change so adding and removing a row leaves no float residue
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS student_gpa (
+        student_id INTEGER PRIMARY KEY,
+        points REAL NOT NULL,
+        credits REAL NOT NULL,
+        gpa REAL AS (CASE WHEN credits > 0 THEN round(points / credits, 4) END)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_student_gpa ON student_gpa(gpa)",
+]
+
+TRIGGERS = ('courses_gpa_ai', 'courses_gpa_ad', 'courses_gpa_au')
+
+
+def points_sql(grade_points, row):
+    # Grade points of `row` (new/old) as a SQL expression; unknown grades count 0
+    whens = " ".join(f"WHEN '{grade.replace(chr(39), chr(39) * 2)}' THEN {float(points)!r}"
+                     for grade, points in grade_points.items())
+    return f"CASE {row}.grade {whens} ELSE 0 END"
+
+
+def trigger_sql(grade_points):
+    add = f"""
+        INSERT INTO student_gpa (student_id, points, credits)
+        VALUES (new.student_id, round(({points_sql(grade_points, 'new')}) * coalesce(new.credits, 0), 6),
+                coalesce(new.credits, 0))
+        ON CONFLICT(student_id) DO UPDATE SET
+            points = round(points + excluded.points, 6), credits = round(credits + excluded.credits, 6);"""
+    subtract = f"""
+        UPDATE student_gpa SET
+            points = round(points - ({points_sql(grade_points, 'old')}) * coalesce(old.credits, 0), 6),
+            credits = round(credits - coalesce(old.credits, 0), 6)
+        WHERE student_id = old.student_id;
+        DELETE FROM student_gpa WHERE student_id = old.student_id AND credits <= 0;"""
+    return {
+        'courses_gpa_ai': f"CREATE TRIGGER courses_gpa_ai AFTER INSERT ON courses BEGIN{add}\nEND",
+        'courses_gpa_ad': f"CREATE TRIGGER courses_gpa_ad AFTER DELETE ON courses BEGIN{subtract}\nEND",
+        'courses_gpa_au': (f"CREATE TRIGGER courses_gpa_au AFTER UPDATE OF student_id, grade, credits ON courses "
+                           f"BEGIN{subtract}{add}\nEND"),
+    }
+
+
+def init(conn, grade_points):
+    # Creates student_gpa and its triggers on `conn` (data.db or a shard file);
+    # (re)builds the table from courses when the triggers are new or the
+    # grade mapping changed. Returns True when it rebuilt.
+    wanted = trigger_sql(grade_points)
+    current = dict(conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type='trigger' AND name IN (SELECT value FROM json_each(?))",
+        (json.dumps(TRIGGERS),)))
+    with conn:
+        for stmt in SCHEMA:
+            conn.execute(stmt)
+        if current == wanted:
+            return False
+        for name in TRIGGERS:
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        for sql in wanted.values():
+            conn.execute(sql)
+        conn.execute("DELETE FROM student_gpa")
+        conn.execute(f"""
+            INSERT INTO student_gpa (student_id, points, credits)
+            SELECT student_id, round(SUM(({points_sql(grade_points, 'courses')}) * coalesce(credits, 0)), 6),
+                   round(SUM(coalesce(credits, 0)), 6)
+            FROM courses
+            GROUP BY student_id
+            HAVING SUM(coalesce(credits, 0)) > 0
+        """)
+    return True
+
+
+def drop(conn):
+    # Courses are leaving SQLite (columnar storage): stop maintaining the table
+    with conn:
+        for name in TRIGGERS:
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        conn.execute("DELETE FROM student_gpa")
+
+
+def range_where(lo, hi):
+    # lo <= gpa < hi; either bound may be None
+    clauses, params = ["gpa IS NOT NULL"], []
+    if lo is not None:
+        clauses.append("gpa >= ?")
+        params.append(lo)
+    if hi is not None:
+        clauses.append("gpa < ?")
+        params.append(hi)
+    return " AND ".join(clauses), params
+
+
+def students_in_range(conn, lo=None, hi=None):
+    # Cursor over (student_id, name, index_number, gpa, credits), highest GPA
+    # first. CROSS JOIN keeps student_gpa outermost, so the gpa index drives
+    # the scan and no sort is needed.
+    where, params = range_where(lo, hi)
+    return conn.execute(f"""
+        SELECT g.student_id, s.name, s.index_number, g.gpa, g.credits
+        FROM student_gpa g CROSS JOIN students s ON s.id = g.student_id
+        WHERE {where}
+        ORDER BY g.gpa DESC
+    """, params)
+
+
+def gpa_rows(conn, lo=None, hi=None):
+    # (student_id, gpa, credits), highest GPA first; for shard files, which have no students
+    where, params = range_where(lo, hi)
+    return conn.execute(f"SELECT student_id, gpa, credits FROM student_gpa WHERE {where} ORDER BY gpa DESC", params)
+
+
+def named(conn, rows, chunk=1000):
+    # Streams (student_id, gpa, credits) rows as (student_id, name, index_number,
+    # gpa, credits), naming `chunk` students per query; unknown ids are dropped
+    rows = iter(rows)
+    while True:
+        batch = [row for _, row in zip(range(chunk), rows)]
+        if not batch:
+            return
+        names = {sid: (name, idx) for sid, name, idx in conn.execute(
+            "SELECT id, name, index_number FROM students WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps([row[0] for row in batch]),))}
+        for student_id, gpa, credits in batch:
+            if student_id in names:
+                yield (student_id, *names[student_id], gpa, credits)
+
+
+def merge_shards(conn, shards, lo=None, hi=None):
+    # Shard streams are each sorted by GPA; merged, they stay sorted
+    streams = [gpa_rows(shard, lo, hi) for shard in shards]
+    return named(conn, heapq.merge(*streams, key=lambda row: -row[1]))
+
+
+def write_report(rows, path):
+    # Streams (student_id, name, index_number, gpa, credits) rows to .csv or
+    # .xlsx without holding them in memory; returns the number written
+    count = 0
+    if path.lower().endswith('.xlsx'):
+        from openpyxl import Workbook
+        book = Workbook(write_only=True)
+        sheet = book.create_sheet('Students')
+        sheet.append(REPORT_COLUMNS)
+        for _, name, idx, gpa, credits in rows:
+            sheet.append([name, idx, gpa, credits])
+            count += 1
+        book.save(path)
+        return count
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(REPORT_COLUMNS)
+        for _, name, idx, gpa, credits in rows:
+            writer.writerow([name, idx, gpa, credits])
+            count += 1
+    return count
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="List students whose cumulative GPA is in a range.")
+    parser.add_argument('database', nargs='?', default='data.db')
+    parser.add_argument('--report', choices=sorted(REPORTS),
+                        help=f"deans-list (GPA >= {DEANS_LIST}) or probation (GPA < {PROBATION})")
+    parser.add_argument('--min', type=float, default=None, help="lowest GPA to include")
+    parser.add_argument('--max', type=float, default=None, help="include only GPAs below this")
+    parser.add_argument('-o', '--output', help="write .csv or .xlsx (default: CSV to stdout)")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.database):
+        parser.error(f"{args.database} not found")
+    lo, hi = REPORTS[args.report] if args.report else (args.min, args.max)
+
+    import main
+    started = time.perf_counter()
+    conn = sqlite3.connect(args.database)
+    try:
+        main.GPAApp.init_db(types.SimpleNamespace(conn=conn, cursor=conn.cursor()))
+        # Follows the database's shard layout, if it has one
+        store = main.course_store.open_store(conn, args.database, grade_points=main.grade_points)
+        rows = store.gpa_range(lo, hi)
+        if args.output:
+            count = write_report(rows, args.output)
+        else:
+            writer = csv.writer(sys.stdout)
+            writer.writerow(REPORT_COLUMNS)
+            count = 0
+            for _, name, idx, gpa, credits in rows:
+                writer.writerow([name, idx, gpa, credits])
+                count += 1
+        store.close()
+    finally:
+        conn.close()
+    print(f"{count:,} students in {time.perf_counter() - started:.3f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -4,6 +4,22 @@ import sqlite3
 import pandas as pd
 import sys
 import os
+import time
+import json
+import logging
+
+import archive
+import bulk_import
+import course_store
+import diagnostics
+import gpa_cache
+import gpa_index
+import rank_index
+import search_index
+import service
+import summary
+
+log = logging.getLogger('gpa.db')
 
 # GPA Mapping
 grade_points = {
@@ -11,6 +27,10 @@ grade_points = {
     "C+": 2.3, "C": 2.0, "C-": 1.7, "D+": 1.3, "D": 1.0, "D-": 0.7, "F": 0.0
 }
 
+# Term labels offered by the year/semester pickers; imports accept only these
+YEARS = [f'Year {i}' for i in range(1, 6)]
+SEMESTERS = ["Semester 1", "Semester 2", "Summer"]
+
 # Material Design icons via inline SVG paths for buttons
 # Using Unicode for simplicity (if Tkinter on Windows does not support icons, fallback to text)
 ICON_ADD = "\u2795"      # Heavy plus sign
@@ -20,6 +40,7 @@ ICON_SAVE = "\u2714"     # Heavy check mark
 ICON_EXPORT = "\U0001F4E4" # Outbox tray
 ICON_IMPORT = "\U0001F4E5" # Inbox tray
 ICON_CALC = "\u03C3"     # Sigma
+ICON_SEARCH = "\U0001F50D" # Magnifying glass
 
 def load_inter_font(root):
     # Attempt to load Inter font from system or fallback
@@ -93,8 +114,327 @@ class AddStudentDialog(tk.Toplevel):
         self.destroy()
 
 
+class SearchDialog(tk.Toplevel):
+    def __init__(self, parent, conn, fuzzy=None, archive_path=None, courses=None, app_font=''):
+        super().__init__(parent)
+        self.title("Search Students & Courses")
+        self.geometry("620x420")
+        self.grab_set()
+        self.configure(bg="#f0f4f8")
+        self.conn = conn
+        self.fuzzy = fuzzy
+        self.archive_path = archive_path
+        self.courses = courses
+        self.archived = {}
+        self.result = None
+        self.rows = {}
+
+        ttk.Label(self, text="Search name, index number or course:", background="#f0f4f8",
+                  font=(app_font, 11, "normal"), foreground="#333333").pack(pady=(16, 6), fill='x', padx=20)
+        self.query_entry = ttk.Entry(self, font=(app_font, 11))
+        self.query_entry.pack(fill="x", padx=20)
+        self.query_entry.bind('<KeyRelease>', self.on_search)
+        self.query_entry.bind('<Return>', self.on_select)
+
+        # Archived cohorts live in another file; only searched when asked for
+        self.include_archived = tk.BooleanVar(value=False)
+        if archive_path and os.path.exists(archive_path):
+            ttk.Checkbutton(self, text="Include archived students", variable=self.include_archived,
+                            command=self.on_search).pack(anchor="w", padx=20, pady=(6, 0))
+
+        columns = ("match", "index", "name", "detail")
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", height=10)
+        for col, text, width in zip(columns, ("Match", "Index Number", "Name", "Course"), (70, 120, 180, 220)):
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=width, anchor="w")
+        self.tree.pack(fill="both", expand=True, padx=20, pady=12)
+        self.tree.bind('<Double-1>', self.on_select)
+
+        btn_frame = ttk.Frame(self, style="Dialog.TFrame")
+        btn_frame.pack(pady=(0, 12))
+        ttk.Button(btn_frame, text="Cancel", command=self.destroy, style="Secondary.TButton", width=10).pack(side="right", padx=10)
+        ttk.Button(btn_frame, text="Open", command=self.on_select, style="Primary.TButton", width=10).pack(side="right", padx=10)
+
+        self.query_entry.focus_set()
+
+    def on_search(self, event=None):
+        self.tree.delete(*self.tree.get_children())
+        self.rows.clear()
+        for kind, _, name, idx, detail in search_index.global_search(self.conn, self.query_entry.get(), fuzzy=self.fuzzy,
+                                                                        courses=self.courses):
+            item = self.tree.insert("", "end", values=(kind.title(), idx, name, detail))
+            self.rows[item] = (name, idx)
+        self.archived.clear()
+        if self.include_archived.get():
+            for student_id, name, idx, archived_at in archive.search(self.archive_path, self.query_entry.get()):
+                item = self.tree.insert("", "end", values=("Archived", idx, name, f"archived {archived_at[:10]}"))
+                self.archived[item] = (student_id, name, idx)
+
+    def on_select(self, event=None):
+        selection = self.tree.selection() or self.tree.get_children()[:1]
+        if not selection:
+            return
+        if selection[0] in self.archived:
+            self.show_archived(*self.archived[selection[0]])
+            return
+        self.result = self.rows[selection[0]]
+        self.destroy()
+
+    def show_archived(self, student_id, name, idx):
+        # Read-only: archived students cannot be opened in the editor
+        rows = archive.courses(self.archive_path, student_id)
+        result = gpa_cache.GPAResult(gpa_cache.term_totals([(y, s, g, c) for y, s, _, g, c in rows], grade_points))
+        messagebox.showinfo("Archived Student", f"{name} ({idx})\n{len(rows)} course(s), "
+                            f"cumulative GPA {result.gpa:.2f} (Credits: {result.credits})", parent=self)
+
+
+class StudentPickerDialog(tk.Toplevel):
+    # Pick many students at once, e.g. a graduating class by index-number prefix
+    LIMIT = 5000
+
+    def __init__(self, parent, conn, has_fts=False, title="Delete Students", action="Delete Selected", app_font=''):
+        super().__init__(parent)
+        self.title(title)
+        self.geometry("560x460")
+        self.grab_set()
+        self.configure(bg="#f0f4f8")
+        self.conn = conn
+        self.has_fts = has_fts
+        self.result = None
+        self.rows = {}
+
+        ttk.Label(self, text="Index number prefix or name (Enter to find):", background="#f0f4f8",
+                  font=(app_font, 11, "normal"), foreground="#333333").pack(pady=(16, 6), fill='x', padx=20)
+        self.query_entry = ttk.Entry(self, font=(app_font, 11))
+        self.query_entry.pack(fill="x", padx=20)
+        self.query_entry.bind('<Return>', self.on_find)
+
+        columns = ("index", "name")
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", height=12, selectmode="extended")
+        for col, text, width in zip(columns, ("Index Number", "Name"), (160, 320)):
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=width, anchor="w")
+        self.tree.pack(fill="both", expand=True, padx=20, pady=(12, 4))
+        self.tree.bind('<<TreeviewSelect>>', self.on_selection)
+
+        self.count_label = ttk.Label(self, text="", background="#f0f4f8", font=(app_font, 10))
+        self.count_label.pack(fill='x', padx=20)
+
+        btn_frame = ttk.Frame(self, style="Dialog.TFrame")
+        btn_frame.pack(pady=12)
+        ttk.Button(btn_frame, text="Cancel", command=self.destroy, style="Secondary.TButton", width=10).pack(side="right", padx=10)
+        ttk.Button(btn_frame, text=action, command=self.on_confirm, style="Danger.TButton", width=16).pack(side="right", padx=10)
+        ttk.Button(btn_frame, text="Select All", command=self.on_select_all, style="Primary.TButton", width=10).pack(side="right", padx=10)
+
+        self.query_entry.focus_set()
+
+    def on_find(self, event=None):
+        text = self.query_entry.get()
+        found = {row[0]: row for row in search_index.students_by_index_prefix(self.conn, text, self.LIMIT)}
+        if self.has_fts and len(found) < self.LIMIT:
+            for row in search_index.search_students(self.conn, text, self.LIMIT - len(found)):
+                found.setdefault(row[0], row)
+        self.tree.delete(*self.tree.get_children())
+        self.rows.clear()
+        for student_id, name, idx in found.values():
+            item = self.tree.insert("", "end", values=(idx, name))
+            self.rows[item] = (student_id, name, idx)
+        self.on_selection()
+
+    def on_select_all(self):
+        self.tree.selection_set(self.tree.get_children())
+        self.on_selection()
+
+    def on_selection(self, event=None):
+        self.count_label.config(text=f"{len(self.tree.selection()):,} of {len(self.rows):,} selected")
+
+    def on_confirm(self):
+        selection = self.tree.selection()
+        if not selection:
+            messagebox.showwarning("Warning", "Select at least one student.", parent=self)
+            return
+        self.result = [self.rows[item] for item in selection]
+        self.destroy()
+
+
+class GPAReportDialog(tk.Toplevel):
+    # Students by cumulative GPA: dean's list, probation or a custom range
+    LIMIT = 5000  # rows listed; Export writes every match
+
+    def __init__(self, parent, courses, app_font=''):
+        super().__init__(parent)
+        self.title("GPA Report")
+        self.geometry("620x500")
+        self.grab_set()
+        self.configure(bg="#f0f4f8")
+        self.courses = courses
+
+        self.report = tk.StringVar(value='deans-list')
+        options = ttk.Frame(self, style="Dialog.TFrame")
+        options.pack(fill='x', padx=20, pady=(16, 6))
+        ttk.Radiobutton(options, text=f"Dean's list (GPA \u2265 {gpa_index.DEANS_LIST})", value='deans-list',
+                        variable=self.report, command=self.on_show).grid(row=0, column=0, sticky="w", padx=(0, 16))
+        ttk.Radiobutton(options, text=f"Probation (GPA < {gpa_index.PROBATION})", value='probation',
+                        variable=self.report, command=self.on_show).grid(row=0, column=1, sticky="w", padx=(0, 16))
+        ttk.Radiobutton(options, text="GPA from", value='custom',
+                        variable=self.report, command=self.on_show).grid(row=0, column=2, sticky="w")
+        self.min_entry = ttk.Entry(options, width=6, font=(app_font, 11))
+        self.min_entry.grid(row=0, column=3, padx=4)
+        ttk.Label(options, text="to below", background="#f0f4f8", font=(app_font, 10)).grid(row=0, column=4)
+        self.max_entry = ttk.Entry(options, width=6, font=(app_font, 11))
+        self.max_entry.grid(row=0, column=5, padx=4)
+        for entry in (self.min_entry, self.max_entry):
+            entry.bind('<Return>', self.on_custom)
+
+        columns = ("index", "name", "gpa", "credits")
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", height=14)
+        for col, text, width in zip(columns, ("Index Number", "Name", "GPA", "Credits"), (140, 260, 80, 80)):
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=width, anchor="e" if col in ("gpa", "credits") else "w")
+        self.tree.pack(fill="both", expand=True, padx=20, pady=(6, 4))
+
+        self.count_label = ttk.Label(self, text="", background="#f0f4f8", font=(app_font, 10))
+        self.count_label.pack(fill='x', padx=20)
+
+        btn_frame = ttk.Frame(self, style="Dialog.TFrame")
+        btn_frame.pack(pady=12)
+        ttk.Button(btn_frame, text="Close", command=self.destroy, style="Secondary.TButton", width=10).pack(side="right", padx=10)
+        ttk.Button(btn_frame, text="Export", command=self.on_export, style="Primary.TButton", width=10).pack(side="right", padx=10)
+
+        self.on_show()
+
+    def bounds(self):
+        # (min, max) of the chosen report, or None after telling the user what is wrong
+        report = self.report.get()
+        if report != 'custom':
+            return gpa_index.REPORTS[report]
+        try:
+            lo, hi = (float(e.get()) if e.get().strip() else None for e in (self.min_entry, self.max_entry))
+        except ValueError:
+            messagebox.showwarning("Input Error", "GPA bounds must be numbers, e.g. 3.0 and 3.5.", parent=self)
+            return None
+        return lo, hi
+
+    def on_custom(self, event=None):
+        self.report.set('custom')
+        self.on_show()
+
+    def on_show(self):
+        bounds = self.bounds()
+        if bounds is None:
+            return
+        started = time.perf_counter()
+        self.tree.delete(*self.tree.get_children())
+        count = 0
+        try:
+            for _, name, idx, gpa, credits in self.courses.gpa_range(*bounds):
+                if count < self.LIMIT:
+                    self.tree.insert("", "end", values=(idx, name, f"{gpa:.2f}", credits))
+                count += 1
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", "Database error: " + str(e), parent=self)
+            return
+        text = f"{count:,} student(s) in {(time.perf_counter() - started) * 1000:.0f} ms"
+        if count > self.LIMIT:
+            text += f"; first {self.LIMIT:,} listed, Export writes all"
+        self.count_label.config(text=text)
+
+    def on_export(self):
+        bounds = self.bounds()
+        if bounds is None:
+            return
+        file = filedialog.asksaveasfilename(defaultextension=".csv", parent=self,
+                                            filetypes=[("CSV Files", "*.csv"), ("Excel Files", "*.xlsx")])
+        if file:
+            try:
+                count = gpa_index.write_report(self.courses.gpa_range(*bounds), file)
+                messagebox.showinfo("Exported", f"{count:,} student(s) exported.", parent=self)
+            except Exception as e:
+                messagebox.showerror("Export Error", f"Failed to export the report. Error: {str(e)}", parent=self)
+
+
+class DiagnosticsDialog(tk.Toplevel):
+    def __init__(self, parent, stats, monitor=None, app_font=''):
+        super().__init__(parent)
+        self.title("SQL Diagnostics")
+        self.geometry("900x720" if monitor else "900x560")
+        self.configure(bg="#f0f4f8")
+        self.stats = stats
+        self.monitor = monitor
+
+        self.totals_label = ttk.Label(self, background="#f0f4f8", font=(app_font, 11, "bold"), foreground="#1e40af")
+        self.totals_label.pack(fill='x', padx=20, pady=(16, 6))
+
+        self.actions_tree = self._tree(("action", "calls", "statements", "sql_ms"),
+                                       ("UI Action", "Calls", "Statements", "SQL ms"), (260, 80, 100, 100), height=6)
+        self.queries_tree = self._tree(("query", "count", "total_ms", "p95_ms", "max_ms"),
+                                       ("Query", "Count", "Total ms", "p95 ms", "Max ms"), (480, 70, 90, 80, 80), height=10)
+        self.handlers_tree = None
+        if monitor:
+            self.handlers_tree = self._tree(("handler", "calls", "p50_ms", "p95_ms", "p99_ms"),
+                                            ("Handler", "Calls", "p50 ms", "p95 ms", "p99 ms"), (480, 70, 90, 80, 80), height=6)
+
+        btn_frame = ttk.Frame(self, style="Dialog.TFrame")
+        btn_frame.pack(pady=(0, 12))
+        ttk.Button(btn_frame, text="Close", command=self.destroy, style="Secondary.TButton", width=10).pack(side="right", padx=10)
+        ttk.Button(btn_frame, text="Reset", command=self.on_reset, style="Danger.TButton", width=10).pack(side="right", padx=10)
+        ttk.Button(btn_frame, text="Dump JSON", command=self.on_dump, style="Primary.TButton", width=12).pack(side="right", padx=10)
+        ttk.Button(btn_frame, text="Refresh", command=self.refresh, style="Primary.TButton", width=10).pack(side="right", padx=10)
+        self.refresh()
+
+    def _tree(self, columns, headings, widths, height):
+        tree = ttk.Treeview(self, columns=columns, show="headings", height=height)
+        for col, text, width in zip(columns, headings, widths):
+            tree.heading(col, text=text)
+            tree.column(col, width=width, anchor="w" if col in ("action", "query", "handler") else "e")
+        tree.pack(fill="both", expand=True, padx=20, pady=6)
+        return tree
+
+    def refresh(self):
+        data = self.stats.to_dict()
+        totals = data['totals']
+        self.totals_label.config(text=f"{totals['statements']} statements, {totals['distinct_queries']} distinct, "
+                                      f"{totals['sql_ms']:.1f} ms in SQL, {totals['slow_queries']} slow")
+        self.actions_tree.delete(*self.actions_tree.get_children())
+        for name, entry in sorted(data['actions'].items(), key=lambda kv: -kv[1]['statements']):
+            self.actions_tree.insert("", "end", values=(name, entry['calls'], entry['statements'], f"{entry['sql_ms']:.2f}"))
+        self.queries_tree.delete(*self.queries_tree.get_children())
+        for sql, q in data['queries'].items():
+            self.queries_tree.insert("", "end", values=(sql, q['count'], f"{q['total_ms']:.2f}", q['p95_ms'], f"{q['max_ms']:.2f}"))
+        if self.handlers_tree:
+            report = self.monitor.report()
+            lag = report['event_loop_lag_ms']
+            self.totals_label.config(text=self.totals_label.cget("text") +
+                                     f"  |  event loop lag p95 {lag['p95']} ms, max {lag['max']} ms, {len(report['worst_stalls'])} stalls")
+            self.handlers_tree.delete(*self.handlers_tree.get_children())
+            for name, h in report['handlers'].items():
+                self.handlers_tree.insert("", "end", values=(name, h['calls'], h['p50_ms'], h['p95_ms'], h['p99_ms']))
+
+    def on_reset(self):
+        self.stats.reset()
+        self.refresh()
+
+    def on_dump(self):
+        file = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON Files", "*.json")], parent=self)
+        if file:
+            try:
+                self.stats.dump(file)
+                messagebox.showinfo("Saved", "SQL statistics written.", parent=self)
+            except Exception as e:
+                messagebox.showerror("Export Error", f"Failed to write statistics. Error: {str(e)}", parent=self)
+
+
 class GPAApp:
-    def __init__(self, root):
+    # Button commands and bound event handlers
+    UI_ACTIONS = (
+        'add_student', 'update_student', 'delete_student', 'delete_students', 'archive_students', 'select_student',
+        'open_search',
+        'filter_students', 'load_courses', 'add_course_row', 'confirm_delete_row', 'clear_course_rows',
+        'save_courses', 'export_excel', 'import_excel', 'import_batch', 'validate_import', 'calculate_gpa',
+        'export_all_gpa_summary', 'gpa_report',
+    )
+
+    def __init__(self, root, storage=None, database=None, service_url=None):
         self.root = root
         self.root.title("GPA Calculator & Student Management")
         self.root.geometry("1140x760")
@@ -103,10 +443,32 @@ class GPAApp:
         self.app_font = load_inter_font(root)
 
         self.root.configure(bg="#f4f6fb")
-        self.database = 'data.db'
-        self.conn = sqlite3.connect(self.database)
+        service_url = service_url or os.environ.get('GPA_SERVICE_URL')
+        # GPA_STORAGE: sqlite (on disk), memory or columnar (in-memory snapshots of GPA_DATABASE)
+        self.storage, self.database = course_store.storage_config(storage, database)
+        # Client mode (GPA_SERVICE_URL): the service owns the database; only a roster copy is kept here
+        self.service = service.ServiceClient(service_url) if service_url else None
+        if self.service:
+            self.storage, self.database = 'memory', ':memory:'
+        self.archive_path = os.path.abspath(os.environ.get('GPA_ARCHIVE_DB', 'archive.db'))
+        self.conn = course_store.connect(self.storage, self.database, factory=diagnostics.InstrumentedConnection)
         self.cursor = self.conn.cursor()
+        self.sql_stats = self.conn.stats
         self.init_db()
+        # Course reads and writes go through the store: data.db itself, shard files (GPA_SHARDS), arrays or the service
+        if self.service:
+            self.courses = service.RemoteCourseStore(self.service)
+            self.root.title(f"GPA Calculator & Student Management ({service_url})")
+        else:
+            self.courses = course_store.open_store(self.conn, self.database, self.storage, grade_points)
+            if self.storage != 'sqlite':
+                self.root.title(f"GPA Calculator & Student Management ({self.storage}, changes are not saved)")
+
+        self.fuzzy_index = None  # TrigramIndex, built on first fuzzy search
+        self.rank_index = None  # RankIndex, built on first Calculate GPA
+        self.course_cache = gpa_cache.CourseCache(maxsize=64)
+        self.gpa_cache = gpa_cache.GPACache()
+        self.live_gpa = gpa_cache.LiveGPA()
 
         self.current_student = None  # (name, index_number)
         self.current_year = 'Year 1'
@@ -114,11 +476,24 @@ class GPAApp:
 
         self.entries = []
 
+        # Count SQL per UI action and optionally profile it: wrap handlers before build_ui binds them
+        self.profiler = diagnostics.ActionProfiler.from_env()
+        for action in self.UI_ACTIONS:
+            setattr(self, action, self.profiler.wrap(action, self.sql_stats.track(action, getattr(self, action))))
+
+        # Opt-in (GPA_EVENT_MONITOR=1); must wrap Tk callbacks before any widget exists
+        self.event_monitor = diagnostics.EventLoopMonitor.from_env(self.root, tk)
+
         self.style = ttk.Style(self.root)
         self.configure_style()
         self.build_ui()
+        self.root.bind('<F12>', lambda e: self.open_diagnostics())
+        # Armed only now so the startup load_students/load_courses are not profiled
+        self.profiler.arm(self.profiler.startup_actions)
 
     def init_db(self):
+        # Enforce foreign keys (per connection): deleting a student cascades to its courses
+        self.cursor.execute("PRAGMA foreign_keys=ON")
         # Create tables if not exist
         self.cursor.execute("""
             CREATE TABLE IF NOT EXISTS students (
@@ -134,10 +509,100 @@ class GPAApp:
                 student_id INTEGER,
                 year TEXT, semester TEXT,
                 course_name TEXT, grade TEXT, credits REAL,
-                FOREIGN KEY(student_id) REFERENCES students(id)
+                FOREIGN KEY(student_id) REFERENCES students(id) ON DELETE CASCADE
+            )
+        """)
+        # Called on the class: the CLIs and datagen run init_db on a bare (conn, cursor) namespace
+        GPAApp.migrate_course_cascade(self)
+        # Covering index: per-student lookups and the summary GROUP BY never touch the table
+        self.cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_courses_student_term
+            ON courses(student_id, year, semester, grade, credits)
+        """)
+        # Natural key: one row per course per term. Databases from before the key
+        # may hold repeated imports; keep the newest copy of each course.
+        self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name='idx_courses_natural_key'")
+        if not self.cursor.fetchone():
+            GPAApp.remove_duplicate_courses(self)
+        self.cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_courses_natural_key
+            ON courses(student_id, year, semester, course_name)
+        """)
+        self.conn.commit()
+        self.has_fts = search_index.init_fts(self.conn)
+        # Per-student GPA kept current by triggers on courses (dean's list / probation reports)
+        gpa_index.init(self.conn, grade_points)
+        bulk_import.init_ledger(self.conn)
+
+    def remove_duplicate_courses(self):
+        # Older copies move to removed_duplicate_courses rather than being lost.
+        # `=` never matches NULL, just as the unique index never treats two
+        # NULLs as equal, so rows with a NULL in the key all stay.
+        older = """
+            SELECT id FROM courses c WHERE EXISTS (
+                SELECT 1 FROM courses n
+                WHERE n.student_id = c.student_id AND n.year = c.year AND n.semester = c.semester
+                  AND n.course_name = c.course_name AND n.id > c.id
+            )
+        """
+        removed = self.cursor.execute(f"SELECT COUNT(*) FROM ({older})").fetchone()[0]
+        if not removed:
+            return
+        self.cursor.execute("""
+            CREATE TABLE IF NOT EXISTS removed_duplicate_courses (
+                id INTEGER PRIMARY KEY,
+                student_id INTEGER,
+                year TEXT, semester TEXT,
+                course_name TEXT, grade TEXT, credits REAL,
+                removed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
             )
         """)
+        self.cursor.execute(f"""
+            INSERT INTO removed_duplicate_courses (id, student_id, year, semester, course_name, grade, credits)
+            SELECT id, student_id, year, semester, course_name, grade, credits FROM courses WHERE id IN ({older})
+        """)
+        self.cursor.execute("DELETE FROM courses WHERE id IN (SELECT id FROM removed_duplicate_courses)")
+        self.conn.commit()
+        log.warning("Removed %d duplicate course row(s) before adding the natural key; "
+                    "the older copies are kept in removed_duplicate_courses", removed)
+
+    def migrate_course_cascade(self):
+        # Databases created before ON DELETE CASCADE: SQLite cannot alter a
+        # foreign key, so copy courses into a table that has it. Orphaned
+        # courses (student already gone) are dropped on the way.
+        fks = self.cursor.execute("PRAGMA foreign_key_list(courses)").fetchall()
+        if not fks or fks[0][6] == 'CASCADE':
+            return
         self.conn.commit()
+        self.cursor.execute("PRAGMA foreign_keys=OFF")
+        try:
+            self.cursor.execute("BEGIN")
+            self.cursor.execute("""
+                CREATE TABLE courses_new (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    student_id INTEGER,
+                    year TEXT, semester TEXT,
+                    course_name TEXT, grade TEXT, credits REAL,
+                    FOREIGN KEY(student_id) REFERENCES students(id) ON DELETE CASCADE
+                )
+            """)
+            self.cursor.execute("""
+                INSERT INTO courses_new (id, student_id, year, semester, course_name, grade, credits)
+                SELECT id, student_id, year, semester, course_name, grade, credits FROM courses
+                WHERE student_id IN (SELECT id FROM students)
+            """)
+            self.cursor.execute("DROP TABLE courses")
+            self.cursor.execute("ALTER TABLE courses_new RENAME TO courses")
+            # Course ids are kept, but dropped orphans must leave the search index too
+            self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name='courses_fts'")
+            if self.cursor.fetchone():
+                self.cursor.execute("INSERT INTO courses_fts(courses_fts) VALUES ('rebuild')")
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+        finally:
+            self.cursor.execute("PRAGMA foreign_keys=ON")
 
     def configure_style(self):
         # Use clam theme and configure colors for modern style
@@ -268,6 +733,12 @@ class GPAApp:
         header_label = ttk.Label(header_bar, text="GPA Calculator & Student Management", style="Title.TLabel")
         header_label.pack(side="left", padx=20)
 
+        # Hidden developer menu: right-click the title
+        dev_menu = tk.Menu(self.root, tearoff=0)
+        dev_menu.add_command(label="Profile next 5 actions", command=lambda: self.arm_profiler(5))
+        dev_menu.add_command(label="SQL diagnostics (F12)", command=self.open_diagnostics)
+        header_label.bind("<Button-3>", lambda e: dev_menu.tk_popup(e.x_root, e.y_root))
+
         # Main container frame with padding and margin
         container = ttk.Frame(self.root, padding=20, style="TFrame")
         container.pack(fill="both", expand=True)
@@ -275,7 +746,7 @@ class GPAApp:
         # Student management frame with white card background and rounded corners
         student_frame = ttk.Frame(container, style="Card.TFrame", padding=16)
         student_frame.grid(row=0, column=0, sticky="ew", pady=(0, 16))
-        for col in range(7):
+        for col in range(9):
             weight = 1 if col == 1 else 0  # Combo box column gets weight, buttons 0 are fine
             student_frame.columnconfigure(col, weight=weight)
 
@@ -297,8 +768,17 @@ class GPAApp:
         btn_delete = ttk.Button(student_frame, text=f"{ICON_DELETE} Delete Student", command=self.delete_student, style="Danger.TButton")
         btn_delete.grid(row=0, column=4, padx=4, pady=6)
 
+        btn_bulk_delete = ttk.Button(student_frame, text="Bulk Delete", command=self.delete_students, style="Danger.TButton")
+        btn_bulk_delete.grid(row=0, column=5, padx=4, pady=6)
+
+        btn_archive = ttk.Button(student_frame, text="Archive", command=self.archive_students, style="Secondary.TButton")
+        btn_archive.grid(row=0, column=6, padx=4, pady=6)
+
         btn_select = ttk.Button(student_frame, text="Select", command=self.select_student, style="Primary.TButton")
-        btn_select.grid(row=0, column=5, padx=4, pady=6)
+        btn_select.grid(row=0, column=7, padx=4, pady=6)
+
+        btn_search = ttk.Button(student_frame, text=f"{ICON_SEARCH} Search", command=self.open_search, style="Secondary.TButton")
+        btn_search.grid(row=0, column=8, padx=4, pady=6)
 
         # Year & semester selection frame
         sem_frame = ttk.Frame(container, style="Card.TFrame", padding=16)
@@ -310,7 +790,7 @@ class GPAApp:
         lbl_year.grid(row=0, column=0, sticky="w", pady=4, padx=(0, 8))
         self.year_var = tk.StringVar(value=self.current_year)
         year_combo = ttk.Combobox(sem_frame, textvariable=self.year_var,
-                                  values=[f'Year {i}' for i in range(1, 6)],
+                                  values=YEARS,
                                   width=12, state="readonly", style="TCombobox")
         year_combo.grid(row=0, column=1, sticky="w", pady=4, padx=(0, 16))
 
@@ -318,7 +798,7 @@ class GPAApp:
         lbl_sem.grid(row=0, column=2, sticky="w", pady=4, padx=(0, 8))
         self.semester_var = tk.StringVar(value=self.current_semester)
         semester_combo = ttk.Combobox(sem_frame, textvariable=self.semester_var,
-                                      values=["Semester 1", "Semester 2", "Summer"],
+                                      values=SEMESTERS,
                                       width=12, state="readonly", style="TCombobox")
         semester_combo.grid(row=0, column=3, sticky="w", pady=4, padx=(0, 16))
 
@@ -364,15 +844,18 @@ class GPAApp:
         # Bottom buttons frame with nice spacing
         bottom_frame = ttk.Frame(container, style="TFrame")
         bottom_frame.grid(row=3, column=0, sticky="ew")
-        bottom_frame.columnconfigure(tuple(range(7)), weight=1)
+        bottom_frame.columnconfigure(tuple(range(10)), weight=1)
 
         ttk.Button(bottom_frame, text=f"{ICON_ADD} Add Course", command=self.add_course_row, style="Primary.TButton").grid(row=0, column=0, padx=4, pady=12, sticky="ew")
         ttk.Button(bottom_frame, text=f"{ICON_SAVE} Save Courses", command=self.save_courses, style="Primary.TButton").grid(row=0, column=1, padx=4, pady=12, sticky="ew")
         ttk.Button(bottom_frame, text="Clear Courses", command=self.clear_course_rows, style="Secondary.TButton").grid(row=0, column=2, padx=4, pady=12, sticky="ew")
         ttk.Button(bottom_frame, text=f"{ICON_EXPORT} Export Excel", command=self.export_excel, style="Primary.TButton").grid(row=0, column=3, padx=4, pady=12, sticky="ew")
         ttk.Button(bottom_frame, text=f"{ICON_IMPORT} Import Excel", command=self.import_excel, style="Primary.TButton").grid(row=0, column=4, padx=4, pady=12, sticky="ew")
-        ttk.Button(bottom_frame, text=f"{ICON_CALC} Calculate GPA", command=self.calculate_gpa, style="Primary.TButton").grid(row=0, column=5, padx=4, pady=12, sticky="ew")
-        ttk.Button(bottom_frame, text="Export All GPA Summary", command=self.export_all_gpa_summary, style="Secondary.TButton").grid(row=0, column=6, padx=4, pady=12, sticky="ew")
+        ttk.Button(bottom_frame, text=f"{ICON_IMPORT} Batch Import", command=self.import_batch, style="Primary.TButton").grid(row=0, column=5, padx=4, pady=12, sticky="ew")
+        ttk.Button(bottom_frame, text="Validate File", command=self.validate_import, style="Secondary.TButton").grid(row=0, column=6, padx=4, pady=12, sticky="ew")
+        ttk.Button(bottom_frame, text=f"{ICON_CALC} Calculate GPA", command=self.calculate_gpa, style="Primary.TButton").grid(row=0, column=7, padx=4, pady=12, sticky="ew")
+        ttk.Button(bottom_frame, text="Export All GPA Summary", command=self.export_all_gpa_summary, style="Secondary.TButton").grid(row=0, column=8, padx=4, pady=12, sticky="ew")
+        ttk.Button(bottom_frame, text="GPA Report", command=self.gpa_report, style="Secondary.TButton").grid(row=0, column=9, padx=4, pady=12, sticky="ew")
 
         # GPA labels frame below buttons with good spacing and font
         gpa_frame = ttk.Frame(container, style="TFrame")
@@ -394,8 +877,14 @@ class GPAApp:
         if dialog.result:
             name, index_number = dialog.result
             try:
-                self.cursor.execute("INSERT INTO students (name, index_number) VALUES (?, ?)", (name, index_number))
-                self.conn.commit()
+                if self.service:
+                    student_id = self.service.add_student(name, index_number)
+                else:
+                    self.cursor.execute("INSERT INTO students (name, index_number) VALUES (?, ?)", (name, index_number))
+                    self.conn.commit()
+                    student_id = self.cursor.lastrowid
+                if self.fuzzy_index is not None:
+                    self.fuzzy_index.add(student_id, name, index_number)
                 self.load_students()
                 messagebox.showinfo("Success", f"Student '{name}' (Index: {index_number}) added.", parent=self.root)
             except sqlite3.IntegrityError as e:
@@ -403,6 +892,8 @@ class GPAApp:
                     messagebox.showwarning("Exists", "Student name or index number already exists! Use unique index numbers.", parent=self.root)
                 else:
                     messagebox.showerror("Error", "Database error: " + str(e), parent=self.root)
+            except sqlite3.Error as e:
+                messagebox.showerror("Error", "Database error: " + str(e), parent=self.root)
 
     def update_student(self):
         selected = self.student_combo.get()
@@ -420,9 +911,23 @@ class GPAApp:
             new_name, new_index_number = dialog.result
             if (new_name, new_index_number) != (name, index_number):
                 try:
-                    self.cursor.execute("UPDATE students SET name=?, index_number=? WHERE name=? AND index_number=?",
-                                        (new_name, new_index_number, name, index_number))
-                    self.conn.commit()
+                    if self.service:
+                        self.cursor.execute("SELECT id FROM students WHERE name=? AND index_number=?", (name, index_number))
+                        res = self.cursor.fetchone()
+                        if res:
+                            self.service.update_student(res[0], new_name, new_index_number)
+                    else:
+                        self.cursor.execute("UPDATE students SET name=?, index_number=? WHERE name=? AND index_number=?",
+                                            (new_name, new_index_number, name, index_number))
+                        self.conn.commit()
+                        self.cursor.execute("SELECT id FROM students WHERE name=? AND index_number=?", (new_name, new_index_number))
+                        res = self.cursor.fetchone()
+                    if res:
+                        self.gpa_cache.bump(res[0])
+                        if self.rank_index is not None:
+                            self.rank_index.touch(res[0])
+                        if self.fuzzy_index is not None:
+                            self.fuzzy_index.update(res[0], new_name, new_index_number)
                     self.load_students()
                     self.gpa_label.config(text="")
                     self.sem_gpa_label.config(text="")
@@ -432,15 +937,49 @@ class GPAApp:
                         messagebox.showwarning("Exists", "New student name or index number conflicts with existing record.", parent=self.root)
                     else:
                         messagebox.showerror("Error", "Database error: " + str(e), parent=self.root)
+                except sqlite3.Error as e:
+                    messagebox.showerror("Error", "Database error: " + str(e), parent=self.root)
 
     def filter_students(self, event):
         pattern = self.student_combo.get().lower()
+        if self.has_fts and pattern.strip():
+            # Ranked prefix match from the FTS index instead of scanning every student
+            students = search_index.search_students(self.conn, pattern, limit=200)
+            if not students:
+                # Nothing starts with what was typed; assume a typo and suggest close matches
+                students = [row[:3] for row in self.get_fuzzy_index().search(pattern, k=20)]
+            self.student_combo['values'] = [f"{idx} - {name}" for _, name, idx in students]
+            return
         self.cursor.execute("SELECT name, index_number FROM students ORDER BY name")
         students = self.cursor.fetchall()
         filtered = [f"{idx} - {name}" for name, idx in students if pattern in name.lower() or pattern in idx.lower()]
+        if not filtered and pattern.strip():
+            filtered = [f"{idx} - {name}" for _, name, idx, _ in self.get_fuzzy_index().search(pattern, k=20)]
         self.student_combo['values'] = filtered
 
+    def cache_stats(self):
+        return {'courses': self.course_cache.stats(), 'gpa': self.gpa_cache.stats()}
+
+    def get_fuzzy_index(self):
+        if self.fuzzy_index is None:
+            self.fuzzy_index = search_index.TrigramIndex.from_db(self.conn)
+        return self.fuzzy_index
+
+    def sync_roster(self):
+        # Client mode: refresh the local roster copy (ids included) from the service
+        try:
+            students = self.service.students()
+        except sqlite3.Error as e:
+            messagebox.showerror("Service Error", str(e), parent=self.root)
+            return
+        with self.conn:
+            self.conn.execute("DELETE FROM students")
+            self.conn.executemany("INSERT INTO students (id, name, index_number) VALUES (?, ?, ?)", students)
+        self.fuzzy_index = None
+
     def load_students(self):
+        if self.service:
+            self.sync_roster()
         self.cursor.execute("SELECT name, index_number FROM students ORDER BY name")
         students = self.cursor.fetchall()
         display_values = [f"{idx} - {name}" for name, idx in students]
@@ -486,9 +1025,24 @@ class GPAApp:
                 messagebox.showerror("Error", "Student not found in the database.", parent=self.root)
                 return
             student_id = res[0]
-            self.cursor.execute("DELETE FROM courses WHERE student_id=?", (student_id,))
-            self.cursor.execute("DELETE FROM students WHERE id=?", (student_id,))
-            self.conn.commit()
+            # Courses go with it through ON DELETE CASCADE; with shards the
+            # delete queues it and the store then removes its shard rows
+            try:
+                if self.service:
+                    self.service.delete_students([student_id])
+                else:
+                    self.cursor.execute("DELETE FROM students WHERE id=?", (student_id,))
+                    self.conn.commit()
+                    self.courses.delete_students([student_id])
+            except sqlite3.Error as e:
+                messagebox.showerror("Error", "Database error: " + str(e), parent=self.root)
+                return
+            self.course_cache.invalidate(student_id)
+            self.gpa_cache.bump(student_id)
+            if self.rank_index is not None:
+                self.rank_index.touch(student_id)
+            if self.fuzzy_index is not None:
+                self.fuzzy_index.remove(student_id)
             self.load_students()
             self.clear_entries()
             self.current_student = None
@@ -496,6 +1050,74 @@ class GPAApp:
             self.sem_gpa_label.config(text="")
             messagebox.showinfo("Deleted", f"Student '{name}' (Index: {index_number}) and all data deleted.", parent=self.root)
 
+    def delete_students(self):
+        dialog = StudentPickerDialog(self.root, self.conn, has_fts=self.has_fts, app_font=self.app_font)
+        self.root.wait_window(dialog)
+        if not dialog.result:
+            return
+        students = dialog.result
+        if not messagebox.askyesno("Confirm", f"Delete {len(students):,} student(s) and all their courses?", parent=self.root):
+            return
+        ids = [student_id for student_id, _, _ in students]
+        try:
+            # One statement, one transaction; courses follow through the cascade
+            # (or, with shards, from the queue the delete fills)
+            if self.service:
+                self.service.delete_students(ids)
+            else:
+                with self.conn:
+                    self.conn.execute("DELETE FROM students WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(ids),))
+                self.courses.delete_students(ids)
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", "Database error: " + str(e), parent=self.root)
+            return
+        self.forget_students(students)
+        messagebox.showinfo("Deleted", f"{len(ids):,} student(s) and all their data deleted.", parent=self.root)
+
+    def forget_students(self, students):
+        # Students just removed from data.db: drop them from caches and the UI
+        for student_id, _, _ in students:
+            self.course_cache.invalidate(student_id)
+            self.gpa_cache.bump(student_id)
+            if self.rank_index is not None:
+                self.rank_index.touch(student_id)
+            if self.fuzzy_index is not None:
+                self.fuzzy_index.remove(student_id)
+        if self.current_student in {(name, idx) for _, name, idx in students}:
+            self.clear_entries()
+            self.current_student = None
+            self.gpa_label.config(text="")
+            self.sem_gpa_label.config(text="")
+        self.load_students()
+
+    def archive_students(self):
+        if self.service:
+            messagebox.showwarning("Unavailable", "Archiving runs where the database is, not in client mode.", parent=self.root)
+            return
+        if self.storage != 'sqlite':
+            messagebox.showwarning("Unavailable", "Archiving writes archive.db; it is off in in-memory sessions.", parent=self.root)
+            return
+        dialog = StudentPickerDialog(self.root, self.conn, has_fts=self.has_fts, title="Archive Students",
+                                     action="Archive Selected", app_font=self.app_font)
+        self.root.wait_window(dialog)
+        if not dialog.result:
+            return
+        students = dialog.result
+        if not messagebox.askyesno("Confirm", f"Move {len(students):,} student(s) and their courses to "
+                                   f"'{self.archive_path}'? They will only show up in searches that include archived records.",
+                                   parent=self.root):
+            return
+        try:
+            moved, courses = archive.archive_students(self.conn, self.archive_path, [s[0] for s in students],
+                                                     store=self.courses)
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", "Archiving failed, nothing was moved: " + str(e), parent=self.root)
+            return
+        self.forget_students(students)
+        if messagebox.askyesno("Archived", f"{moved:,} student(s) and {courses:,} course(s) archived.\n"
+                               "Reclaim the freed disk space now? (VACUUM, may take a while)", parent=self.root):
+            archive.vacuum(self.conn)
+
     def select_student(self):
         selected = self.student_combo.get()
         if not selected:
@@ -508,6 +1130,27 @@ class GPAApp:
         self.current_student = student  # (name, index)
         self.load_courses()
 
+    def open_search(self):
+        if not self.has_fts:
+            messagebox.showwarning("Unavailable", "Full-text search requires SQLite with FTS5 support.", parent=self.root)
+            return
+        dialog = SearchDialog(self.root, self.conn, fuzzy=self.get_fuzzy_index(), archive_path=self.archive_path,
+                              courses=self.courses, app_font=self.app_font)
+        self.root.wait_window(dialog)
+        if dialog.result:
+            name, index_number = dialog.result
+            self.student_combo.set(f"{index_number} - {name}")
+            self.current_student = (name, index_number)
+            self.load_courses()
+
+    def arm_profiler(self, actions):
+        self.profiler.arm(actions)
+        messagebox.showinfo("Profiling", f"The next {actions} actions will be profiled ({self.profiler.mode}) "
+                            f"into '{os.path.abspath(self.profiler.directory)}'.", parent=self.root)
+
+    def open_diagnostics(self):
+        DiagnosticsDialog(self.root, self.sql_stats, monitor=self.event_monitor, app_font=self.app_font)
+
     def load_courses(self):
         if not self.current_student:
             messagebox.showwarning("Warning", "Please select a student first.", parent=self.root)
@@ -524,11 +1167,15 @@ class GPAApp:
             messagebox.showerror("Error", "Selected student does not exist in database.", parent=self.root)
             return
         student_id = student_id_res[0]
-        self.cursor.execute("""
-            SELECT course_name, grade, credits FROM courses 
-            WHERE student_id=? AND year=? AND semester=?
-        """, (student_id, self.year_var.get(), self.semester_var.get()))
-        rows = self.cursor.fetchall()
+        year, semester = self.year_var.get(), self.semester_var.get()
+        rows = self.course_cache.get(student_id, year, semester)
+        if rows is None:
+            rows = self.courses.term_courses(student_id, year, semester)
+            self.course_cache.put(student_id, year, semester, rows)
+        # Saved totals of every other term; the editor rows supply this term live
+        result = self.get_student_gpa(student_id)
+        term_points, term_credits = result.terms.get((year, semester), (0, 0))
+        self.live_gpa.seed(result.points - term_points, result.credits - term_credits)
         if rows:
             for row in rows:
                 self.add_course_row(*row)
@@ -559,11 +1206,30 @@ class GPAApp:
         del_button = ttk.Button(self.course_inner, text="Delete", command=lambda: self.confirm_delete_row(row - 1), width=8, style="Danger.TButton")
         del_button.grid(row=row, column=3, padx=8, pady=4)
 
+        entry = (name_entry, grade_var, credits_entry, del_button)
+
         # Bind validation on credits_entry for float and grade combo selection event
-        credits_entry.bind("<FocusOut>", lambda e, ent=credits_entry, cname=name_entry: self.validate_credits(ent, cname))
-        grade_combo.bind("<<ComboboxSelected>>", lambda e, var=grade_var, cname=name_entry: self.validate_grade(var, cname))
+        credits_entry.bind("<FocusOut>", lambda e, ent=credits_entry, cname=name_entry: (self.validate_credits(ent, cname), self.on_course_edited(entry)))
+        grade_combo.bind("<<ComboboxSelected>>", lambda e, var=grade_var, cname=name_entry: (self.validate_grade(var, cname), self.on_course_edited(entry)))
+        name_entry.bind("<FocusOut>", lambda e: self.on_course_edited(entry))
 
-        self.entries.append((name_entry, grade_var, credits_entry, del_button))
+        self.entries.append(entry)
+        self.update_live_row(entry)
+
+    def update_live_row(self, entry):
+        name_entry, grade_var, credits_entry, _ = entry
+        self.live_gpa.set_row(credits_entry, name_entry.get(), grade_var.get().strip(), credits_entry.get().strip(), grade_points)
+
+    def on_course_edited(self, entry):
+        self.update_live_row(entry)
+        self.show_live_gpa()
+
+    def show_live_gpa(self):
+        # Preview of what Calculate GPA will show once the editor rows are saved
+        if not self.current_student:
+            return
+        self.gpa_label.config(text=f"Cumulative GPA: {self.live_gpa.gpa:.2f} (Credits: {self.live_gpa.credits})")
+        self.sem_gpa_label.config(text=f"{self.year_var.get()} {self.semester_var.get()} GPA: {self.live_gpa.term_gpa:.2f} (Credits: {self.live_gpa.term_credits})")
 
     def confirm_delete_row(self, idx):
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this course?"):
@@ -598,12 +1264,14 @@ class GPAApp:
             widget.destroy()
         self.entries.pop(idx)
         self.reorder_entries()
+        self.show_live_gpa()
 
     def reorder_entries(self):
         data = [(e[0].get(), e[1].get(), e[2].get()) for e in self.entries]
         for widget in self.course_inner.winfo_children():
             widget.destroy()
         self.entries.clear()
+        self.live_gpa.clear_rows()
 
         header_bg = "#cde0ff"
         header_text = "#10357a"
@@ -622,6 +1290,7 @@ class GPAApp:
         for widget in self.course_inner.winfo_children():
             widget.destroy()
         self.entries.clear()
+        self.live_gpa.clear_rows()
         header_bg = "#cde0ff"
         header_text = "#10357a"
         header = ['Course Name', 'Grade', 'Credits', 'Action']
@@ -637,6 +1306,7 @@ class GPAApp:
         if messagebox.askyesno("Clear Courses", "Are you sure you want to clear all course entries for this year and semester?"):
             self.clear_entries()
             self.add_course_row()
+            self.show_live_gpa()
 
     def save_courses(self):
         if not self.current_student:
@@ -649,8 +1319,7 @@ class GPAApp:
             messagebox.showerror("Error", "Selected student does not exist in database.", parent=self.root)
             return
         student_id = student_id_res[0]
-        self.cursor.execute("DELETE FROM courses WHERE student_id=? AND year=? AND semester=?",
-                            (student_id, self.year_var.get(), self.semester_var.get()))
+        rows = []
         for name_entry, grade_var, credits_entry, _ in self.entries:
             cname, grade, credits = name_entry.get().strip(), grade_var.get().strip(), credits_entry.get().strip()
             if cname and credits:
@@ -659,13 +1328,21 @@ class GPAApp:
                 if not self.validate_grade(grade_var, name_entry):
                     return
                 try:
-                    credits_val = float(credits)
-                    self.cursor.execute("INSERT INTO courses (student_id, year, semester, course_name, grade, credits) VALUES (?,?,?,?,?,?)",
-                                        (student_id, self.year_var.get(), self.semester_var.get(), cname, grade, credits_val))
+                    rows.append((cname, grade, float(credits)))
                 except ValueError:
                     messagebox.showwarning("Invalid Input", f"Invalid credits value for course '{cname}'. Please enter a valid number.", parent=self.root)
                     return
-        self.conn.commit()
+        # The term is replaced in one transaction; a course listed twice keeps its last grade
+        try:
+            self.courses.replace_term(student_id, self.year_var.get(), self.semester_var.get(), rows)
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", "Database error: " + str(e), parent=self.root)
+            return
+        finally:
+            self.course_cache.invalidate(student_id, self.year_var.get(), self.semester_var.get())
+            self.gpa_cache.bump(student_id)
+            if self.rank_index is not None:
+                self.rank_index.touch(student_id)
         messagebox.showinfo("Saved", "Courses saved successfully.", parent=self.root)
 
     def calculate_gpa(self):
@@ -680,26 +1357,38 @@ class GPAApp:
             return
         student_id = student_id_res[0]
 
-        self.cursor.execute("SELECT grade, credits FROM courses WHERE student_id=?", (student_id,))
-        data = self.cursor.fetchall()
-        total_points, total_credits = 0, 0
-        for grade, credits in data:
-            total_points += grade_points.get(grade, 0) * credits
-            total_credits += credits
-        cum_gpa = total_points / total_credits if total_credits else 0
-        self.gpa_label.config(text=f"Cumulative GPA: {cum_gpa:.2f} (Credits: {total_credits})")
+        result = self.get_student_gpa(student_id)
+        text = f"Cumulative GPA: {result.gpa:.2f} (Credits: {result.credits})"
+        rank = self.student_rank(student_id)
+        if rank:
+            cohort, position, size, percentile = rank
+            text += f"  ·  Rank {position:,}/{size:,} in {cohort or 'cohort'}, percentile {percentile:.0f}"
+        self.gpa_label.config(text=text)
 
-        self.cursor.execute("""
-            SELECT grade, credits FROM courses WHERE student_id=? AND year=? AND semester=?
-        """, (student_id, self.year_var.get(), self.semester_var.get()))
-        sem_data = self.cursor.fetchall()
-        sem_points, sem_credits = 0, 0
-        for grade, credits in sem_data:
-            sem_points += grade_points.get(grade, 0) * credits
-            sem_credits += credits
-        sem_gpa = sem_points / sem_credits if sem_credits else 0
+        sem_gpa, sem_credits = result.term(self.year_var.get(), self.semester_var.get())
         self.sem_gpa_label.config(text=f"{self.year_var.get()} {self.semester_var.get()} GPA: {sem_gpa:.2f} (Credits: {sem_credits})")
 
+    def get_student_gpa(self, student_id):
+        # One pass over the student's courses gives both cumulative and per-term totals
+        result = self.gpa_cache.get(student_id)
+        if result is None:
+            version = self.gpa_cache.version(student_id)
+            terms = gpa_cache.term_totals(self.courses.grade_rows(student_id), grade_points)
+            result = self.gpa_cache.put(student_id, gpa_cache.GPAResult(terms), version)
+        return result
+
+    def student_rank(self, student_id):
+        # (cohort, rank, size, percentile) or None; needs every student's totals,
+        # which client mode doesn't hold
+        if self.service:
+            return None
+        try:
+            if self.rank_index is None:
+                self.rank_index = rank_index.RankIndex.build(self.conn, self.courses, grade_points)
+            return self.rank_index.rank(student_id)
+        except sqlite3.Error:
+            return None
+
     def export_excel(self):
         if not self.current_student:
             messagebox.showwarning("Warning", "Select a student first.", parent=self.root)
@@ -711,7 +1400,7 @@ class GPAApp:
             messagebox.showerror("Error", "Selected student does not exist in database.", parent=self.root)
             return
         student_id = student_id_res[0]
-        df = pd.read_sql_query("SELECT year, semester, course_name, grade, credits FROM courses WHERE student_id=?", self.conn, params=(student_id,))
+        df = pd.DataFrame(self.courses.course_rows(student_id), columns=['year', 'semester', 'course_name', 'grade', 'credits'])
         file = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel Files", "*.xlsx")])
         if file:
             try:
@@ -721,33 +1410,12 @@ class GPAApp:
                 messagebox.showerror("Export Error", f"Failed to export data. Error: {str(e)}", parent=self.root)
 
     def export_all_gpa_summary(self):
-        self.cursor.execute("SELECT id, name, index_number FROM students ORDER BY name")
-        students = self.cursor.fetchall()
-        records = []
-        for student_id, name, idx in students:
-            self.cursor.execute("SELECT DISTINCT year, semester FROM courses WHERE student_id=?", (student_id,))
-            ys = self.cursor.fetchall()
-            for year, semester in ys:
-                self.cursor.execute("SELECT grade, credits FROM courses WHERE student_id=? AND year=? AND semester=?", (student_id, year, semester))
-                data = self.cursor.fetchall()
-                points = 0
-                credits = 0
-                for grade, cred in data:
-                    points += grade_points.get(grade,0) * cred
-                    credits += cred
-                gpa = points / credits if credits else 0
-                records.append({
-                    'Name': name,
-                    'Index Number': idx,
-                    'Year': year,
-                    'Semester': semester,
-                    'GPA': round(gpa, 3),
-                    'Credits': credits
-                })
+        # One GROUP BY per id range (or per shard), run in worker processes for large tables
+        records = self.courses.summary(grade_points)
         if not records:
             messagebox.showinfo("No Data", "No GPA records to export.", parent=self.root)
             return
-        df = pd.DataFrame(records)
+        df = pd.DataFrame(records, columns=summary.COLUMNS)
         file = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel Files", "*.xlsx")])
         if file:
             try:
@@ -756,17 +1424,30 @@ class GPAApp:
             except Exception as e:
                 messagebox.showerror("Export Error", f"Failed to export GPA summary. Error: {str(e)}", parent=self.root)
 
+    def gpa_report(self):
+        dialog = GPAReportDialog(self.root, self.courses, app_font=self.app_font)
+        self.root.wait_window(dialog)
+
     def import_excel(self):
-        if not self.current_student:
-            messagebox.showwarning("Warning", "Select a student first.", parent=self.root)
-            return
-        file = filedialog.askopenfilename(filetypes=[("Excel Files", "*.xlsx")])
+        file = filedialog.askopenfilename(filetypes=[("Excel Files", "*.xlsx"), ("CSV Files", "*.csv")])
         if file:
+            # Cohort workbooks already imported and untouched since are not read again
+            unchanged, ledger_state = bulk_import.ImportLedger(self.conn, self.courses).check(file)
+            if unchanged:
+                messagebox.showinfo("Imported", "This file has not changed since it was last imported.", parent=self.root)
+                return
             try:
-                df = pd.read_excel(file)
+                df = bulk_import.read_sheet(file)
             except Exception as e:
                 messagebox.showerror("Import Error", f"Could not read the Excel file. Error: {str(e)}", parent=self.root)
                 return
+            if 'index_number' in df.columns:
+                # Rows for many students: no selection needed
+                self.import_cohort(file, df, ledger_state)
+                return
+            if not self.current_student:
+                messagebox.showwarning("Warning", "Select a student first, or import a workbook with an index_number column.", parent=self.root)
+                return
             required_cols = {"year", "semester", "course_name", "grade", "credits"}
             if not required_cols.issubset(df.columns):
                 messagebox.showerror("Error", "Invalid file format. Missing required columns.", parent=self.root)
@@ -778,25 +1459,129 @@ class GPAApp:
                 messagebox.showerror("Error", "Selected student does not exist in database.", parent=self.root)
                 return
             student_id = student_id_res[0]
-            errors = []
-            for idx, row in df.iterrows():
-                try:
-                    g = row['grade']
-                    c = float(row['credits'])
-                    if g not in grade_points or c <= 0:
-                        raise ValueError("Invalid grade or credits.")
-                    self.cursor.execute("INSERT INTO courses (student_id, year, semester, course_name, grade, credits) VALUES (?,?,?,?,?,?)",
-                        (student_id, row['year'], row['semester'], row['course_name'], g, c))
-                except Exception as e:
-                    errors.append(f"Row {idx+2}: {row.to_dict()} Error: {str(e)}")
-            self.conn.commit()
-            if errors:
-                err_msg = "\n".join(errors)
-                messagebox.showwarning("Import Errors", f"Some rows failed to import:\n{err_msg}", parent=self.root)
-            else:
+            reasons, cleaned = bulk_import.check_frame(df, grade_points, (YEARS, SEMESTERS))
+            keep = (reasons == '').to_numpy()
+            try:
+                self.courses.upsert(list(zip(
+                    [student_id] * int(keep.sum()), cleaned['year'][keep], cleaned['semester'][keep],
+                    cleaned['course_name'][keep], df['grade'][keep], cleaned['credits'][keep].astype(float))))
+            except sqlite3.Error as e:
+                messagebox.showerror("Import Error", "Database error: " + str(e), parent=self.root)
+                return
+            self.course_cache.invalidate(student_id)
+            self.gpa_cache.bump(student_id)
+            if self.rank_index is not None:
+                self.rank_index.touch(student_id)
+            if keep.all():
                 messagebox.showinfo("Imported", "Data imported successfully.", parent=self.root)
+            else:
+                self.report_rejects(file, len(df), bulk_import.reject_report(df, reasons), imported=True)
+            self.load_courses()
+
+    def validate_import(self):
+        # Dry run: check a sheet without writing anything
+        file = filedialog.askopenfilename(filetypes=[("Excel Files", "*.xlsx"), ("CSV Files", "*.csv")])
+        if not file:
+            return
+        started = time.perf_counter()
+        try:
+            total, rejects = bulk_import.preflight(file, grade_points, (YEARS, SEMESTERS))
+        except Exception as e:
+            messagebox.showerror("Validation Error", f"Could not validate the file. Error: {str(e)}", parent=self.root)
+            return
+        elapsed = time.perf_counter() - started
+        if rejects.empty:
+            messagebox.showinfo("Valid", f"All {total:,} rows are valid ({elapsed:.2f}s).", parent=self.root)
+        else:
+            self.report_rejects(file, total, rejects)
+
+    def report_rejects(self, file, total, rejects, imported=False):
+        # A handful of problems fit in a dialog; anything more goes to a CSV/XLSX report
+        outcome = "were not imported" if imported else "would be rejected"
+        if len(rejects) <= 10:
+            lines = "\n".join(f"Row {row}: {reason}" for row, reason in zip(rejects['row'], rejects['reasons']))
+            messagebox.showwarning("Rejected Rows", f"{len(rejects)} of {total:,} rows {outcome}:\n{lines}", parent=self.root)
+            return
+        stem = os.path.splitext(os.path.basename(file))[0]
+        out = filedialog.asksaveasfilename(
+            title=f"{len(rejects):,} of {total:,} rows {outcome} - save reject report",
+            initialfile=f"{stem}_rejects.csv", defaultextension=".csv",
+            filetypes=[("CSV Files", "*.csv"), ("Excel Files", "*.xlsx")])
+        if not out:
+            messagebox.showwarning("Rejected Rows", f"{len(rejects):,} of {total:,} rows {outcome}.", parent=self.root)
+            return
+        try:
+            bulk_import.write_report(rejects, out)
+        except Exception as e:
+            messagebox.showerror("Export Error", f"Failed to write the reject report. Error: {str(e)}", parent=self.root)
+            return
+        messagebox.showwarning("Rejected Rows", f"{len(rejects):,} of {total:,} rows {outcome}.\nReport saved to {out}", parent=self.root)
+
+    def import_cohort(self, file, df, ledger_state=None):
+        # One lookup for every index number, optional executemany for the
+        # missing students, then all courses in one pass
+        started = time.perf_counter()
+        report, rows = bulk_import.validate_frame(file, df, grade_points, (YEARS, SEMESTERS))
+        if report.error:
+            messagebox.showerror("Error", report.error, parent=self.root)
+            return
+        ids = bulk_import.lookup_students(self.conn, [r[1] for r in rows])
+        unknown = {r[1] for r in rows} - ids.keys()
+        creatable = unknown & report.names.keys()
+        create = False
+        if creatable and not self.service:  # in client mode students are added through the service only
+            create = messagebox.askyesno(
+                "Create Students",
+                f"{len(unknown):,} index number(s) are not in the database. "
+                f"Create the {len(creatable):,} that have a name in the workbook?", parent=self.root)
+        batch = bulk_import.BatchReport()
+        ledger = bulk_import.ImportLedger(self.conn, self.courses) if ledger_state else None
+        bulk_import.import_one(self.conn, report, rows, batch, ledger, ledger_state, create_missing=create, ids=ids,
+                               courses=self.courses)
+        batch.files.append(report)
+        batch.elapsed = time.perf_counter() - started
+        self.after_bulk_import(batch)
+
+    def after_bulk_import(self, batch):
+        for student_id in batch.student_ids:
+            self.course_cache.invalidate(student_id)
+            self.gpa_cache.bump(student_id)
+            if self.rank_index is not None:
+                self.rank_index.touch(student_id)
+        if batch.created:
+            if self.fuzzy_index is not None:
+                for student_id, name, index_number in batch.created:
+                    self.fuzzy_index.add(student_id, name, index_number)
+            self.load_students()
+        if all(f.ok for f in batch.files):
+            messagebox.showinfo("Imported", batch.summary(), parent=self.root)
+        else:
+            messagebox.showwarning("Import Errors", batch.summary(), parent=self.root)
+        if self.current_student:
             self.load_courses()
 
+    def import_batch(self):
+        # Every .xlsx in a folder; rows carry their student's index_number
+        folder = filedialog.askdirectory(title="Folder of course workbooks")
+        if not folder:
+            return
+        paths = bulk_import.expand_paths(folder)
+        if not paths:
+            messagebox.showinfo("No Files", "No .xlsx files found in that folder.", parent=self.root)
+            return
+        jobs = int(os.environ.get('GPA_IMPORT_JOBS', '0') or 0) or None
+        self.root.config(cursor="watch")
+        self.root.update_idletasks()
+        try:
+            batch = bulk_import.import_files(self.conn, paths, grade_points, jobs=jobs, terms=(YEARS, SEMESTERS),
+                                             courses=self.courses)
+        except Exception as e:
+            messagebox.showerror("Import Error", f"Batch import failed. Error: {str(e)}", parent=self.root)
+            return
+        finally:
+            self.root.config(cursor="")
+        self.after_bulk_import(batch)
+
 
 if __name__ == '__main__':
     root = tk.Tk()
@@ -809,4 +1594,9 @@ if __name__ == '__main__':
 
     app = GPAApp(root)
     root.mainloop()
+    if app.event_monitor:
+        app.event_monitor.stop()
+        report_path = os.environ.get('GPA_EVENT_MONITOR_REPORT', 'event_loop_report.json')
+        app.event_monitor.dump(report_path)
+        print(f"Event loop report written to {report_path}", file=sys.stderr)
 
@@ -0,0 +1,95 @@
+import bisect
+import json
+import re
+
+import gpa_cache
+
+# "Where does this student stand?" without computing every GPA in the cohort.
+#
+# A cohort is programme + intake year, read from the index number
+# ('IT220000001' -> 'IT22'). Each cohort keeps an ascending list of its
+# students' cumulative GPAs, so rank and percentile are a bisect. The index is
+# built once from per-student aggregates (one GROUP BY). After that, write
+# paths touch() the students they changed, and only those are re-read (one
+# IN (...) query) on the next rank lookup. Students without credits are not
+# ranked.
+
+COHORT = re.compile(r'[A-Za-z]+\d{2}')
+
+
+def cohort_of(index_number):
+    match = COHORT.match(index_number or '')
+    return match.group(0).upper() if match else ''
+
+
+class RankIndex:
+    def __init__(self, conn, store, grade_points):
+        self.conn = conn
+        self.store = store
+        self.grade_points = grade_points
+        self.cohorts = {}  # cohort -> ascending [gpa]
+        self.members = {}  # student_id -> (cohort, gpa)
+        self.stale = set()
+
+    @classmethod
+    def build(cls, conn, store, grade_points):
+        index = cls(conn, store, grade_points)
+        totals = store.student_totals(grade_points)
+        for student_id, index_number in conn.execute("SELECT id, index_number FROM students"):
+            points, credits = totals.get(student_id, (0, 0))
+            if credits:
+                gpa = round(points / credits, 4)
+                cohort = cohort_of(index_number)
+                index.members[student_id] = (cohort, gpa)
+                index.cohorts.setdefault(cohort, []).append(gpa)
+        for gpas in index.cohorts.values():
+            gpas.sort()
+        return index
+
+    def touch(self, student_id):
+        # Courses, index number or existence of the student changed
+        self.stale.add(student_id)
+
+    def put(self, student_id, cohort, gpa):
+        self.remove(student_id)
+        self.members[student_id] = (cohort, gpa)
+        bisect.insort(self.cohorts.setdefault(cohort, []), gpa)
+
+    def remove(self, student_id):
+        member = self.members.pop(student_id, None)
+        if member is not None:
+            cohort, gpa = member
+            gpas = self.cohorts[cohort]
+            del gpas[bisect.bisect_left(gpas, gpa)]
+
+    def refresh(self):
+        if not self.stale:
+            return
+        ids = list(self.stale)
+        rows = self.store.grade_rows_many(ids)
+        cohorts = dict(self.conn.execute(
+            "SELECT id, index_number FROM students WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(ids),)))
+        for student_id in ids:
+            result = gpa_cache.GPAResult(gpa_cache.term_totals(rows.get(student_id, ()), self.grade_points))
+            if student_id in cohorts and result.credits:
+                self.put(student_id, cohort_of(cohorts[student_id]), round(result.gpa, 4))
+            else:
+                self.remove(student_id)
+        self.stale.clear()
+
+    def percentile(self, cohort, gpa):
+        # Share of the cohort at or below this GPA, 0-100: the top student
+        # (and a student alone in a cohort) reads 100
+        gpas = self.cohorts.get(cohort)
+        return 100 * bisect.bisect_right(gpas, gpa) / len(gpas) if gpas else 0.0
+
+    def rank(self, student_id):
+        # (cohort, rank, cohort size, percentile); rank 1 is the highest GPA and
+        # equal GPAs share a rank. None when the student isn't ranked.
+        self.refresh()
+        member = self.members.get(student_id)
+        if member is None:
+            return None
+        cohort, gpa = member
+        gpas = self.cohorts[cohort]
+        return cohort, len(gpas) - bisect.bisect_right(gpas, gpa) + 1, len(gpas), self.percentile(cohort, gpa)
@@ -0,0 +1,275 @@
+import re
+import sqlite3
+from array import array
+
+import numpy as np
+
+# FTS5 full-text indexes over student names / index numbers and course names.
+# The virtual tables are external-content tables: they store only the index and
+# read the text back from `students` / `courses`, kept in sync by triggers.
+
+STUDENT_FTS_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5(
+        name, index_number,
+        content='students', content_rowid='id',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS students_fts_ai AFTER INSERT ON students BEGIN
+        INSERT INTO students_fts(rowid, name, index_number) VALUES (new.id, new.name, new.index_number);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS students_fts_ad AFTER DELETE ON students BEGIN
+        INSERT INTO students_fts(students_fts, rowid, name, index_number) VALUES ('delete', old.id, old.name, old.index_number);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS students_fts_au AFTER UPDATE OF name, index_number ON students BEGIN
+        INSERT INTO students_fts(students_fts, rowid, name, index_number) VALUES ('delete', old.id, old.name, old.index_number);
+        INSERT INTO students_fts(rowid, name, index_number) VALUES (new.id, new.name, new.index_number);
+    END
+    """,
+]
+
+COURSE_FTS_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS courses_fts USING fts5(
+        course_name,
+        content='courses', content_rowid='id',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS courses_fts_ai AFTER INSERT ON courses BEGIN
+        INSERT INTO courses_fts(rowid, course_name) VALUES (new.id, new.course_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS courses_fts_ad AFTER DELETE ON courses BEGIN
+        INSERT INTO courses_fts(courses_fts, rowid, course_name) VALUES ('delete', old.id, old.course_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS courses_fts_au AFTER UPDATE OF course_name ON courses BEGIN
+        INSERT INTO courses_fts(courses_fts, rowid, course_name) VALUES ('delete', old.id, old.course_name);
+        INSERT INTO courses_fts(rowid, course_name) VALUES (new.id, new.course_name);
+    END
+    """,
+]
+
+FTS_SCHEMA = {'students': STUDENT_FTS_SCHEMA, 'courses': COURSE_FTS_SCHEMA}
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def init_fts(conn, tables=('students', 'courses')):
+    # Returns False when the SQLite build has no FTS5; callers fall back to scanning.
+    # Course shards index only `courses`.
+    cursor = conn.cursor()
+    try:
+        for table in tables:
+            existed = cursor.execute("SELECT 1 FROM sqlite_master WHERE name=?", (f"{table}_fts",)).fetchone()
+            for stmt in FTS_SCHEMA[table]:
+                cursor.execute(stmt)
+            if not existed:
+                # Index rows that were written before the triggers existed
+                cursor.execute(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+        conn.commit()
+        return True
+    except sqlite3.OperationalError:
+        conn.rollback()
+        return False
+
+
+def match_query(text):
+    # Turn free text into an FTS5 query: every word must match as a prefix.
+    tokens = _TOKEN_RE.findall(text)
+    return " ".join(f'"{tok}"*' for tok in tokens)
+
+
+def prefix_filter(text):
+    # match_query() for course names held outside SQLite: a predicate that is
+    # true when every word of `text` starts a word of the name (None: no words)
+    words = [w.lower() for w in _TOKEN_RE.findall(text)]
+    if not words:
+        return None
+
+    def match(name):
+        tokens = [t.lower() for t in _TOKEN_RE.findall(name or '')]
+        return all(any(t.startswith(w) for t in tokens) for w in words)
+    return match
+
+
+def search_students(conn, text, limit=50):
+    query = match_query(text)
+    if not query:
+        return []
+    return conn.execute("""
+        SELECT s.id, s.name, s.index_number
+        FROM students_fts JOIN students s ON s.id = students_fts.rowid
+        WHERE students_fts MATCH ?
+        ORDER BY bm25(students_fts), s.name
+        LIMIT ?
+    """, (query, limit)).fetchall()
+
+
+def students_by_index_prefix(conn, prefix, limit=5000):
+    # Range scan on the unique index_number index, e.g. "IT19" for one intake
+    prefix = prefix.strip()
+    if not prefix:
+        return []
+    return conn.execute("""
+        SELECT id, name, index_number FROM students
+        WHERE index_number >= ? AND index_number < ?
+        ORDER BY index_number
+        LIMIT ?
+    """, (prefix, prefix + "\U0010ffff", limit)).fetchall()
+
+
+def students_for_course(conn, text, limit=200):
+    # Students who have taken a course matching `text`, best course-name match first.
+    query = match_query(text)
+    if not query:
+        return []
+    return conn.execute("""
+        SELECT s.id, s.name, s.index_number, c.course_name, c.year, c.semester
+        FROM courses_fts
+        JOIN courses c ON c.id = courses_fts.rowid
+        JOIN students s ON s.id = c.student_id
+        WHERE courses_fts MATCH ?
+        ORDER BY bm25(courses_fts), s.name
+        LIMIT ?
+    """, (query, limit)).fetchall()
+
+
+def course_matches(conn, text, limit=200):
+    # Course hits of one course shard (no students table there):
+    # [(bm25 rank, student_id, course_name, year, semester)], best first
+    query = match_query(text)
+    if not query:
+        return []
+    return conn.execute("""
+        SELECT bm25(courses_fts) AS rank, c.student_id, c.course_name, c.year, c.semester
+        FROM courses_fts JOIN courses c ON c.id = courses_fts.rowid
+        WHERE courses_fts MATCH ?
+        ORDER BY rank
+        LIMIT ?
+    """, (query, limit)).fetchall()
+
+
+def global_search(conn, text, limit=50, fuzzy=None, courses=None):
+    # Combined result list for the search box: ('student' | 'similar' | 'course', ...) tuples.
+    results = [('student', sid, name, idx, '') for sid, name, idx in search_students(conn, text, limit)]
+    if not results and fuzzy is not None:
+        # No exact prefix hit, most likely a typo: offer the closest names instead
+        for sid, name, idx, score in fuzzy.search(text, k=10):
+            results.append(('similar', sid, name, idx, f"{score:.0%} match"))
+    # `courses` is the app's course store when courses may live outside `conn`
+    course_hits = courses.students_for_course(text, limit) if courses is not None else students_for_course(conn, text, limit)
+    for sid, name, idx, cname, year, semester in course_hits:
+        results.append(('course', sid, name, idx, f"{cname} ({year} {semester})"))
+    return results
+
+
+def trigrams(text):
+    # pg_trgm style: lowercase, split into words, pad each word with two leading
+    # and one trailing space so short names and word starts still produce grams.
+    grams = set()
+    for word in _TOKEN_RE.findall(text.lower()):
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+class TrigramIndex:
+    # Typo-tolerant in-memory index over student names and index numbers.
+    #
+    # Every student owns two slots (name, index number). Slot data lives in flat
+    # arrays and each trigram maps to an array of slot numbers, so 100k students
+    # cost a few MB. Removing a student only clears its `alive` flag; stale
+    # postings are skipped at query time and dropped by `compact()`.
+
+    FIELDS = 2
+
+    def __init__(self):
+        self.postings = {}
+        self.student_ids = array('q')   # per student row
+        self.alive = bytearray()        # per student row
+        self.sizes = array('H')         # per slot: number of distinct trigrams
+        self.labels = []                # per student row: (name, index_number)
+        self.row_of = {}                # student_id -> row
+        self.dead = 0
+
+    @classmethod
+    def from_db(cls, conn):
+        index = cls()
+        for student_id, name, index_number in conn.execute("SELECT id, name, index_number FROM students"):
+            index.add(student_id, name, index_number)
+        return index
+
+    def __len__(self):
+        return len(self.row_of)
+
+    def add(self, student_id, name, index_number):
+        if student_id in self.row_of:
+            self.remove(student_id)
+        row = len(self.student_ids)
+        self.student_ids.append(student_id)
+        self.alive.append(1)
+        self.labels.append((name, index_number))
+        self.row_of[student_id] = row
+        for field, text in enumerate((name, index_number)):
+            slot = row * self.FIELDS + field
+            grams = trigrams(text)
+            self.sizes.append(min(len(grams), 0xFFFF))
+            for gram in grams:
+                posting = self.postings.get(gram)
+                if posting is None:
+                    posting = self.postings[gram] = array('i')
+                posting.append(slot)
+
+    def update(self, student_id, name, index_number):
+        self.add(student_id, name, index_number)
+
+    def remove(self, student_id):
+        row = self.row_of.pop(student_id, None)
+        if row is None:
+            return
+        self.alive[row] = 0
+        self.dead += 1
+        if self.dead > 1024 and self.dead > len(self.row_of):
+            self.compact()
+
+    def compact(self):
+        live = [(self.student_ids[row], *self.labels[row]) for row in self.row_of.values()]
+        self.__init__()
+        for student_id, name, index_number in live:
+            self.add(student_id, name, index_number)
+
+    def search(self, text, k=10, min_score=0.3):
+        # Returns [(student_id, name, index_number, score)], best first.
+        query = trigrams(text)
+        if not query or not self.row_of:
+            return []
+        # Zero-copy numpy views over the posting arrays; bincount does the
+        # per-slot overlap count in C.
+        lists = [np.frombuffer(self.postings[gram], dtype=np.int32) for gram in query if gram in self.postings]
+        if not lists:
+            return []
+        hits = np.bincount(np.concatenate(lists), minlength=len(self.sizes)).astype(np.float64)
+        sizes = np.frombuffer(self.sizes, dtype=np.uint16)
+        q = len(query)
+        # Blend of Jaccard similarity and how much of the query was found,
+        # so "kasun" still ranks "Kasun Perera" highly.
+        scores = 0.5 * hits / (q + sizes - hits) + 0.5 * hits / q
+        scores = scores.reshape(-1, self.FIELDS).max(axis=1)
+        scores[np.frombuffer(self.alive, dtype=np.uint8) == 0] = 0.0
+        candidates = np.flatnonzero(scores >= min_score)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self.student_ids[row], *self.labels[row], float(scores[row])) for row in candidates]
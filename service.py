@@ -0,0 +1,417 @@
+import argparse
+import contextlib
+import json
+import queue
+import re
+import sqlite3
+import sys
+import threading
+import types
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import course_store
+import gpa_cache
+import gpa_index
+import search_index
+
+# Local HTTP/JSON service owning one GPA database, so several staff machines
+# share a single process instead of each opening data.db over a network share.
+#
+# The service holds a small pool: one writer connection (writes are
+# serialized behind a lock, as SQLite would anyway) and N reader connections
+# handed out per request. The database runs in WAL mode so readers never wait
+# for the writer. GPAApp becomes a client of it when GPA_SERVICE_URL is set.
+#
+#   GET    /students?q=&limit=              roster, or FTS matches for q
+#   POST   /students                        {"name", "index_number"} -> {"id"}
+#   PUT    /students/<id>                   {"name", "index_number"}
+#   POST   /students/delete                 {"ids": [...]}
+#   GET    /students/<id>/courses?year=&semester=
+#   PUT    /students/<id>/courses           {"year", "semester", "courses": [[name, grade, credits], ...]}
+#   POST   /courses                         {"rows": [[student_id, year, semester, name, grade, credits], ...]}
+#   GET    /courses/search?q=&limit=
+#   GET    /students/<id>/gpa
+#   GET    /gpa?ids=1,2,3                   many students in one request
+#   POST   /gpa                             {"ids": [...]} for lists too long for a URL
+#   GET    /summary                         per-term GPA of every student
+#   POST   /batch                           {"requests": [{"method", "path", "body"}, ...]}
+
+DEFAULT_PORT = 8765
+DEFAULT_READERS = 4
+
+
+class ServiceError(sqlite3.DatabaseError):
+    # A DatabaseError so the app's existing database error handling covers the remote store
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Pool:
+    def __init__(self, database, readers=DEFAULT_READERS):
+        import main
+        self.database = database
+        conn = self.connect()
+        # Same schema (and migrations) as the app would create
+        main.GPAApp.init_db(types.SimpleNamespace(conn=conn, cursor=conn.cursor()))
+        conn.execute("PRAGMA journal_mode=WAL")
+        self.writer = (conn, course_store.open_store(conn, database, grade_points=main.grade_points))
+        self.write_lock = threading.Lock()
+        self.readers = queue.Queue()
+        for _ in range(readers):
+            conn = course_store.connect_reader(database, check_same_thread=False)
+            self.readers.put((conn, course_store.open_reader(conn, database)))
+
+    def connect(self):
+        conn = sqlite3.connect(self.database, check_same_thread=False)
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    @contextlib.contextmanager
+    def read(self):
+        session = self.readers.get()
+        try:
+            yield session
+        finally:
+            self.readers.put(session)
+
+    @contextlib.contextmanager
+    def write(self):
+        with self.write_lock:
+            yield self.writer
+
+    def close(self):
+        for conn, store in [self.writer] + [self.readers.get() for _ in range(self.readers.qsize())]:
+            store.close()
+            conn.close()
+
+
+def gpa_payload(student_id, result):
+    return {
+        'student_id': student_id,
+        'gpa': result.gpa,
+        'credits': result.credits,
+        'terms': [{'year': y, 'semester': s, 'gpa': p / c if c else 0, 'credits': c}
+                  for (y, s), (p, c) in result.terms.items()],
+    }
+
+
+class GPAService:
+    # Transport-free request handling: dispatch() takes a method, path, query
+    # dict and decoded JSON body and returns (status, payload)
+
+    def __init__(self, pool, grade_points):
+        self.pool = pool
+        self.grade_points = grade_points
+        # Identical reads arriving together (refresh storms at the start of
+        # term) are computed once
+        self.flights = gpa_cache.SingleFlight()
+        self.routes = [
+            ('GET', r'/students', self.list_students),
+            ('POST', r'/students', self.add_student),
+            ('POST', r'/students/delete', self.delete_students),
+            ('PUT', r'/students/(\d+)', self.update_student),
+            ('GET', r'/students/(\d+)/courses', self.get_courses),
+            ('PUT', r'/students/(\d+)/courses', self.put_courses),
+            ('GET', r'/students/(\d+)/gpa', self.get_gpa),
+            ('POST', r'/courses', self.upsert_courses),
+            ('GET', r'/courses/search', self.search_courses),
+            ('GET', r'/gpa', self.batch_gpa),
+            ('GET', r'/gpa/range', self.gpa_range),
+            ('POST', r'/gpa', self.batch_gpa),
+            ('GET', r'/summary', self.get_summary),
+            ('POST', r'/batch', self.batch),
+        ]
+
+    def dispatch(self, method, path, query=None, body=None):
+        for route_method, pattern, handler in self.routes:
+            match = re.fullmatch(pattern, path)
+            if match and route_method == method:
+                try:
+                    return 200, handler(query or {}, body, *(int(g) for g in match.groups()))
+                except ServiceError as e:
+                    return e.status, {'error': str(e)}
+                except sqlite3.IntegrityError as e:
+                    return 409, {'error': str(e)}
+                except (KeyError, TypeError, ValueError) as e:
+                    return 400, {'error': f"Bad request: {e}"}
+                except sqlite3.Error as e:
+                    return 500, {'error': str(e)}
+        return 404, {'error': f"No route for {method} {path}"}
+
+    def list_students(self, query, body):
+        text = query.get('q', '')
+        limit = int(query.get('limit', 0) or 0) or -1
+        with self.pool.read() as (conn, _):
+            if text.strip():
+                rows = search_index.search_students(conn, text, limit if limit > 0 else 200)
+            else:
+                rows = conn.execute("SELECT id, name, index_number FROM students ORDER BY name LIMIT ?", (limit,)).fetchall()
+        return [list(row) for row in rows]
+
+    def add_student(self, query, body):
+        with self.pool.write() as (conn, _), self.flights.writing():
+            with conn:
+                cursor = conn.execute("INSERT INTO students (name, index_number) VALUES (?, ?)",
+                                      (body['name'], body['index_number']))
+        return {'id': cursor.lastrowid}
+
+    def update_student(self, query, body, student_id):
+        with self.pool.write() as (conn, _), self.flights.writing([student_id]):
+            with conn:
+                changed = conn.execute("UPDATE students SET name=?, index_number=? WHERE id=?",
+                                       (body['name'], body['index_number'], student_id)).rowcount
+        if not changed:
+            raise ServiceError(404, f"No student {student_id}")
+        return {'id': student_id}
+
+    def delete_students(self, query, body):
+        ids = [int(i) for i in body['ids']]
+        with self.pool.write() as (conn, store), self.flights.writing(ids):
+            with conn:
+                deleted = conn.execute("DELETE FROM students WHERE id IN (SELECT value FROM json_each(?))",
+                                       (json.dumps(ids),)).rowcount
+            store.delete_students(ids)
+        return {'deleted': deleted}
+
+    def get_courses(self, query, body, student_id):
+        with self.pool.read() as (_, store):
+            if 'year' in query and 'semester' in query:
+                return [list(row) for row in store.term_courses(student_id, query['year'], query['semester'])]
+            return [list(row) for row in store.course_rows(student_id)]
+
+    def put_courses(self, query, body, student_id):
+        rows = [(name, grade, float(credits)) for name, grade, credits in body['courses']]
+        with self.pool.write() as (_, store), self.flights.writing([student_id]):
+            store.replace_term(student_id, body['year'], body['semester'], rows)
+        return {'saved': len(rows)}
+
+    def upsert_courses(self, query, body):
+        rows = [(int(sid), year, semester, name, grade, float(credits))
+                for sid, year, semester, name, grade, credits in body['rows']]
+        with self.pool.write() as (_, store), self.flights.writing({row[0] for row in rows}):
+            changed = store.upsert(rows)
+        return {'changed': changed}
+
+    def search_courses(self, query, body):
+        with self.pool.read() as (_, store):
+            return [list(row) for row in store.students_for_course(query.get('q', ''), int(query.get('limit', 200)))]
+
+    def gpa(self, store, student_id):
+        return gpa_cache.GPAResult(gpa_cache.term_totals(store.grade_rows(student_id), self.grade_points))
+
+    def get_gpa(self, query, body, student_id):
+        return self.flights.do((student_id, 'gpa'), lambda: self.read_gpa(student_id))
+
+    def read_gpa(self, student_id):
+        with self.pool.read() as (_, store):
+            return gpa_payload(student_id, self.gpa(store, student_id))
+
+    def batch_gpa(self, query, body):
+        if body is not None:
+            ids = [int(i) for i in body['ids']]
+        else:
+            ids = [int(i) for i in query.get('ids', '').split(',') if i.strip()]
+        with self.pool.read() as (_, store):
+            rows = store.grade_rows_many(ids)
+        return [gpa_payload(sid, gpa_cache.GPAResult(gpa_cache.term_totals(rows.get(sid, ()), self.grade_points)))
+                for sid in ids]
+
+    def gpa_range(self, query, body):
+        # ?report=deans-list|probation, or ?min=&max= (min inclusive, max exclusive)
+        if 'report' in query:
+            lo, hi = gpa_index.REPORTS[query['report']]
+        else:
+            lo, hi = (float(query[k]) if query.get(k) else None for k in ('min', 'max'))
+        with self.pool.read() as (_, store):
+            return [list(row) for row in store.gpa_range(lo, hi)]
+
+    def get_summary(self, query, body):
+        return self.flights.do((None, 'summary'), self.read_summary)
+
+    def read_summary(self):
+        with self.pool.read() as (_, store):
+            return store.summary(self.grade_points)
+
+    def batch(self, query, body):
+        # Many requests in one round trip; each answers as if sent on its own
+        responses = []
+        for request in body['requests']:
+            url = urllib.parse.urlsplit(request['path'])
+            status, payload = self.dispatch(request.get('method', 'GET').upper(), url.path,
+                                            dict(urllib.parse.parse_qsl(url.query)), request.get('body'))
+            responses.append({'status': status, 'body': payload})
+        return responses
+
+
+class Handler(BaseHTTPRequestHandler):
+    service = None  # set by make_server
+    protocol_version = 'HTTP/1.1'
+
+    def handle_request(self, method):
+        url = urllib.parse.urlsplit(self.path)
+        body = None
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            try:
+                body = json.loads(self.rfile.read(length))
+            except ValueError:
+                self.respond(400, {'error': "Body is not valid JSON"})
+                return
+        status, payload = self.service.dispatch(method, url.path, dict(urllib.parse.parse_qsl(url.query)), body)
+        self.respond(status, payload)
+
+    def respond(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def do_PUT(self):
+        self.handle_request('PUT')
+
+    def log_message(self, format, *args):
+        pass  # quiet; a service error is already in the JSON response
+
+
+def make_server(database, grade_points, host='127.0.0.1', port=DEFAULT_PORT, readers=DEFAULT_READERS):
+    # port=0 picks a free port (tests); the bound address is server.server_address
+    pool = Pool(database, readers)
+    handler = type('GPAHandler', (Handler,), {'service': GPAService(pool, grade_points)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.pool = pool
+    return server
+
+
+def serve_in_thread(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return thread
+
+
+class ServiceClient:
+    # Thin JSON client; HTTP errors come back as ServiceError (409 as IntegrityError)
+
+    def __init__(self, url, timeout=30):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method, path, body=None, **query):
+        url = self.url + path
+        if query:
+            url += '?' + urllib.parse.urlencode(query)
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(url, data=data, method=method, headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get('error', e.reason)
+            except ValueError:
+                message = e.reason
+            if e.code == 409:
+                raise sqlite3.IntegrityError(message)
+            raise ServiceError(e.code, message)
+        except (urllib.error.URLError, OSError) as e:
+            raise ServiceError(0, f"GPA service at {self.url} unreachable: {e}")
+
+    def students(self, text='', limit=0):
+        return [tuple(row) for row in self.request('GET', '/students', q=text, limit=limit)]
+
+    def add_student(self, name, index_number):
+        return self.request('POST', '/students', {'name': name, 'index_number': index_number})['id']
+
+    def update_student(self, student_id, name, index_number):
+        self.request('PUT', f'/students/{student_id}', {'name': name, 'index_number': index_number})
+
+    def delete_students(self, student_ids):
+        return self.request('POST', '/students/delete', {'ids': list(student_ids)})['deleted']
+
+    def gpa(self, student_ids):
+        return self.request('POST', '/gpa', {'ids': list(student_ids)})
+
+    def batch(self, requests):
+        return self.request('POST', '/batch', {'requests': requests})
+
+
+class RemoteCourseStore:
+    # Course store backed by the service (GPAApp client mode)
+    external = True
+
+    def __init__(self, client):
+        self.client = client
+
+    def term_courses(self, student_id, year, semester):
+        rows = self.client.request('GET', f'/students/{student_id}/courses', year=year, semester=semester)
+        return [tuple(row) for row in rows]
+
+    def course_rows(self, student_id):
+        return [tuple(row) for row in self.client.request('GET', f'/students/{student_id}/courses')]
+
+    def grade_rows(self, student_id):
+        return [(y, s, g, c) for y, s, _, g, c in self.course_rows(student_id)]
+
+    def student_courses(self, student_ids):
+        # Same shape as the local stores; the service hands out no course ids
+        return [(None, sid, *row) for sid in student_ids for row in self.course_rows(sid)]
+
+    def replace_term(self, student_id, year, semester, rows):
+        self.client.request('PUT', f'/students/{student_id}/courses',
+                            {'year': year, 'semester': semester, 'courses': [list(row) for row in rows]})
+
+    def upsert(self, values):
+        return self.client.request('POST', '/courses', {'rows': [list(row) for row in values]})['changed']
+
+    def delete_students(self, student_ids):
+        pass  # the service removes courses together with their students
+
+    def gpa_range(self, lo=None, hi=None):
+        query = {k: v for k, v in (('min', lo), ('max', hi)) if v is not None}
+        return [tuple(row) for row in self.client.request('GET', '/gpa/range', **query)]
+
+    def summary(self, grade_points, jobs=None):
+        return self.client.request('GET', '/summary')
+
+    def students_for_course(self, text, limit=200):
+        return [tuple(row) for row in self.client.request('GET', '/courses/search', q=text, limit=limit)]
+
+    def close(self):
+        pass
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a GPA database over local HTTP/JSON.")
+    parser.add_argument('database', nargs='?', default='data.db')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--readers', type=int, default=DEFAULT_READERS, help="pooled reader connections")
+    args = parser.parse_args(argv)
+
+    from main import grade_points
+    server = make_server(args.database, grade_points, args.host, args.port, args.readers)
+    host, port = server.server_address[:2]
+    print(f"Serving {args.database} on http://{host}:{port} (Ctrl+C to stop)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.pool.close()
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,198 @@
+import argparse
+import heapq
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Set-based, optionally parallel per-term GPA summary for every student.
+#
+# Students are split into contiguous id ranges ("shards"). Each worker process
+# opens its own read-only connection, aggregates its range with one GROUP BY
+# over the (student_id, year, semester, grade, credits) index, and returns its
+# rows sorted by name; the shards are then merged in order. Databases whose
+# courses are split over shard files (course_store.py) are summarized one
+# shard file per worker instead.
+
+COLUMNS = ['Name', 'Index Number', 'Year', 'Semester', 'GPA', 'Credits']
+
+# Below this many students per worker, process start-up costs more than it saves
+MIN_SHARD_STUDENTS = 25_000
+
+
+def points_case(grade_points):
+    # SQL expression mapping a grade to its points, plus its parameters
+    sql = "CASE grade " + " ".join("WHEN ? THEN ?" for _ in grade_points) + " ELSE 0 END"
+    params = [value for item in grade_points.items() for value in item]
+    return sql, params
+
+
+def shard_ranges(conn, shards):
+    # Split student ids into `shards` ranges holding about the same number of students
+    total = conn.execute("SELECT count(*) FROM students").fetchone()[0]
+    if not total:
+        return []
+    shards = max(1, min(shards, total))
+    bounds = []
+    for k in range(1, shards):
+        row = conn.execute("SELECT id FROM students ORDER BY id LIMIT 1 OFFSET ?", (k * total // shards,)).fetchone()
+        bounds.append(row[0])
+    lo = conn.execute("SELECT min(id) FROM students").fetchone()[0]
+    hi = conn.execute("SELECT max(id) FROM students").fetchone()[0]
+    edges = [lo] + bounds + [hi + 1]
+    return [(edges[i], edges[i + 1] - 1) for i in range(len(edges) - 1) if edges[i] < edges[i + 1]]
+
+
+def term_points(conn, grade_points, lo=None, hi=None):
+    # {student_id: [(year, semester, points, credits), ...]} for ids in [lo, hi], or all
+    case_sql, case_params = points_case(grade_points)
+    where, params = ("WHERE student_id BETWEEN ? AND ?", (lo, hi)) if lo is not None else ("", ())
+    terms = {}
+    for student_id, year, semester, points, credits, _ in conn.execute(f"""
+        SELECT student_id, year, semester, SUM(({case_sql}) * credits), SUM(credits), MIN(id) AS first_id
+        FROM courses
+        {where}
+        GROUP BY student_id, year, semester
+        ORDER BY student_id, first_id
+    """, (*case_params, *params)):
+        terms.setdefault(student_id, []).append((year, semester, points, credits))
+    return terms
+
+
+def student_totals(conn, grade_points):
+    # {student_id: (points, credits)} over all terms; no per-term grouping or ordering
+    case_sql, case_params = points_case(grade_points)
+    return {student_id: (points, credits) for student_id, points, credits in conn.execute(f"""
+        SELECT student_id, SUM(({case_sql}) * credits), SUM(credits) FROM courses GROUP BY student_id
+    """, case_params)}
+
+
+def summarize_range(conn, lo, hi, grade_points):
+    # [(name, index_number, id, [(year, semester, points, credits), ...])] sorted by name, id
+    terms = term_points(conn, grade_points, lo, hi)
+    students = conn.execute(
+        "SELECT id, name, index_number FROM students WHERE id BETWEEN ? AND ?", (lo, hi)).fetchall()
+    rows = [(name, idx, sid, terms[sid]) for sid, name, idx in students if sid in terms]
+    rows.sort(key=lambda r: (r[0], r[2]))
+    return rows
+
+
+def _worker(database, lo, hi, grade_points):
+    conn = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+    try:
+        return summarize_range(conn, lo, hi, grade_points)
+    finally:
+        conn.close()
+
+
+def _shard_worker(path, grade_points):
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return term_points(conn, grade_points)
+    finally:
+        conn.close()
+
+
+def default_jobs():
+    return int(os.environ.get('GPA_SUMMARY_JOBS', '0') or 0) or os.cpu_count() or 1
+
+
+def compute_summary(database, grade_points, jobs=None, conn=None, min_shard=MIN_SHARD_STUDENTS):
+    # Returns records in export order (by name). `conn` is used directly when
+    # only one job runs or the database is not a file other processes can open.
+    jobs = jobs or default_jobs()
+    own_conn = conn is None
+    if own_conn:
+        conn = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+    try:
+        count = conn.execute("SELECT count(*) FROM students").fetchone()[0]
+        jobs = max(1, min(jobs, count // max(1, min_shard)))
+        if jobs == 1 or database in (None, '', ':memory:'):
+            lo_hi = conn.execute("SELECT min(id), max(id) FROM students").fetchone()
+            shards = [summarize_range(conn, *lo_hi, grade_points)] if count else []
+        else:
+            ranges = shard_ranges(conn, jobs)
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                futures = [pool.submit(_worker, os.path.abspath(database), lo, hi, grade_points) for lo, hi in ranges]
+                shards = [f.result() for f in futures]
+    finally:
+        if own_conn:
+            conn.close()
+    return to_records(heapq.merge(*shards, key=lambda r: (r[0], r[2])))
+
+
+def compute_sharded(conn, paths, grade_points, jobs=None, shards=None, min_shard=MIN_SHARD_STUDENTS):
+    # Courses split over the shard files at `paths`, students in `conn`: one
+    # GROUP BY per shard (in worker processes for large rosters), then the
+    # names from `conn` in export order. `shards` are open connections to the
+    # same files, used when everything runs in-process.
+    count = conn.execute("SELECT count(*) FROM students").fetchone()[0]
+    jobs = max(1, min(jobs or default_jobs(), len(paths), count // max(1, min_shard)))
+    if jobs == 1 and shards is not None:
+        parts = [term_points(shard, grade_points) for shard in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            parts = list(pool.map(_shard_worker, paths, [grade_points] * len(paths)))
+    terms = {}
+    for part in parts:
+        terms.update(part)  # a student's courses are all in one shard
+    return named_records(conn, terms)
+
+
+def named_records(conn, terms):
+    # Records for {student_id: terms} aggregated outside `conn`, in export order
+    return to_records((name, idx, sid, terms[sid]) for sid, name, idx in conn.execute(
+        "SELECT id, name, index_number FROM students ORDER BY name, id") if sid in terms)
+
+
+def to_records(rows):
+    # Export records from (name, index_number, id, terms) rows already in order
+    records = []
+    for name, idx, _, terms in rows:
+        for year, semester, points, credits in terms:
+            records.append({
+                'Name': name,
+                'Index Number': idx,
+                'Year': year,
+                'Semester': semester,
+                'GPA': round(points / credits if credits else 0, 3),
+                'Credits': credits,
+            })
+    return records
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Export every student's per-term GPA summary.")
+    parser.add_argument('database', nargs='?', default='data.db')
+    parser.add_argument('-o', '--output', help="write .xlsx or .csv (default: only report timing)")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.database):
+        parser.error(f"{args.database} not found")
+
+    import course_store
+    from main import grade_points
+    started = time.perf_counter()
+    conn = course_store.connect_reader(args.database)
+    try:
+        # Follows the database's shard layout, if it has one; only the app and
+        # the import/service writers set one up
+        store = course_store.open_reader(conn, args.database)
+        records = store.summary(grade_points, jobs=args.jobs)
+        store.close()
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - started
+    print(f"{len(records):,} term rows in {elapsed:.2f}s (jobs={args.jobs or default_jobs()})", file=sys.stderr)
+    if args.output:
+        import pandas as pd
+        df = pd.DataFrame(records, columns=COLUMNS)
+        if args.output.endswith('.csv'):
+            df.to_csv(args.output, index=False)
+        else:
+            df.to_excel(args.output, index=False)
+
+
+if __name__ == '__main__':
+    main_cli()
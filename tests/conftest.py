@@ -0,0 +1,44 @@
+import os
+import sqlite3
+import sys
+import types
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import main  # noqa: E402
+
+
+def init_db(conn):
+    # The app's schema and migrations without a window
+    main.GPAApp.init_db(types.SimpleNamespace(conn=conn, cursor=conn.cursor()))
+
+
+@pytest.fixture
+def database(tmp_path):
+    return str(tmp_path / 'data.db')
+
+
+@pytest.fixture
+def conn(database):
+    conn = sqlite3.connect(database)
+    init_db(conn)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def write_cohort(tmp_path):
+    # write_cohort(rows, name='cohort.csv') -> path; rows are
+    # (index_number, name, year, semester, course_name, grade, credits)
+    def write(rows, name='cohort.csv'):
+        path = tmp_path / name
+        lines = ["index_number,name,year,semester,course_name,grade,credits"]
+        lines += [",".join(str(v) for v in row) for row in rows]
+        path.write_text("\n".join(lines) + "\n")
+        return str(path)
+    return write
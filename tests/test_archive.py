@@ -0,0 +1,53 @@
+import pytest
+
+import archive
+import course_store
+import main
+
+
+def add_student(conn, name, index_number, grade='A'):
+    student_id = conn.execute("INSERT INTO students (name, index_number) VALUES (?, ?)", (name, index_number)).lastrowid
+    conn.execute(main.bulk_import.UPSERT_COURSE, (student_id, 'Year 1', 'Semester 1', 'Maths', grade, 3.0))
+    conn.commit()
+    return student_id
+
+
+def test_archive_moves_students_and_courses(conn, tmp_path):
+    path = str(tmp_path / 'archive.db')
+    ann = add_student(conn, 'Ann', 'IT19000001')
+    add_student(conn, 'Bob', 'IT22000001')
+    assert archive.archive_students(conn, path, [ann]) == (1, 1)
+    assert [row[2] for row in archive.search(path, 'IT19')] == ['IT19000001']
+    assert archive.courses(path, ann) == [('Year 1', 'Semester 1', 'Maths', 'A', 3.0)]
+    assert conn.execute("SELECT index_number FROM students").fetchall() == [('IT22000001',)]
+    assert conn.execute("SELECT COUNT(*) FROM courses").fetchone()[0] == 1
+
+
+def test_archived_index_number_is_not_overwritten(conn, tmp_path):
+    path = str(tmp_path / 'archive.db')
+    first = add_student(conn, 'Ann', 'IT19000001', grade='A')
+    archive.archive_students(conn, path, [first])
+    second = add_student(conn, 'Ann Again', 'IT19000001', grade='C')
+    with pytest.raises(archive.ArchiveConflict) as error:
+        archive.archive_students(conn, path, [second])
+    assert error.value.index_numbers == ['IT19000001']
+    # Both students and their courses are where they were
+    assert [row[:2] for row in archive.search(path, 'IT19')] == [(first, 'Ann')]
+    assert archive.courses(path, first) == [('Year 1', 'Semester 1', 'Maths', 'A', 3.0)]
+    assert conn.execute("SELECT id FROM students").fetchall() == [(second,)]
+    assert conn.execute("SELECT grade FROM courses WHERE student_id=?", (second,)).fetchall() == [('C',)]
+
+
+def test_archive_from_shards(conn, database, tmp_path, monkeypatch):
+    path = str(tmp_path / 'archive.db')
+    monkeypatch.setenv('GPA_SHARDS', '2')
+    store = course_store.open_store(conn, database, grade_points=main.grade_points)
+    try:
+        ann = conn.execute("INSERT INTO students (name, index_number) VALUES ('Ann', 'IT19000001')").lastrowid
+        conn.commit()
+        store.upsert([(ann, 'Year 1', 'Semester 1', 'Maths', 'B', 3.0)])
+        assert archive.archive_students(conn, path, [ann], store=store) == (1, 1)
+        assert store.student_courses([ann]) == []
+        assert archive.courses(path, ann) == [('Year 1', 'Semester 1', 'Maths', 'B', 3.0)]
+    finally:
+        store.close()
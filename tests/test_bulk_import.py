@@ -0,0 +1,49 @@
+import pytest
+
+import bulk_import
+import course_store
+import main
+
+
+def test_read_sheet_without_calamine_support(tmp_path, monkeypatch):
+    # pandas before 2.2 rejects engine='calamine'; the sheet is read with openpyxl
+    path = str(tmp_path / 'cohort.xlsx')
+    bulk_import.pd.DataFrame({'index_number': ['IT22000001'], 'grade': ['A']}).to_excel(path, index=False)
+    monkeypatch.setattr(bulk_import.pd, '__version__', '2.1.4')
+    df = bulk_import.read_sheet(path)
+    assert df.to_dict('records') == [{'index_number': 'IT22000001', 'grade': 'A'}]
+
+
+@pytest.fixture(params=['sqlite', 'sharded', 'columnar'])
+def store(request, conn, database, monkeypatch):
+    conn.executemany("INSERT INTO students (name, index_number) VALUES (?, ?)",
+                     [('Ann', 'IT22000001'), ('Bob', 'IT22000002')])
+    conn.commit()
+    if request.param == 'columnar':
+        store = course_store.open_store(conn, database, storage='columnar', grade_points=main.grade_points)
+    else:
+        if request.param == 'sharded':
+            monkeypatch.setenv('GPA_SHARDS', '2')
+            monkeypatch.setenv('GPA_SHARD_BLOCK', '1')
+        store = course_store.open_store(conn, database, grade_points=main.grade_points)
+    yield store
+    store.close()
+
+
+def test_upsert_is_idempotent_on_the_natural_key(store):
+    rows = [(1, 'Year 1', 'Semester 1', 'Maths', 'A', 3.0), (2, 'Year 1', 'Semester 1', 'Maths', 'B', 3.0)]
+    assert store.upsert(rows) == 2
+    assert store.upsert(rows) == 0
+    assert store.upsert([(1, 'Year 1', 'Semester 1', 'Maths', 'C', 3.0)]) == 1
+    assert sorted(row[1:] for row in store.student_courses([1, 2])) == [
+        (1, 'Year 1', 'Semester 1', 'Maths', 'C', 3.0), (2, 'Year 1', 'Semester 1', 'Maths', 'B', 3.0)]
+    assert [row[0] for row in store.gpa_range(None, None)] == [2, 1]
+
+
+def test_import_twice_writes_nothing_the_second_time(conn, write_cohort):
+    path = write_cohort([('IT22000001', 'Ann', 'Year 1', 'Semester 1', 'Maths', 'A', 3)])
+    for expected in (1, 0):
+        batch = bulk_import.import_files(conn, [path], main.grade_points, jobs=1, create_missing=True,
+                                         use_ledger=False)
+        assert batch.files[0].changed == expected
+    assert conn.execute("SELECT COUNT(*) FROM courses").fetchone()[0] == 1
@@ -0,0 +1,42 @@
+import os
+import threading
+
+import diagnostics
+
+
+def test_sql_stats_from_many_threads():
+    stats = diagnostics.SQLStats()
+
+    def work():
+        for _ in range(2000):
+            stats.record("SELECT 1", 0.5)
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert stats.totals()['statements'] == 16000
+
+
+def test_profiles_of_quick_actions_do_not_collide(tmp_path):
+    profiler = diagnostics.ActionProfiler(directory=str(tmp_path))
+    action = profiler.wrap('load_courses', lambda: None)
+    profiler.arm(3)
+    for _ in range(3):
+        action()
+    assert len(set(profiler.written)) == 3
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(os.path.basename(p) for p in profiler.written)
+
+
+def test_reset_during_a_running_action():
+    stats = diagnostics.SQLStats()
+    with stats.action('import_excel'):
+        stats.record("SELECT 1", 1.0)
+        stats.reset()  # e.g. from the diagnostics dialog in a nested event loop
+        key = stats.record("SELECT 2", 2.0)
+        stats.add_fetch(key, 0.5)
+    assert stats.actions == {'import_excel': {'calls': 0, 'statements': 1, 'sql_ms': 2.5}}
+    assert list(stats.queries) == [key]
+    with stats.action('load_courses'):
+        pass
+    assert stats.actions['load_courses']['calls'] == 1
@@ -0,0 +1,92 @@
+import os
+
+import bulk_import
+import main
+
+ROWS = [
+    ('IT22000001', 'Ann', 'Year 1', 'Semester 1', 'Maths', 'A', 3),
+    ('IT22000001', 'Ann', 'Year 1', 'Semester 1', 'Physics', 'B+', 2),
+    ('IT22000002', 'Bob', 'Year 1', 'Semester 1', 'Maths', 'C', 3),
+]
+
+
+def run(conn, path):
+    batch = bulk_import.import_files(conn, [path], main.grade_points, jobs=1, create_missing=True,
+                                     terms=(main.YEARS, main.SEMESTERS))
+    return batch.files[0]
+
+
+def courses(conn):
+    return sorted(conn.execute("""
+        SELECT s.index_number, c.course_name, c.grade, c.credits
+        FROM courses c JOIN students s ON s.id = c.student_id
+    """))
+
+
+def test_unchanged_file_is_skipped(conn, write_cohort):
+    path = write_cohort(ROWS)
+    assert run(conn, path).imported == 3
+    assert run(conn, path).skipped
+
+
+def test_delete_then_reimport_restores_rows(conn, write_cohort):
+    path = write_cohort(ROWS)
+    run(conn, path)
+    before = courses(conn)
+    conn.execute("DELETE FROM courses")
+    conn.commit()
+    report = run(conn, path)
+    assert not report.skipped
+    assert courses(conn) == before
+
+
+def test_reimport_after_student_delete(conn, write_cohort):
+    path = write_cohort(ROWS)
+    run(conn, path)
+    before = courses(conn)
+    conn.execute("DELETE FROM students WHERE index_number='IT22000002'")
+    conn.commit()
+    assert not run(conn, path).skipped
+    assert courses(conn) == before
+
+
+def test_touched_file_restores_edited_rows(conn, write_cohort):
+    path = write_cohort(ROWS)
+    run(conn, path)
+    before = courses(conn)
+    conn.execute("UPDATE courses SET grade='F' WHERE course_name='Physics'")
+    conn.commit()
+    os.utime(path, ns=(0, 0))  # same bytes, new mtime: the hash path
+    report = run(conn, path)
+    assert not report.skipped
+    assert report.changed == 1
+    assert courses(conn) == before
+
+
+def test_changed_file_writes_only_the_delta(conn, write_cohort):
+    path = write_cohort(ROWS)
+    run(conn, path)
+    rows = ROWS[:2] + [ROWS[2][:5] + ('B', 3)]
+    write_cohort(rows)
+    report = run(conn, path)
+    assert report.changed == 1
+    assert ('IT22000002', 'Maths', 'B', 3.0) in courses(conn)
+
+
+def test_delete_then_reimport_sharded(conn, database, write_cohort, monkeypatch):
+    monkeypatch.setenv('GPA_SHARDS', '2')
+    store = main.course_store.open_store(conn, database, grade_points=main.grade_points)
+    try:
+        path = write_cohort(ROWS)
+        batch = bulk_import.import_files(conn, [path], main.grade_points, jobs=1, create_missing=True, courses=store)
+        assert batch.files[0].imported == 3
+        ids = [sid for sid, in conn.execute("SELECT id FROM students")]
+        assert len(store.student_courses(ids)) == 3
+        for shard in store.shards:
+            shard.execute("DELETE FROM courses")
+            shard.commit()
+        batch = bulk_import.import_files(conn, [path], main.grade_points, jobs=1, courses=store)
+        assert not batch.files[0].skipped
+        assert len(store.student_courses(ids)) == 3
+    finally:
+        store.close()
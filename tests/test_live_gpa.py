@@ -0,0 +1,101 @@
+import os
+import sys
+
+import pytest
+
+import course_store
+import gpa_cache
+import main
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+import headless  # noqa: E402
+
+TERM = ('Year 1', 'Semester 2')
+
+
+def positive(credits):
+    try:
+        return float(credits) > 0
+    except ValueError:
+        return False
+
+
+def saved(conn, database, rows):
+    # What save_courses stores for these editor rows, read back as Calculate GPA does
+    store = course_store.SQLiteCourseStore(conn, database)
+    store.replace_term(1, *TERM, [(name.strip(), grade, float(credits)) for name, grade, credits in rows
+                                  if name.strip() and grade in main.grade_points and positive(credits)])
+    return gpa_cache.GPAResult(gpa_cache.term_totals(store.grade_rows(1), main.grade_points))
+
+
+@pytest.fixture
+def student(conn):
+    conn.execute("INSERT INTO students (name, index_number) VALUES ('Ann', 'IT22000001')")
+    conn.execute(main.bulk_import.UPSERT_COURSE, (1, 'Year 1', 'Semester 1', 'Physics', 'B', 4.0))
+    conn.commit()
+    return 1
+
+
+def live(rows):
+    # Seeded with the saved Year 1 / Semester 1 term (B, 4 credits)
+    preview = gpa_cache.LiveGPA()
+    preview.seed(12.0, 4.0)
+    for key, row in enumerate(rows):
+        preview.set_row(key, *row, main.grade_points)
+    return preview
+
+
+def assert_matches(preview, result):
+    assert preview.term_gpa == pytest.approx(result.term(*TERM)[0])
+    assert preview.term_credits == pytest.approx(result.term(*TERM)[1])
+    assert preview.gpa == pytest.approx(result.gpa)
+    assert preview.credits == pytest.approx(result.credits)
+
+
+@pytest.mark.parametrize('rows', [
+    [('Maths', 'A', '3'), ('Art', 'C', '2')],
+    [('Maths', 'A', '3'), ('Maths', 'C', '3')],  # listed twice: the last row is saved
+    [('Maths', 'A', '3'), (' Maths ', 'C', '2'), ('Art', 'B+', '1.5')],
+    [('Maths', 'A', '3'), ('Art', 'Z', '2'), ('Music', 'A', '0'), ('Drama', 'A', '-1'), ('', 'A', '3'),
+     ('Chem', 'B', 'x')],
+])
+def test_preview_matches_saved_result(conn, database, student, rows):
+    assert_matches(live(rows), saved(conn, database, rows))
+
+
+def test_edits_renames_and_removals(conn, database, student):
+    preview = live([('Maths', 'A', '3'), ('Maths', 'C', '3'), ('Art', 'B', '2')])
+    preview.set_row(1, 'Physics', 'C', '3', main.grade_points)  # rename: the first Maths counts again
+    preview.remove_row(2)
+    preview.set_row(0, 'Maths', 'B', '4', main.grade_points)
+    rows = [('Maths', 'B', '4'), ('Physics', 'C', '3')]
+    assert_matches(preview, saved(conn, database, rows))
+    preview.set_row(0, 'Maths', 'Z', '4', main.grade_points)  # invalid grade: counts for nothing
+    assert_matches(preview, saved(conn, database, [('Physics', 'C', '3')]))
+    preview.clear_rows()
+    assert (preview.term_gpa, preview.term_credits, preview.credits) == (0, 0, 4.0)
+    assert preview.gpa == pytest.approx(3.0)
+
+
+def test_editor_preview_with_duplicate_course(conn, tmp_path, student):
+    conn.close()
+    app = headless.make_app(main, tmp_path)
+    try:
+        gpa = app.app
+        gpa.current_student = ('Ann', 'IT22000001')
+        gpa.year_var.set(TERM[0])
+        gpa.semester_var.set(TERM[1])
+        gpa.load_courses()
+        gpa.clear_entries()
+        gpa.add_course_row('Maths', 'A', '3')
+        gpa.add_course_row('Maths', 'C', '3')
+        gpa.show_live_gpa()
+        preview = gpa.sem_gpa_label.cget('text'), gpa.gpa_label.cget('text')
+        assert preview[0].endswith("GPA: 2.00 (Credits: 3.0)")
+        gpa.save_courses()
+        gpa.calculate_gpa()
+        result = gpa.get_student_gpa(1)
+        assert result.term(*TERM) == (2.0, 3.0)
+        assert preview[1] == f"Cumulative GPA: {result.gpa:.2f} (Credits: {result.credits})"
+    finally:
+        app.close()
@@ -0,0 +1,84 @@
+import logging
+import sqlite3
+
+from conftest import init_db
+
+# courses as created before the natural key (and before ON DELETE CASCADE)
+LEGACY_SCHEMA = """
+    CREATE TABLE students (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        index_number TEXT UNIQUE NOT NULL,
+        UNIQUE(name, index_number)
+    );
+    CREATE TABLE courses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        student_id INTEGER,
+        year TEXT, semester TEXT,
+        course_name TEXT, grade TEXT, credits REAL,
+        FOREIGN KEY(student_id) REFERENCES students(id)
+    );
+    INSERT INTO students (name, index_number) VALUES ('Ann', 'IT22000001'), ('Bob', 'IT22000002');
+"""
+
+
+def legacy(database, courses):
+    conn = sqlite3.connect(database)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.executemany("INSERT INTO courses (student_id, year, semester, course_name, grade, credits) "
+                     "VALUES (?, ?, ?, ?, ?, ?)", courses)
+    conn.commit()
+    return conn
+
+
+def test_dedup_keeps_newest_copy_and_backs_up_the_rest(database, caplog):
+    conn = legacy(database, [
+        (1, 'Year 1', 'Semester 1', 'Maths', 'C', 3),
+        (1, 'Year 1', 'Semester 1', 'Maths', 'B', 3),
+        (1, 'Year 1', 'Semester 1', 'Maths', 'A', 3),
+        (2, 'Year 1', 'Semester 1', 'Maths', 'B', 3),
+    ])
+    with caplog.at_level(logging.WARNING, logger='gpa.db'):
+        init_db(conn)
+    assert conn.execute("SELECT id, student_id, grade FROM courses ORDER BY id").fetchall() == [(3, 1, 'A'), (4, 2, 'B')]
+    assert conn.execute("SELECT id, grade FROM removed_duplicate_courses ORDER BY id").fetchall() == [(1, 'C'), (2, 'B')]
+    assert "Removed 2 duplicate course row(s)" in caplog.text
+    conn.close()
+
+
+def test_dedup_leaves_rows_with_null_keys(database):
+    conn = legacy(database, [
+        (1, 'Year 1', 'Semester 1', None, 'A', 3),
+        (1, 'Year 1', 'Semester 1', None, 'B', 3),
+        (1, None, 'Semester 1', 'Maths', 'A', 3),
+        (1, None, 'Semester 1', 'Maths', 'C', 3),
+    ])
+    init_db(conn)
+    assert conn.execute("SELECT COUNT(*) FROM courses").fetchone()[0] == 4
+    assert not conn.execute("SELECT 1 FROM sqlite_master WHERE name='removed_duplicate_courses'").fetchone()
+    assert conn.execute("SELECT 1 FROM sqlite_master WHERE name='idx_courses_natural_key'").fetchone()
+    conn.close()
+
+
+def test_dedup_runs_once(database):
+    conn = legacy(database, [(1, 'Year 1', 'Semester 1', 'Maths', 'A', 3)])
+    init_db(conn)
+    init_db(conn)
+    assert conn.execute("SELECT COUNT(*) FROM courses").fetchone()[0] == 1
+    conn.close()
+
+
+def test_cascade_migration_on_a_bare_connection(database):
+    # The CLIs run init_db on a (conn, cursor) namespace, not a GPAApp
+    conn = legacy(database, [
+        (1, 'Year 1', 'Semester 1', 'Maths', 'A', 3),
+        (2, 'Year 1', 'Semester 1', 'Maths', 'B', 3),
+        (99, 'Year 1', 'Semester 1', 'Maths', 'C', 3),  # orphan: no student 99
+    ])
+    init_db(conn)
+    assert conn.execute("PRAGMA foreign_key_list(courses)").fetchone()[6] == 'CASCADE'
+    assert sorted(sid for sid, in conn.execute("SELECT student_id FROM courses")) == [1, 2]
+    conn.execute("DELETE FROM students WHERE id=1")
+    conn.commit()
+    assert conn.execute("SELECT student_id FROM courses").fetchall() == [(2,)]
+    conn.close()
@@ -0,0 +1,45 @@
+import course_store
+import main
+import rank_index
+
+
+def add(conn, index_number, grade):
+    student_id = conn.execute("INSERT INTO students (name, index_number) VALUES (?, ?)",
+                              (index_number, index_number)).lastrowid
+    conn.execute(main.bulk_import.UPSERT_COURSE, (student_id, 'Year 1', 'Semester 1', 'Maths', grade, 3.0))
+    conn.commit()
+    return student_id
+
+
+def build(conn, database):
+    return rank_index.RankIndex.build(conn, course_store.SQLiteCourseStore(conn, database), main.grade_points)
+
+
+def test_rank_and_percentile(conn, database):
+    best = add(conn, 'IT22000001', 'A')
+    middle = add(conn, 'IT22000002', 'B')
+    tied = add(conn, 'IT22000003', 'B')
+    worst = add(conn, 'IT22000004', 'D')
+    index = build(conn, database)
+    assert index.rank(best) == ('IT22', 1, 4, 100.0)
+    assert index.rank(middle) == index.rank(tied) == ('IT22', 2, 4, 75.0)
+    assert index.rank(worst) == ('IT22', 4, 4, 25.0)
+
+
+def test_alone_in_cohort_is_top(conn, database):
+    lone = add(conn, 'CS21000001', 'C')
+    add(conn, 'IT22000001', 'A')
+    assert build(conn, database).rank(lone) == ('CS21', 1, 1, 100.0)
+
+
+def test_touched_student_is_reranked(conn, database):
+    first = add(conn, 'IT22000001', 'A')
+    second = add(conn, 'IT22000002', 'B')
+    index = build(conn, database)
+    conn.execute("UPDATE courses SET grade='A+' WHERE student_id=?", (second,))
+    conn.execute("UPDATE courses SET grade='C' WHERE student_id=?", (first,))
+    conn.commit()
+    index.touch(first)
+    index.touch(second)
+    assert index.rank(second) == ('IT22', 1, 2, 100.0)
+    assert index.rank(first) == ('IT22', 2, 2, 50.0)
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import sqlite3
+
+import pytest
+
+import async_api
+import course_store
+import main
+
+
+def seed(conn, students=3):
+    conn.executemany("INSERT INTO students (name, index_number) VALUES (?, ?)",
+                     [(f"S{i}", f"IT22{i:07d}") for i in range(1, students + 1)])
+    conn.executemany(main.bulk_import.UPSERT_COURSE,
+                     [(i, 'Year 1', 'Semester 1', 'Maths', 'A', 3.0) for i in range(1, students + 1)])
+    conn.commit()
+
+
+def gpas(database):
+    async def run():
+        async with async_api.AsyncGPA(database, main.grade_points, max_workers=2) as api:
+            return await api.get_gpa([1, 2, 3])
+    return {sid: result.gpa for sid, result in asyncio.run(run()).items()}
+
+
+def test_async_reader_does_not_set_up_shards(conn, database, monkeypatch):
+    seed(conn)
+    monkeypatch.setenv('GPA_SHARDS', '2')
+    assert gpas(database) == {1: 4.0, 2: 4.0, 3: 4.0}
+    assert not conn.execute("SELECT 1 FROM sqlite_master WHERE name='shard_layout'").fetchone()
+    assert not os.path.exists(course_store.shard_paths(database, 2)[0])
+    assert conn.execute("SELECT COUNT(*) FROM courses").fetchone()[0] == 3
+
+
+def test_async_reader_follows_recorded_layout(conn, database, monkeypatch):
+    seed(conn)
+    monkeypatch.setenv('GPA_SHARDS', '2')
+    course_store.open_store(conn, database, grade_points=main.grade_points).close()
+    assert conn.execute("SELECT COUNT(*) FROM courses").fetchone()[0] == 0
+    # A course left in data.db stays there: only a writer adopts it
+    conn.execute("INSERT INTO courses (student_id, year, semester, course_name, grade, credits) "
+                 "VALUES (1, 'Year 1', 'Semester 2', 'Art', 'C', 3)")
+    conn.commit()
+    assert gpas(database) == {1: 4.0, 2: 4.0, 3: 4.0}
+    assert conn.execute("SELECT COUNT(*) FROM courses").fetchone()[0] == 1
+
+
+def test_reader_connection_cannot_write(conn, database):
+    seed(conn)
+    reader = course_store.connect_reader(database)
+    try:
+        store = course_store.open_reader(reader, database)
+        assert store.grade_rows(1) == [('Year 1', 'Semester 1', 'A', 3.0)]
+        with pytest.raises(sqlite3.OperationalError):
+            reader.execute("CREATE TABLE shard_layout (shards INTEGER, block INTEGER)")
+    finally:
+        reader.close()
+
+
+def test_reader_needs_an_existing_database(tmp_path):
+    with pytest.raises(sqlite3.OperationalError):
+        course_store.connect_reader(str(tmp_path / 'missing.db'))
+    assert not (tmp_path / 'missing.db').exists()
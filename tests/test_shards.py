@@ -0,0 +1,109 @@
+import os
+import sqlite3
+
+import pytest
+
+import course_store
+import main
+import summary
+
+
+def seed(conn, students):
+    conn.executemany("INSERT INTO students (name, index_number) VALUES (?, ?)",
+                     [(f"S{i}", f"IT22{i:07d}") for i in range(1, students + 1)])
+    conn.executemany(main.bulk_import.UPSERT_COURSE,
+                     [(i, 'Year 1', term, 'Maths', 'B', 3.0)
+                      for i in range(1, students + 1) for term in ('Semester 1', 'Semester 2')])
+    conn.commit()
+
+
+def test_adoption_moves_every_course_once(conn, database, monkeypatch):
+    seed(conn, 10)
+    before = sorted(conn.execute("SELECT id, student_id, year, semester, course_name, grade, credits FROM courses"))
+    monkeypatch.setenv('GPA_SHARDS', '2')
+    monkeypatch.setenv('GPA_SHARD_BLOCK', '3')
+    store = course_store.open_store(conn, database, grade_points=main.grade_points)
+    try:
+        assert conn.execute("SELECT shards, block FROM shard_layout").fetchall() == [(2, 3)]
+        assert conn.execute("SELECT COUNT(*) FROM courses").fetchone()[0] == 0
+        assert sorted(store.student_courses(range(1, 11))) == before
+        # Students 1-3 and 7-9 in shard 0, 4-6 and 10 in shard 1
+        assert sorted({sid for sid, in store.shards[1].execute("SELECT student_id FROM courses")}) == [4, 5, 6, 10]
+        assert dict(store.shards[0].execute("SELECT student_id, gpa FROM student_gpa")) == \
+            {sid: 3.0 for sid in (1, 2, 3, 7, 8, 9)}
+    finally:
+        store.close()
+
+
+def test_adoption_waits_for_other_writers(conn, database):
+    seed(conn, 4)
+    conn.execute(course_store.LAYOUT_SCHEMA)
+    conn.execute("INSERT INTO shard_layout (shards, block) VALUES (2, 10000)")
+    conn.commit()
+    other = sqlite3.connect(database)
+    blocked = sqlite3.connect(database, timeout=0.1)
+    try:
+        other.execute("BEGIN IMMEDIATE")
+        with pytest.raises(sqlite3.OperationalError):
+            course_store.open_store(blocked, database)
+        other.rollback()
+    finally:
+        other.close()
+        blocked.close()
+    # Nothing moved while the other writer held the lock
+    assert conn.execute("SELECT COUNT(*) FROM courses").fetchone()[0] == 8
+    store = course_store.open_store(conn, database)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM courses").fetchone()[0] == 0
+        assert len(store.student_courses(range(1, 5))) == 8
+    finally:
+        store.close()
+
+
+def test_layout_is_recorded_once(conn, database, monkeypatch):
+    seed(conn, 4)
+    monkeypatch.setenv('GPA_SHARDS', '2')
+    course_store.open_store(conn, database).close()
+    monkeypatch.setenv('GPA_SHARDS', '4')
+    store = course_store.open_store(conn, database)
+    try:
+        assert len(store.shards) == 2
+        assert conn.execute("SELECT COUNT(*) FROM shard_layout").fetchone()[0] == 1
+        assert len(store.student_courses(range(1, 5))) == 8
+    finally:
+        store.close()
+
+
+def test_summary_cli_does_not_shard(conn, database, monkeypatch, capsys):
+    seed(conn, 4)
+    monkeypatch.setenv('GPA_SHARDS', '2')
+    summary.main_cli([database, '--jobs', '1'])
+    assert '8 term rows' in capsys.readouterr().err
+    assert not conn.execute("SELECT 1 FROM sqlite_master WHERE name='shard_layout'").fetchone()
+    assert not os.path.exists(course_store.shard_paths(database, 2)[0])
+
+
+def test_failed_shard_delete_is_retried(conn, database, monkeypatch):
+    seed(conn, 4)
+    monkeypatch.setenv('GPA_SHARDS', '2')
+    store = course_store.open_store(conn, database, grade_points=main.grade_points)
+
+    def fail(fn, groups):
+        raise sqlite3.OperationalError("database is locked")
+    try:
+        with conn:
+            conn.execute("DELETE FROM students WHERE id IN (1, 2)")
+        monkeypatch.setattr(store, 'each', fail)
+        with pytest.raises(sqlite3.OperationalError):
+            store.delete_students([1, 2])
+        assert sorted(sid for sid, in conn.execute("SELECT student_id FROM shard_deletes")) == [1, 2]
+    finally:
+        store.close()
+    # The next writer to open the store finishes the job
+    store = course_store.open_store(conn, database, grade_points=main.grade_points)
+    try:
+        assert sorted({row[1] for row in store.student_courses(range(1, 5))}) == [3, 4]
+        assert store.shards[0].execute("SELECT COUNT(*) FROM student_gpa WHERE student_id IN (1, 2)").fetchone()[0] == 0
+        assert not conn.execute("SELECT 1 FROM shard_deletes").fetchone()
+    finally:
+        store.close()
@@ -0,0 +1,80 @@
+import threading
+import time
+
+import gpa_cache
+import main
+import service
+
+
+def start(fn):
+    box = {}
+    thread = threading.Thread(target=lambda: box.setdefault('result', fn()))
+    thread.start()
+    return thread, box
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_concurrent_calls_share_one_computation():
+    flights = gpa_cache.SingleFlight()
+    release = threading.Event()
+    runs = []
+
+    def compute():
+        runs.append(1)
+        release.wait(5)
+        return 'gpa'
+    leader, first = start(lambda: flights.do((1, 'gpa'), compute))
+    wait_for(lambda: flights.flights)
+    follower, second = start(lambda: flights.do((1, 'gpa'), compute))
+    wait_for(lambda: flights.shared)
+    release.set()
+    leader.join()
+    follower.join()
+    assert first['result'] == second['result'] == 'gpa'
+    assert len(runs) == 1
+
+
+def test_write_drops_the_running_flight():
+    flights = gpa_cache.SingleFlight()
+    release = threading.Event()
+    old, _ = start(lambda: flights.do((1, 'gpa'), lambda: release.wait(5) and 'before'))
+    wait_for(lambda: flights.flights)
+    with flights.writing([1]):
+        # Mid-write: computed alone, not registered for others to join
+        assert flights.do((1, 'gpa'), lambda: 'during') == 'during'
+        assert flights.do((None, 'summary'), lambda: 'summary') == 'summary'
+        assert not flights.flights
+    assert flights.do((1, 'gpa'), lambda: 'after') == 'after'
+    release.set()
+    old.join()
+
+
+def test_other_students_still_share_during_a_write():
+    flights = gpa_cache.SingleFlight()
+    with flights.writing([1]):
+        seen = []
+        flights.do((2, 'gpa'), lambda: seen.append(dict(flights.flights)))
+    assert list(seen[0]) == [(2, 'gpa')]
+
+
+def test_service_reads_after_a_write_are_fresh(conn, database):
+    student_id = conn.execute("INSERT INTO students (name, index_number) VALUES ('Ann', 'IT22000001')").lastrowid
+    conn.commit()
+    pool = service.Pool(database, readers=2)
+    try:
+        api = service.GPAService(pool, main.grade_points)
+        body = {'year': 'Year 1', 'semester': 'Semester 1', 'courses': [['Maths', 'C', 3]]}
+        assert api.dispatch('PUT', f'/students/{student_id}/courses', body=body)[0] == 200
+        assert api.dispatch('GET', f'/students/{student_id}/gpa')[1]['gpa'] == 2.0
+        body['courses'] = [['Maths', 'A', 3]]
+        api.dispatch('PUT', f'/students/{student_id}/courses', body=body)
+        assert api.dispatch('GET', f'/students/{student_id}/gpa')[1]['gpa'] == 4.0
+        assert api.flights.writes == {} and api.flights.active == 0
+    finally:
+        pool.close()